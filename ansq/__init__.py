@@ -1,5 +1,11 @@
+from .codecs import MessageCodec, PreparedMessage, register_codec
 from .tcp.connection import ConnectionFeatures, ConnectionOptions, open_connection
+from .tcp.failover import FailoverPolicy
+from .tcp.publish_buffer import OverflowPolicy, PublishBufferOptions
 from .tcp.reader import create_reader
+from .tcp.reconnect import Jitter, ReconnectLimiter, ReconnectPolicy
+from .tcp.socket_options import KeepaliveOptions, SocketOptions
+from .tcp.spill import FsyncPolicy, SpillOptions
 from .tcp.writer import create_writer
 
 __all__ = [
@@ -7,7 +13,20 @@ __all__ = [
     "ConnectionOptions",
     "create_reader",
     "create_writer",
+    "FailoverPolicy",
+    "FsyncPolicy",
     "http",
+    "Jitter",
+    "KeepaliveOptions",
+    "MessageCodec",
     "open_connection",
+    "OverflowPolicy",
+    "PreparedMessage",
+    "PublishBufferOptions",
+    "ReconnectLimiter",
+    "ReconnectPolicy",
+    "register_codec",
+    "SocketOptions",
+    "SpillOptions",
     "tcp",
 ]
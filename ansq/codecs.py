@@ -0,0 +1,172 @@
+"""Message body codecs.
+
+A codec set in ``ConnectionOptions.codec`` encodes published messages
+and decodes ``NSQMessage.decoded`` of consumed ones. Bytes-like messages
+are considered encoded and published as is.
+"""
+import abc
+import json
+from typing import Any, Dict, Optional, Union
+
+from ansq.typedefs import BytesLike
+from ansq.utils import (
+    JSONEncoder,
+    convert_to_bytes,
+    convert_to_str,
+    is_bytes_like,
+    to_bytes,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class MessageCodec(metaclass=abc.ABCMeta):
+    """Serializer of message bodies."""
+
+    # Name to refer to the codec in `ConnectionOptions.codec`
+    name: str
+
+    @abc.abstractmethod  # pragma: no cover
+    def encode(self, value: Any) -> bytes:
+        pass
+
+    @abc.abstractmethod  # pragma: no cover
+    def decode(self, data: bytes) -> Any:
+        pass
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.name}>"
+
+
+class JSONCodec(MessageCodec):
+    """JSON codec of the standard library.
+
+    Supports types supported by ``convert_to_str()`` as well.
+    """
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, cls=JSONEncoder, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class ORJSONCodec(MessageCodec):
+    """JSON codec backed by ``orjson``."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson is required for orjson codec")
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=convert_to_str)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(MessageCodec):
+    """MessagePack codec backed by ``msgpack``."""
+
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack is required for msgpack codec")
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True, default=convert_to_str)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+_codecs: Dict[str, MessageCodec] = {}
+
+
+def register_codec(codec: MessageCodec) -> None:
+    """Register the codec under its name, a codec of the same name
+    is replaced.
+    """
+    _codecs[codec.name] = codec
+
+
+def get_codec(name: str) -> MessageCodec:
+    """Return a registered codec by its name.
+
+    :raises ValueError: The codec is not registered.
+    """
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown codec {name!r}, available codecs: {', '.join(sorted(_codecs))}"
+        ) from None
+
+
+def resolve_codec(codec: Optional[Union[str, MessageCodec]]) -> Optional[MessageCodec]:
+    """Return a codec by its name or the codec itself."""
+    if isinstance(codec, str):
+        return get_codec(codec)
+    return codec
+
+
+class PreparedMessage:
+    """Message encoded once to be published many times.
+
+    Publishing methods accept prepared messages and send the cached body,
+    so retries, failover and batching don't serialize the message again.
+    The size of the body is cached to check size limits before publishing.
+    """
+
+    __slots__ = ("body", "size")
+
+    def __init__(
+        self, message: Any, codec: Optional[Union[str, MessageCodec]] = None
+    ) -> None:
+        self.body: BytesLike = encode_message(message, resolve_codec(codec))
+        self.size: int = len(self.body)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.size} bytes>"
+
+
+@convert_to_bytes.register(PreparedMessage)
+def _prepared_message_to_bytes(value: PreparedMessage) -> BytesLike:
+    return value.body
+
+
+def encode_message(message: Any, codec: Optional[MessageCodec] = None) -> BytesLike:
+    """Encode a message body with the codec.
+
+    Bytes-like messages, i.e. objects supporting the buffer protocol,
+    are returned as is, other messages are converted with ``to_bytes()``
+    if there's no codec. Prepared messages are never encoded again.
+    """
+    if isinstance(message, PreparedMessage):
+        return message.body
+    if codec is None or is_bytes_like(message):
+        return to_bytes(message)
+    return codec.encode(message)
+
+
+register_codec(JSONCodec())
+if orjson is not None:
+    register_codec(ORJSONCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
@@ -1,4 +1,5 @@
 from .lookupd import NsqLookupd
+from .stats import ChannelStats, TopicStats
 from .writer import NSQDHTTPWriter
 
-__all__ = ["NsqLookupd", "NSQDHTTPWriter"]
+__all__ = ["ChannelStats", "NsqLookupd", "NSQDHTTPWriter", "TopicStats"]
@@ -1,14 +1,20 @@
 import asyncio
+import contextlib
 import json
-import urllib.error
 import urllib.parse
-import urllib.request
-from typing import TYPE_CHECKING, Any, Optional, TypeVar
-
-from ansq.typedefs import HTTPResponse
-from .http_exceptions import HTTP_EXCEPTIONS, NSQHTTPException
-from .unix_client import UnixHTTPConnection
-from ..utils import convert_to_bytes, is_unix_socket
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional, Tuple, TypeVar
+
+from ansq.typedefs import BytesLike, HTTPResponse
+from .client import (
+    HTTPClientConnection,
+    HTTPClientError,
+    HTTPClientResponse,
+    HTTPConnectionClosed,
+    HTTPResponseHead,
+)
+from .http_exceptions import HTTP_EXCEPTIONS, HTTPConnectionError, NSQHTTPException
+from .pool import DEFAULT_IDLE_TIMEOUT, DEFAULT_POOL_SIZE, HTTPConnectionPool
+from ..utils import to_bytes
 
 if TYPE_CHECKING:
     from asyncio.events import AbstractEventLoop
@@ -16,66 +22,158 @@ if TYPE_CHECKING:
 _T = TypeVar("_T", bound="NSQHTTPConnection")
 
 HTTP_TIMEOUT = 10
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Methods of requests safe to send twice, e.g. `POST /pub` is not, as the server
+# could have published the message before closing the connection
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
 
 
 class NSQHTTPConnection:
-    """XXX"""
+    """Connection to an HTTP API of nsqd or nsqlookupd.
+
+    Requests are sent over a pool of kept alive connections, see
+    :class:`~ansq.http.pool.HTTPConnectionPool`. ``close()`` closes
+    the pool. The pool is owned by the connection, so its requests don't
+    compete with other HTTP connections, and ``pool_size`` limits
+    the number of concurrent requests.
+    """
 
     def __init__(
         self,
         addr: str = "127.0.0.1:4151",
         *,
         loop: Optional["AbstractEventLoop"] = None,
+        timeout: float = HTTP_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_waiting: Optional[int] = None,
     ) -> None:
         self._loop = loop or asyncio.get_event_loop()
         self._addr = addr
-        self._is_unix_socket = is_unix_socket(self._addr)
+        self._timeout = timeout
+        self._pool = HTTPConnectionPool(
+            addr, max_size=pool_size, idle_timeout=idle_timeout, max_waiting=max_waiting
+        )
+
+    @property
+    def addr(self) -> str:
+        return self._addr
+
+    @property
+    def pool(self) -> HTTPConnectionPool:
+        return self._pool
 
     async def close(self) -> None:
-        pass
+        """Close the connection pool."""
+        await self._pool.close()
 
     async def perform_request(
         self, method: str, url: str, params: Any, body: Any
     ) -> HTTPResponse:
-        encoded_params = ""
-        if params:
-            encoded_params = "?" + urllib.parse.urlencode(params)
-
-        return await self._loop.run_in_executor(
-            None,
-            _do_request,
-            self._addr,
-            method,
-            urllib.parse.urljoin(url, encoded_params),
-            convert_to_bytes(body) if body else body
-        )
+        target = _get_target(url, params)
+        data = to_bytes(body) if body else None
+        try:
+            response = await asyncio.wait_for(
+                self._request(method, target, data), self._timeout
+            )
+        except (OSError, asyncio.TimeoutError, HTTPClientError) as exc:
+            raise HTTPConnectionError("N/A", str(exc) or repr(exc), exc) from exc
+
+        return _process_response(response)
+
+    @contextlib.asynccontextmanager
+    async def stream_request(
+        self,
+        method: str,
+        url: str,
+        params: Any,
+        *,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """Send a request and yield an iterator of response body chunks.
+
+        Error statuses are raised before the body is yielded, the request
+        timeout applies to reading of every chunk. The connection is reused
+        only if the whole body is read within the block.
+        """
+        target = _get_target(url, params)
+        try:
+            connection, head = await asyncio.wait_for(
+                self._send_request(method, target, None), self._timeout
+            )
+        except (OSError, asyncio.TimeoutError, HTTPClientError) as exc:
+            raise HTTPConnectionError("N/A", str(exc) or repr(exc), exc) from exc
+
+        try:
+            if not (200 <= head.status <= 300):
+                body = b"".join([chunk async for chunk in connection.iter_body()])
+                _process_response(HTTPClientResponse(head.status, head.headers, body))
+
+            yield self._iter_body(connection, chunk_size)
+        finally:
+            self._pool.release(connection)
+
+    async def _iter_body(
+        self, connection: HTTPClientConnection, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        chunks = connection.iter_body(chunk_size).__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), self._timeout)
+            except StopAsyncIteration:
+                return
+            except (OSError, asyncio.TimeoutError, HTTPClientError) as exc:
+                raise HTTPConnectionError("N/A", str(exc) or repr(exc), exc) from exc
+            yield chunk
+
+    async def _request(
+        self, method: str, target: str, body: Optional[BytesLike]
+    ) -> HTTPClientResponse:
+        connection, head = await self._send_request(method, target, body)
+        try:
+            chunks = [chunk async for chunk in connection.iter_body()]
+        finally:
+            self._pool.release(connection)
+        return HTTPClientResponse(head.status, head.headers, b"".join(chunks))
+
+    async def _send_request(
+        self, method: str, target: str, body: Optional[BytesLike]
+    ) -> Tuple[HTTPClientConnection, HTTPResponseHead]:
+        """Send a request over a pooled connection and read the response head,
+        the connection must be released once the body is read.
+
+        An idempotent request over an idle connection closed by the server
+        is retried over another connection.
+        """
+        is_idempotent = method.upper() in IDEMPOTENT_METHODS
+        while True:
+            connection = await self._pool.acquire()
+            is_reused = connection.requests_count > 0 and is_idempotent
+            try:
+                return connection, await connection.send_request(method, target, body)
+            except HTTPConnectionClosed:
+                self._pool.release(connection)
+                if not is_reused:
+                    raise
+            except BaseException:
+                self._pool.release(connection)
+                raise
 
     def __repr__(self) -> str:
         cls_name = self.__class__.__name__
         return f"<{cls_name}: {self._addr}>"
 
 
-def _do_request(addr: str, method: str, url: str, body: Any) -> HTTPResponse:
-    if is_unix_socket(addr):
-        with UnixHTTPConnection(path=addr, timeout=HTTP_TIMEOUT) as conn:
-            return _process_request(conn.make_request(
-                method,
-                urllib.parse.urljoin("/", url),
-                body=body
-            ))
-    else:
-        request = urllib.request.Request(
-            urllib.parse.urljoin(f"http://{addr}", url),
-            data=body,
-            headers={},
-            method=method
-        )
-        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as resp:
-            return _process_request(resp)
+def _get_target(url: str, params: Any) -> str:
+    encoded_params = ""
+    if params:
+        encoded_params = "?" + urllib.parse.urlencode(params)
+    return urllib.parse.urljoin("/", urllib.parse.urljoin(url, encoded_params))
 
 
-def _process_request(resp) -> HTTPResponse:
-    resp_body = resp.read()
+def _process_response(resp: HTTPClientResponse) -> HTTPResponse:
+    resp_body = resp.body
 
     try:
         decoded = resp_body.decode()
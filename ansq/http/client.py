@@ -0,0 +1,267 @@
+"""Asyncio HTTP/1.1 client of nsqd and nsqlookupd HTTP APIs.
+
+Only what the APIs need is supported: requests with a body of known length
+and responses with ``Content-Length``, chunked or close-delimited bodies.
+Connections are kept alive, so they can be reused by the next requests.
+"""
+import asyncio
+from enum import Enum
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+from ansq.typedefs import BytesLike
+
+from ..utils import is_unix_socket
+
+# Statuses of responses without a body
+_NO_BODY_STATUSES = frozenset((204, 304))
+
+
+class HTTPClientError(Exception):
+    """Malformed response or unexpectedly closed connection."""
+
+
+class HTTPConnectionClosed(HTTPClientError):
+    """Connection is closed before a response is started, e.g. a kept alive
+    connection is closed by the server, so the request can be retried.
+    """
+
+
+class _BodyFraming(Enum):
+    # No body, e.g. a response to HEAD
+    NONE = "none"
+    # Body of the length set with Content-Length
+    LENGTH = "length"
+    # Chunked transfer encoding
+    CHUNKED = "chunked"
+    # Body ends when the connection is closed
+    CLOSE = "close"
+
+
+class HTTPResponseHead(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+
+
+class HTTPClientResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class HTTPClientConnection:
+    """Persistent HTTP connection to a TCP address or a unix socket."""
+
+    def __init__(
+        self,
+        addr: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        host: str,
+    ) -> None:
+        self._addr = addr
+        self._reader = reader
+        self._writer = writer
+        self._host = host
+        self._is_reusable = True
+        self._requests_count = 0
+        # Framing of the current response body
+        self._keep_alive = False
+        self._body_framing = _BodyFraming.NONE
+        self._body_length = 0
+
+    @classmethod
+    async def open(cls, addr: str) -> "HTTPClientConnection":
+        """Open a connection to ``host:port`` or a unix socket path."""
+        # The socket could be created after the addr was given, so check it
+        # on every connect
+        if is_unix_socket(addr):
+            reader, writer = await asyncio.open_unix_connection(addr)
+            return cls(addr, reader, writer, host="localhost")
+
+        host, port = addr.rsplit(":", 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+        return cls(addr, reader, writer, host=addr)
+
+    @property
+    def addr(self) -> str:
+        return self._addr
+
+    @property
+    def is_reusable(self) -> bool:
+        """True if the connection can send the next request."""
+        return self._is_reusable and not self._writer.is_closing()
+
+    @property
+    def is_healthy(self) -> bool:
+        """True if the connection is reusable and isn't closed by the server
+        while idle.
+        """
+        return self.is_reusable and not self._reader.at_eof()
+
+    @property
+    def requests_count(self) -> int:
+        """Number of requests sent over the connection."""
+        return self._requests_count
+
+    async def request(
+        self, method: str, target: str, body: Optional[BytesLike] = None
+    ) -> HTTPClientResponse:
+        """Send a request and read the whole response.
+
+        :raises HTTPClientError: The response is malformed or the connection
+            is closed before the response is read.
+        """
+        head = await self.send_request(method, target, body)
+        chunks = [chunk async for chunk in self.iter_body()]
+        return HTTPClientResponse(head.status, head.headers, b"".join(chunks))
+
+    async def send_request(
+        self, method: str, target: str, body: Optional[BytesLike] = None
+    ) -> HTTPResponseHead:
+        """Send a request and read the response head.
+
+        The body must be read with ``iter_body()`` before the connection
+        can send the next request.
+
+        :raises HTTPClientError: The response head is malformed or
+            the connection is closed before the response is read.
+        """
+        if not self.is_reusable:
+            raise HTTPClientError("Connection is not reusable")
+        # Any failure leaves the stream in an unknown state
+        self._is_reusable = False
+        self._requests_count += 1
+
+        head = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {self._host}",
+            "Accept-Encoding: identity",
+        ]
+        if body is not None or method in ("POST", "PUT"):
+            head.append(f"Content-Length: {len(body) if body is not None else 0}")
+        chunks: List[BytesLike] = ["\r\n".join(head + ["", ""]).encode("latin-1")]
+        if body:
+            chunks.append(body)
+        try:
+            self._writer.writelines(chunks)
+            await self._writer.drain()
+            status_line = await self._reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError as exc:
+            if exc.partial:
+                raise HTTPClientError(f"Failed to read response: {exc!r}") from exc
+            raise HTTPConnectionClosed("Connection closed by the server") from exc
+        except ConnectionError as exc:
+            raise HTTPConnectionClosed(f"Connection closed: {exc!r}") from exc
+        except asyncio.LimitOverrunError as exc:
+            raise HTTPClientError(f"Failed to read response: {exc!r}") from exc
+
+        try:
+            return await self._read_head(method, status_line)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+            raise HTTPClientError(f"Failed to read response: {exc!r}") from exc
+
+    async def iter_body(self, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield the response body by chunks of at most ``chunk_size`` bytes,
+        by chunks as they come if it's not set.
+
+        :raises HTTPClientError: The body is malformed or the connection
+            is closed before the body is read.
+        """
+        try:
+            async for chunk in self._iter_body(chunk_size):
+                yield chunk
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+            raise HTTPClientError(f"Failed to read response: {exc!r}") from exc
+
+        self._is_reusable = self._keep_alive
+
+    async def _read_head(self, method: str, status_line: bytes) -> HTTPResponseHead:
+        try:
+            version, status_code = status_line.decode("latin-1").split(None, 2)[:2]
+            status = int(status_code)
+        except ValueError:
+            raise HTTPClientError(f"Invalid status line: {status_line!r}") from None
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            self._keep_alive = connection != "close"
+        else:
+            self._keep_alive = connection == "keep-alive"
+
+        if method == "HEAD" or status in _NO_BODY_STATUSES or status < 200:
+            self._body_framing = _BodyFraming.NONE
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            self._body_framing = _BodyFraming.CHUNKED
+        elif "content-length" in headers:
+            try:
+                self._body_length = int(headers["content-length"])
+            except ValueError:
+                raise HTTPClientError(
+                    f"Invalid Content-Length: {headers['content-length']!r}"
+                ) from None
+            self._body_framing = _BodyFraming.LENGTH
+        else:
+            self._body_framing = _BodyFraming.CLOSE
+            self._keep_alive = False
+
+        return HTTPResponseHead(status, headers)
+
+    async def _iter_body(self, chunk_size: Optional[int]) -> AsyncIterator[bytes]:
+        if self._body_framing is _BodyFraming.LENGTH:
+            async for chunk in self._iter_exactly(self._body_length, chunk_size):
+                yield chunk
+
+        elif self._body_framing is _BodyFraming.CHUNKED:
+            while True:
+                size_line = await self._reader.readuntil(b"\r\n")
+                try:
+                    size = int(size_line.split(b";", 1)[0], 16)
+                except ValueError:
+                    raise HTTPClientError(
+                        f"Invalid chunk size: {size_line!r}"
+                    ) from None
+                if size == 0:
+                    break
+                async for chunk in self._iter_exactly(size, chunk_size):
+                    yield chunk
+                await self._reader.readexactly(2)
+
+            # Skip trailers
+            while await self._reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+
+        elif self._body_framing is _BodyFraming.CLOSE:
+            while True:
+                chunk = await self._reader.read(chunk_size or -1)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def _iter_exactly(
+        self, size: int, chunk_size: Optional[int]
+    ) -> AsyncIterator[bytes]:
+        while size > 0:
+            chunk = await self._reader.readexactly(min(size, chunk_size or size))
+            size -= len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self._is_reusable = False
+        self._writer.close()
+
+    async def wait_closed(self) -> None:
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self._addr}>"
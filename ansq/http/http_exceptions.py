@@ -5,6 +5,10 @@ class NSQHTTPException(Exception):
     """XXX"""
 
 
+class ConnectionPoolFull(NSQHTTPException):
+    """All pooled connections are in use and the wait queue is full."""
+
+
 class TransportError(NSQHTTPException):
     """XXX"""
 
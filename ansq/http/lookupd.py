@@ -1,13 +1,133 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import attr
+
 from ansq.typedefs import HTTPResponse
 
 from .base import NSQHTTPConnection
 
 
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class Producer:
+    """nsqd registered in nsqlookupd."""
+
+    broadcast_address: str
+    tcp_port: int
+    http_port: int = 0
+    hostname: str = ""
+    version: str = ""
+
+    @property
+    def tcp_address(self) -> str:
+        return f"{self.broadcast_address}:{self.tcp_port}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Producer":
+        return cls(
+            broadcast_address=data["broadcast_address"],
+            tcp_port=int(data["tcp_port"]),
+            http_port=int(data.get("http_port", 0)),
+            hostname=data.get("hostname", ""),
+            version=data.get("version", ""),
+        )
+
+
+Producers = Tuple[Producer, ...]
+
+
+def parse_producers(response: HTTPResponse) -> Producers:
+    """Return producers of a ``/lookup`` or ``/nodes`` response.
+
+    :raises ValueError: The response has no valid producers.
+    """
+    if not isinstance(response, dict):
+        raise ValueError(f"lookupd response must be a dict: {response!r}")
+
+    producers = response.get("producers")
+    if producers is None:
+        raise ValueError("producers not found in response data")
+
+    if not isinstance(producers, list):
+        raise ValueError(f"producers must be a list: {producers}")
+
+    for producer in producers:
+        if not isinstance(producer, dict):
+            raise ValueError(f"producer must be a dict: {producer}")
+
+    return tuple(Producer.from_dict(producer) for producer in producers)
+
+
+def _retrieve_exception(request: "asyncio.Task[Producers]") -> None:
+    # Callers get the exception, don't warn if all of them are cancelled
+    if not request.cancelled():
+        request.exception()
+
+
 class NsqLookupd(NSQHTTPConnection):
     """
+    Producers of ``lookup_producers()`` and ``node_producers()`` are cached
+    for ``cache_ttl`` seconds, concurrent calls share a single request.
+
     :see: http://nsq.io/components/nsqlookupd.html
     """
 
+    def __init__(
+        self, addr: str = "127.0.0.1:4151", *, cache_ttl: float = 0, **kwargs: Any
+    ) -> None:
+        super().__init__(addr, **kwargs)
+        self._cache_ttl = cache_ttl
+        # Producers with the time they expire at by topics, `None` for nodes
+        self._producers_cache: Dict[Optional[str], Tuple[float, Producers]] = {}
+        self._pending_producers: Dict[Optional[str], "asyncio.Task[Producers]"] = {}
+
+    @property
+    def cache_ttl(self) -> float:
+        """Return seconds producers are cached for."""
+        return self._cache_ttl
+
+    async def lookup_producers(self, topic: str) -> Producers:
+        """Return producers of the topic."""
+        return await self._get_producers(topic)
+
+    async def node_producers(self) -> Producers:
+        """Return all known nsqd nodes."""
+        return await self._get_producers(None)
+
+    def invalidate_cache(self) -> None:
+        """Drop cached producers, the next calls query lookupd."""
+        self._producers_cache.clear()
+
+    async def _get_producers(self, topic: Optional[str]) -> Producers:
+        cached = self._producers_cache.get(topic)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        request = self._pending_producers.get(topic)
+        if request is None:
+            request = self._loop.create_task(self._request_producers(topic))
+            request.add_done_callback(_retrieve_exception)
+            self._pending_producers[topic] = request
+
+        # A cancelled caller leaves the request to the other ones
+        return await asyncio.shield(request)
+
+    async def _request_producers(self, topic: Optional[str]) -> Producers:
+        try:
+            if topic is None:
+                response = await self.nodes()
+            else:
+                response = await self.lookup(topic)
+            producers = parse_producers(response)
+        finally:
+            del self._pending_producers[topic]
+
+        if self._cache_ttl > 0:
+            expires_at = time.monotonic() + self._cache_ttl
+            self._producers_cache[topic] = (expires_at, producers)
+        return producers
+
     async def ping(self) -> HTTPResponse:
         """Monitoring endpoint.
         :returns: should return `"OK"`, otherwise raises an exception.
@@ -0,0 +1,178 @@
+"""Pool of kept alive HTTP connections to an address."""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .client import HTTPClientConnection
+from .http_exceptions import ConnectionPoolFull
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+
+class HTTPConnectionPool:
+    """Bounded pool of HTTP connections to an address.
+
+    At most ``max_size`` connections are open at once, requests wait for
+    a free connection. If ``max_waiting`` is set, requests exceeding it
+    are rejected instead of waiting. Idle connections are reused in LIFO
+    order and closed after ``idle_timeout`` seconds or if they fail
+    a health check.
+    """
+
+    def __init__(
+        self,
+        addr: str,
+        *,
+        max_size: int = DEFAULT_POOL_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_waiting: Optional[int] = None,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be greater than zero")
+        if max_waiting is not None and max_waiting < 0:
+            raise ValueError("max_waiting must not be negative")
+
+        self._addr = addr
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_size)
+        # Idle connections with the time they were released
+        self._idle: Deque[Tuple[HTTPClientConnection, float]] = deque()
+        self._in_use = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._acquired = 0
+        self._is_closed = False
+
+    @property
+    def addr(self) -> str:
+        return self._addr
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle and in use."""
+        return len(self._idle) + self._in_use
+
+    @property
+    def idle_size(self) -> int:
+        return len(self._idle)
+
+    @property
+    def in_use(self) -> int:
+        """Return the number of connections running requests."""
+        return self._in_use
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of requests waiting for a free connection."""
+        return self._waiting
+
+    @property
+    def rejected(self) -> int:
+        """Return the number of requests rejected as the wait queue is full."""
+        return self._rejected
+
+    @property
+    def acquired(self) -> int:
+        """Return the number of connections acquired for requests."""
+        return self._acquired
+
+    @property
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    async def acquire(self) -> HTTPClientConnection:
+        """Return an idle connection or a new one, wait if the pool is full.
+
+        The connection must be returned with ``release()``.
+
+        :raises ConnectionPoolFull: The pool is full and ``max_waiting``
+            requests are waiting already.
+        """
+        if self._is_closed:
+            raise RuntimeError("Connection pool is closed")
+
+        if self._semaphore.locked():
+            if self._max_waiting is not None and self._waiting >= self._max_waiting:
+                self._rejected += 1
+                raise ConnectionPoolFull(
+                    f"All {self._max_size} connections to {self._addr} are busy "
+                    f"and {self._waiting} requests are waiting"
+                )
+            self._waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        try:
+            connection = self._get_idle_connection()
+            if connection is None:
+                connection = await HTTPClientConnection.open(self._addr)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        self._in_use += 1
+        self._acquired += 1
+        return connection
+
+    def release(self, connection: HTTPClientConnection) -> None:
+        """Return a connection to the pool, it's closed if it can't be reused
+        or the pool is closed.
+        """
+        self._in_use -= 1
+        self._semaphore.release()
+
+        if self._is_closed or not connection.is_reusable:
+            connection.close()
+            return
+
+        self._idle.append((connection, time.monotonic()))
+        self._close_expired()
+
+    async def close(self) -> None:
+        """Close idle connections, connections in use are closed once
+        released.
+        """
+        self._is_closed = True
+        connections = [connection for connection, _ in self._idle]
+        self._idle.clear()
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            await connection.wait_closed()
+
+    def _get_idle_connection(self) -> Optional[HTTPClientConnection]:
+        self._close_expired()
+        while self._idle:
+            connection, _ = self._idle.pop()
+            if connection.is_healthy:
+                return connection
+            connection.close()
+        return None
+
+    def _close_expired(self) -> None:
+        """Close connections idle for longer than the idle timeout, the oldest
+        ones are on the left.
+        """
+        deadline = time.monotonic() - self._idle_timeout
+        while self._idle and self._idle[0][1] <= deadline:
+            connection, _ = self._idle.popleft()
+            connection.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__}: {self._addr}, "
+            f"size={self.size}/{self._max_size}, idle={self.idle_size}, "
+            f"waiting={self._waiting}>"
+        )
@@ -0,0 +1,240 @@
+"""Typed records of nsqd ``/stats`` parsed from a stream of the response.
+
+The response of an nsqd with thousands of topics and channels could take
+tens of megabytes, so it's never read as a whole. Topics are decoded one
+by one as they arrive, only the topic being decoded is kept in memory.
+
+:see: https://nsq.io/components/nsqd.html#get-stats
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+import attr
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class TopicStats:
+    topic_name: str
+    depth: int = 0
+    backend_depth: int = 0
+    message_count: int = 0
+    message_bytes: int = 0
+    channel_count: int = 0
+    paused: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopicStats":
+        return cls(
+            topic_name=data["topic_name"],
+            depth=data.get("depth", 0),
+            backend_depth=data.get("backend_depth", 0),
+            message_count=data.get("message_count", 0),
+            message_bytes=data.get("message_bytes", 0),
+            channel_count=len(data.get("channels") or ()),
+            paused=data.get("paused", False),
+        )
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class ChannelStats:
+    topic_name: str
+    channel_name: str
+    depth: int = 0
+    backend_depth: int = 0
+    in_flight_count: int = 0
+    deferred_count: int = 0
+    message_count: int = 0
+    requeue_count: int = 0
+    timeout_count: int = 0
+    client_count: int = 0
+    paused: bool = False
+
+    @classmethod
+    def from_dict(cls, topic_name: str, data: Dict[str, Any]) -> "ChannelStats":
+        client_count = data.get("client_count")
+        if client_count is None:
+            # nsqd < 1.2 has no client count, only clients
+            client_count = len(data.get("clients") or ())
+
+        return cls(
+            topic_name=topic_name,
+            channel_name=data["channel_name"],
+            depth=data.get("depth", 0),
+            backend_depth=data.get("backend_depth", 0),
+            in_flight_count=data.get("in_flight_count", 0),
+            deferred_count=data.get("deferred_count", 0),
+            message_count=data.get("message_count", 0),
+            requeue_count=data.get("requeue_count", 0),
+            timeout_count=data.get("timeout_count", 0),
+            client_count=client_count,
+            paused=data.get("paused", False),
+        )
+
+
+async def iter_stats(
+    chunks: AsyncIterator[bytes],
+    topic: Optional[str] = None,
+    channel: Optional[str] = None,
+) -> AsyncIterator[Union[TopicStats, ChannelStats]]:
+    """Yield stats of every topic followed by stats of its channels.
+
+    Stats are parsed from chunks of a JSON response of ``/stats``. Topics
+    and channels not matching the ``topic`` and ``channel`` filters are
+    skipped.
+
+    :raises ValueError: The response is not valid JSON stats.
+    """
+    stream = _JSONStream(chunks)
+    async for topic_data in _iter_topics(stream):
+        topic_stats = TopicStats.from_dict(topic_data)
+        if topic is not None and topic_stats.topic_name != topic:
+            continue
+
+        yield topic_stats
+        for channel_data in topic_data.get("channels") or ():
+            if channel is not None and channel_data["channel_name"] != channel:
+                continue
+            yield ChannelStats.from_dict(topic_stats.topic_name, channel_data)
+
+    # Read the rest, so the connection could be reused
+    await stream.read_to_end()
+
+
+async def _iter_topics(stream: "_JSONStream") -> AsyncIterator[Dict[str, Any]]:
+    """Yield items of ``topics`` of the stats object."""
+    await stream.expect("{")
+    if await stream.peek() == "}":
+        stream.advance()
+        return
+
+    while True:
+        key = await stream.read_value()
+        await stream.expect(":")
+        if key == "topics" and await stream.peek() == "[":
+            async for topic_data in stream.iter_array():
+                if not isinstance(topic_data, dict):
+                    raise ValueError(f"Expected topic stats, got {topic_data!r}")
+                yield topic_data
+        elif key == "data" and await stream.peek() == "{":
+            # nsqd < 1.0 wraps stats with the status
+            async for topic_data in _iter_topics(stream):
+                yield topic_data
+        else:
+            await stream.read_value()
+
+        char = await stream.peek()
+        stream.advance()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' in stats, got {char!r}")
+
+
+class _JSONStream:
+    """Reader of JSON values from a stream of chunks.
+
+    Values are decoded with ``json.JSONDecoder.raw_decode()`` once they
+    are fully buffered, structure of enclosing objects and arrays is walked
+    by the caller.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._is_eof = False
+
+    async def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        await self._skip_whitespace()
+        return self._buffer[self._pos]
+
+    def advance(self) -> None:
+        """Consume the character returned by ``peek()``."""
+        self._pos += 1
+
+    async def expect(self, char: str) -> None:
+        actual = await self.peek()
+        if actual != char:
+            raise ValueError(f"Expected {char!r} in stats, got {actual!r}")
+        self.advance()
+
+    async def read_value(self) -> Any:
+        await self._skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._is_eof:
+                    raise
+                # Wait for the buffered part of the value to double, so
+                # a large value isn't decoded again on every chunk
+                attempted = len(self._buffer) - self._pos
+                while len(self._buffer) - self._pos < 2 * attempted:
+                    if not await self._read_chunk():
+                        break
+                continue
+
+            # A number could be cut by the end of the chunk
+            if end == len(self._buffer) and not self._is_eof:
+                await self._read_chunk()
+                continue
+
+            self._pos = end
+            return value
+
+    async def iter_array(self) -> AsyncIterator[Any]:
+        await self.expect("[")
+        if await self.peek() == "]":
+            self.advance()
+            return
+
+        while True:
+            yield await self.read_value()
+            char = await self.peek()
+            self.advance()
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in stats, got {char!r}")
+
+    async def read_to_end(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        async for _ in self._chunks:
+            pass
+
+    async def _skip_whitespace(self) -> None:
+        while True:
+            match = _WHITESPACE.match(self._buffer, self._pos)
+            assert match is not None
+            self._pos = match.end()
+            if self._pos < len(self._buffer):
+                return
+            if not await self._read_chunk():
+                raise ValueError("Unexpected end of stats")
+
+    async def _read_chunk(self) -> bool:
+        """Append the next chunk to the buffer dropping the consumed part,
+        return false at the end of the stream.
+        """
+        if self._is_eof:
+            return False
+
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._is_eof = True
+            text = self._text_decoder.decode(b"", final=True)
+        else:
+            text = self._text_decoder.decode(chunk)
+
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        return True
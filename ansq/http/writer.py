@@ -1,9 +1,10 @@
-from typing import Any
+from typing import Any, AsyncIterator, Optional, Union
 
 from ansq.typedefs import HTTPResponse
 
 from ..utils import convert_to_str
 from .base import NSQHTTPConnection
+from .stats import ChannelStats, TopicStats, iter_stats
 
 
 class NSQDHTTPWriter(NSQHTTPConnection):
@@ -22,11 +23,37 @@ class NSQDHTTPWriter(NSQHTTPConnection):
         resp = await self.perform_request("GET", "info", None, None)
         return resp
 
-    async def stats(self) -> HTTPResponse:
-        """Returns stats information."""
-        resp = await self.perform_request("GET", "stats", {"format": "json"}, None)
+    async def stats(
+        self, topic: Optional[str] = None, channel: Optional[str] = None
+    ) -> HTTPResponse:
+        """Returns stats information, optionally of a topic and its channel."""
+        params = {"format": "json"}
+        if topic is not None:
+            params["topic"] = topic
+        if channel is not None:
+            params["channel"] = channel
+        resp = await self.perform_request("GET", "stats", params, None)
         return resp
 
+    async def stream_stats(
+        self, topic: Optional[str] = None, channel: Optional[str] = None
+    ) -> AsyncIterator[Union[TopicStats, ChannelStats]]:
+        """Yield stats of every topic followed by stats of its channels,
+        optionally of a topic and its channel.
+
+        Stats are parsed while the response is read, so large responses
+        are never kept in memory. Clients and memory stats are not requested.
+        """
+        params = {"format": "json", "include_clients": "false", "include_mem": "false"}
+        if topic is not None:
+            params["topic"] = topic
+        if channel is not None:
+            params["channel"] = channel
+
+        async with self.stream_request("GET", "stats", params) as chunks:
+            async for stats in iter_stats(chunks, topic=topic, channel=channel):
+                yield stats
+
     async def pub(self, topic: str, message: Any) -> HTTPResponse:
         resp = await self.perform_request("POST", "pub", {"topic": topic}, message)
         return resp
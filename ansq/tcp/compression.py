@@ -0,0 +1,71 @@
+"""Stream compression of NSQ connections negotiated with ``IDENTIFY``.
+
+:see: https://nsq.io/clients/tcp_protocol_spec.html#identify
+"""
+import abc
+import zlib
+
+try:
+    import snappy
+except ImportError:  # pragma: no cover
+    snappy = None
+
+
+class Codec(metaclass=abc.ABCMeta):
+    """Compressor and decompressor of a connection stream.
+
+    Both directions are streams, so a codec instance belongs to a single
+    connection and must be replaced on reconnect.
+    """
+
+    @abc.abstractmethod  # pragma: no cover
+    def compress(self, data: bytes) -> bytes:
+        """Compress outgoing data, the result is ready to be sent as is."""
+
+    @abc.abstractmethod  # pragma: no cover
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a chunk of incoming data.
+
+        Returns as much data as can be decompressed so far, the rest is
+        kept until the next chunk arrives.
+        """
+
+
+def is_snappy_available() -> bool:
+    return snappy is not None
+
+
+class SnappyCodec(Codec):
+    """Snappy codec with the framing format.
+
+    Requires ``python-snappy`` to be installed.
+    """
+
+    def __init__(self) -> None:
+        if snappy is None:
+            raise RuntimeError("python-snappy is required for snappy compression")
+
+        self._compressor = snappy.StreamCompressor()
+        self._decompressor = snappy.StreamDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.add_chunk(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class DeflateCodec(Codec):
+    """Raw deflate codec, every compressed chunk ends with a sync flush."""
+
+    def __init__(self, level: int = 6) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
@@ -1,18 +1,31 @@
 import asyncio
+import contextlib
 import json
+import logging
+import ssl
+import time
 import warnings
 from datetime import datetime, timezone
 from typing import Any, AsyncGenerator, Callable, Mapping, Optional, Union
 
 import attr
 
-from ansq.tcp import consts
+from ansq.codecs import encode_message
+from ansq.tcp import consts, tls
+from ansq.tcp.compression import (
+    Codec,
+    DeflateCodec,
+    SnappyCodec,
+    is_snappy_available,
+)
 from ansq.tcp.exceptions import (
     ConnectionClosedError,
     NSQUnauthorized,
     ProtocolError,
     get_exception,
 )
+from ansq.tcp.reconnect import ReconnectBackoff
+from ansq.tcp.socket_options import apply_keepalive, apply_socket_options
 from ansq.tcp.types import (
     ConnectionFeatures,
     ConnectionOptions,
@@ -24,13 +37,13 @@ from ansq.tcp.types import (
     NSQResponseSchema,
 )
 from ansq.tcp.types import TCPConnection as NSQConnectionBase
-from ansq.typedefs import TCPResponse
-from ansq.utils import validate_topic_channel_name, is_unix_socket
-
-# Auto reconnect settings
-AUTO_RECONNECT_INITIAL_INTERVAL = 2
-AUTO_RECONNECT_MAX_INTERVAL = 2048
-AUTO_RECONNECT_PROGRESSION_RATIO = 2
+from ansq.typedefs import BytesLike, TCPResponse
+from ansq.utils import (
+    PY311,
+    is_unix_socket,
+    truncate,
+    validate_topic_channel_name,
+)
 
 
 class NSQConnection(NSQConnectionBase):
@@ -38,24 +51,35 @@ class NSQConnection(NSQConnectionBase):
         """Open connection"""
 
         if is_unix_socket(self._addr):
-            self._reader, self._writer = await asyncio.open_unix_connection(
-                self._addr
-            )
+            open_connection = asyncio.open_unix_connection(self._addr)
         else:
             try:
                 host, port = self._addr.split(":")
             except ValueError:
                 raise ValueError(f"Invalid TCP address: {self._addr}")
 
-            self._reader, self._writer = await asyncio.open_connection(
-                host, port
-            )
+            open_connection = asyncio.open_connection(host, port)
 
+        self._reader, self._writer = await asyncio.wait_for(
+            open_connection, self._options.connect_timeout
+        )
+        assert self._writer is not None
+        self._set_write_buffer_limits()
+        sock = self._writer.get_extra_info("socket")
+        if self._options.socket_options is not None:
+            apply_socket_options(sock, self._options.socket_options)
+        if self._options.keepalive is not None:
+            apply_keepalive(sock, self._options.keepalive)
+
+        # A new stream is not compressed until IDENTIFY negotiates compression
+        self._codec = None
         self._writer.write(NSQCommands.MAGIC_V2)
         self._status = ConnectionStatus.CONNECTED
         self.logger.debug(f"Connect to {self.endpoint} established")
 
         self._reader_task = self._loop.create_task(self._read_data_task())
+        self._last_data_time = time.monotonic()
+        self._watchdog_task = self._loop.create_task(self._watch_heartbeats())
 
         return True
 
@@ -100,29 +124,43 @@ class NSQConnection(NSQConnectionBase):
         return True
 
     async def _do_auto_reconnect(
-        self, interval: int = AUTO_RECONNECT_INITIAL_INTERVAL
+        self, backoff: Optional[ReconnectBackoff] = None
     ) -> None:
-        """Call ``reconnect()`` method. If failed, sleep and try again."""
+        """Call ``reconnect()`` method. If failed, sleep and try again.
+
+        Delays between attempts and their number are defined by the reconnect
+        policy, the connection is closed once attempts are exhausted.
+        """
         if not self._auto_reconnect:
             return
 
-        # Reconnect silently
-        try:
-            reconnected = await self.reconnect()
-        except Exception as exc:
-            await self._do_close(exc, change_status=False, silent=True)
-            reconnected = False
+        policy = self._options.reconnect_policy
+        if backoff is None:
+            backoff = ReconnectBackoff(policy)
+
+        # Wait for the limiter, so reconnects after an nsqd restart are spread
+        limiter = policy.get_limiter(self._loop)
+        if limiter is None:
+            reconnected = await self._reconnect_silently()
+        else:
+            async with limiter:
+                reconnected = await self._reconnect_silently()
 
         # Return early if succeeded
         if reconnected:
             return
 
-        # Don't sleep more than max interval
-        if interval > AUTO_RECONNECT_MAX_INTERVAL:
-            interval = AUTO_RECONNECT_MAX_INTERVAL
+        if backoff.is_exhausted:
+            # The task can't cancel and wait for itself while closing
+            self._reconnect_task = None
+            await self._do_close(
+                f"Failed to reconnect after {backoff.attempts} attempts"
+            )
+            return
 
+        interval = backoff.next_delay()
         self.logger.debug(
-            "Failed to reconnect to %s. Wait for %s seconds ...",
+            "Failed to reconnect to %s. Wait for %.2f seconds ...",
             self.endpoint,
             interval,
         )
@@ -130,9 +168,22 @@ class NSQConnection(NSQConnectionBase):
         # Reconnection is failed - sleep and schedule new reconnect
         await asyncio.sleep(interval)
         self._reconnect_task = self._loop.create_task(
-            self._do_auto_reconnect(interval * AUTO_RECONNECT_PROGRESSION_RATIO),
+            self._do_auto_reconnect(backoff),
         )
 
+    async def _reconnect_silently(self) -> bool:
+        """Call ``reconnect()`` method, return ``False`` if it failed
+        or timed out.
+        """
+        timeout = self._options.setup_timeout
+        if timeout is None:
+            timeout = self._options.reconnect_policy.attempt_timeout
+        try:
+            return await asyncio.wait_for(self.reconnect(), timeout)
+        except Exception as exc:
+            await self._do_close(exc, change_status=False, silent=True)
+            return False
+
     async def _do_close(
         self,
         error: Optional[Union[Exception, str]] = None,
@@ -157,8 +208,6 @@ class NSQConnection(NSQConnectionBase):
 
         if self.is_subscribed and change_status:
             self._is_subscribed = False
-            while self._message_queue.qsize() > 0:
-                self._message_queue.get_nowait()
             self._message_queue.put_nowait(None)
 
         if self._reader_task and not self._reader_task.done():
@@ -173,6 +222,11 @@ class NSQConnection(NSQConnectionBase):
             except Exception as e:
                 self.logger.exception(e)
 
+        if self._watchdog_task is not None and not self._watchdog_task.done():
+            self._watchdog_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._watchdog_task
+
         if change_status and self._reconnect_task and not self._reconnect_task.done():
             self._reconnect_task.cancel()
             try:
@@ -184,19 +238,18 @@ class NSQConnection(NSQConnectionBase):
                 self.logger.exception(e)
 
         assert self._writer is not None
+        # TLS 1.3 session tickets arrive after handshake, so store the session
+        # on close as well
+        self._store_tls_session()
         try:
             self._writer.close()
             await self._writer.wait_closed()
         except Exception as e:
             self.logger.exception(e)
 
-        for future, callback in self._cmd_waiters:
-            if not future.cancelled():
-                future.set_exception(ConnectionClosedError("Connection is closed"))
-                callback is not None and callback(None)
+        self._fail_cmd_waiters()
 
-        if self._message_queue.qsize() > 0:
-            self._message_queue.get_nowait()
+        self._remove_queued_messages()
 
         if change_status:
             if self._on_close is not None:
@@ -205,19 +258,54 @@ class NSQConnection(NSQConnectionBase):
             self._status = ConnectionStatus.CLOSED
             self.logger.debug(f"Connection {self.endpoint} is closed")
 
+    def _remove_queued_messages(self) -> None:
+        """Remove messages received with the connection from the message queue.
+
+        nsqd requeues messages in flight once the connection is lost, so they
+        would be delivered again and can't be finished with a new connection.
+        The queue may be shared with other connections, their messages are
+        kept in order.
+        """
+        queue = self._message_queue
+        if self._in_flight and not queue.empty():
+            items = []
+            while not queue.empty():
+                items.append(queue.get_nowait())
+                queue.task_done()
+
+            for item in items:
+                if not isinstance(item, NSQMessage) or item.connection is not self:
+                    queue.put_nowait(item)
+
+        # Messages being processed are not in flight anymore as well
+        self._in_flight = 0
+
+    def _fail_cmd_waiters(self) -> None:
+        """Fail commands waiting for responses as the connection is closed."""
+        while self._cmd_waiters:
+            future, callback = self._cmd_waiters.popleft()
+            if not future.done():
+                future.set_exception(ConnectionClosedError("Connection is closed"))
+                callback is not None and callback(None)
+        self._timed_out_waiters.clear()
+
     async def execute(
         self,
         command: Union[str, bytes],
         *args: Any,
         data: Optional[Any] = None,
         callback: Optional[Callable[[TCPResponse], Any]] = None,
+        timeout: Optional[float] = None,
     ) -> TCPResponse:
         """Execute command
 
         Be careful: commands ``NOP``, ``FIN``, ``RDY``, ``REQ``, ``TOUCH``
             by NSQ spec returns ``None`` as  The class:`asyncio.Future` result.
 
+        :param timeout: Seconds to wait for the response, ``command_timeout``
+            of connection options is used if not set.
         :returns: The response from NSQ.
+        :raises asyncio.TimeoutError: The response didn't arrive in time.
         """
         if command is None:
             raise ValueError("Command must not be None")
@@ -236,12 +324,23 @@ class NSQConnection(NSQConnectionBase):
             and self._reconnect_task
             and not self._reconnect_task.done()
         ):
-            await self._reconnect_task
+            # Shield the task, so a cancelled command doesn't cancel reconnecting
+            await asyncio.shield(self._reconnect_task)
 
         assert self._reader, "You should call `connect` method first"
         if not self._status and not (command == NSQCommands.CLS):
             raise ConnectionClosedError("Connection is closed")
 
+        if command in (
+            NSQCommands.PUB,
+            NSQCommands.MPUB,
+            NSQCommands.DPUB,
+            NSQCommands.PUB.decode(),
+            NSQCommands.MPUB.decode(),
+            NSQCommands.DPUB.decode(),
+        ):
+            await self._drain()
+
         future = self._loop.create_future()
         if command in (
             NSQCommands.NOP,
@@ -255,11 +354,17 @@ class NSQConnection(NSQConnectionBase):
         else:
             self._cmd_waiters.append((future, callback))
 
-        command_raw = self._parser.encode_command(command, *args, data=data)
-        if command != NSQCommands.NOP:
-            self.logger.debug("NSQ: Executing command %s", command_raw)
+        command_parts = self._parser.encode_command_parts(command, *args, data=data)
+        if command != NSQCommands.NOP and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "NSQ: Executing command %s", truncate(b"".join(command_parts))
+            )
         assert self._writer is not None
-        self._writer.write(command_raw)
+        if self._codec is not None:
+            self._writer.write(self._codec.compress(b"".join(command_parts)))
+        else:
+            # Bodies are written without copying them into a single buffer
+            self._writer.writelines(command_parts)
 
         # track all processed and requeued messages
         if command in (
@@ -270,7 +375,32 @@ class NSQConnection(NSQConnectionBase):
         ):
             self._in_flight = max(0, self._in_flight - 1)
 
-        return await future
+        if timeout is None:
+            timeout = self._options.command_timeout
+        if future.done():
+            return await future
+
+        try:
+            if timeout is None:
+                return await future
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Commands timed out by the caller, e.g. with `asyncio.wait_for()`,
+            # are cancelled instead. The waiter is kept in the queue to consume
+            # the late response, so responses of the following commands are
+            # not mismatched.
+            if any(waiter is future for waiter, _ in self._cmd_waiters):
+                future.cancel()
+                self._timed_out_waiters.add(future)
+                self.logger.warning(
+                    "Command %s to %s %s before its response arrived",
+                    command.decode() if isinstance(command, bytes) else command,
+                    self.endpoint,
+                    "timed out"
+                    if isinstance(e, asyncio.TimeoutError)
+                    else "was cancelled",
+                )
+            raise
 
     async def identify(
         self,
@@ -286,6 +416,10 @@ class NSQConnection(NSQConnectionBase):
 
         If any of `features`, `config`, `kwargs` exist features defined in `__init__`
         method will be ignored.
+
+        :raises asyncio.TimeoutError: Identifying took longer than
+            ``identify_timeout`` of connection options, the connection should
+            be closed.
         """
         # handle deprecated args
         if config is not None:
@@ -314,12 +448,24 @@ class NSQConnection(NSQConnectionBase):
         if features is not None:
             self._options = attr.evolve(self._options, features=features)
 
+        # Fail before nsqd expects a handshake that can't be done
+        if self._options.features.tls_v1:
+            self._get_tls_server_hostname()
+
         # maybe handle `config` argument passed as a string
         if features is None and isinstance(config, str):
             features_data = config
         else:
-            features_data = json.dumps(attr.asdict(self._options.features))
+            features_data = json.dumps(attr.asdict(self._get_identify_features()))
+
+        return await asyncio.wait_for(
+            self._identify(features_data), self._options.identify_timeout
+        )
 
+    async def _identify(self, features_data: str) -> TCPResponse:
+        """Execute ``IDENTIFY`` and upgrade the stream to the negotiated
+        features.
+        """
         response = await self.execute(
             NSQCommands.IDENTIFY, data=features_data, callback=self._start_upgrading
         )
@@ -347,11 +493,19 @@ class NSQConnection(NSQConnectionBase):
         if response_config.get("auth_required"):
             self._is_auth_required = True
         if response_config.get("tls_v1"):
-            await self._upgrade_to_tls()
+            try:
+                await self._upgrade_to_tls()
+            except Exception as exc:
+                await self._do_close(error=exc)
+                raise
         if response_config.get("snappy"):
             fut = self._upgrade_to_snappy()
         elif response_config.get("deflate"):
-            fut = self._upgrade_to_deflate()
+            fut = self._upgrade_to_deflate(
+                response_config.get(
+                    "deflate_level", self._options.features.deflate_level
+                )
+            )
         await self._finish_upgrading()
 
         if fut:
@@ -360,14 +514,154 @@ class NSQConnection(NSQConnectionBase):
 
         return response
 
+    def _get_identify_features(self) -> ConnectionFeatures:
+        """Return features to identify with, dropping the unsupported ones."""
+        features = self._options.features
+
+        if features.snappy and not is_snappy_available():
+            self.logger.warning(
+                "Snappy compression is disabled: python-snappy is not installed"
+            )
+            features = attr.evolve(features, snappy=False)
+
+        return features
+
     async def _upgrade_to_tls(self) -> None:
-        raise NotImplementedError("Upgrade to TLSv1 not implemented yet")
+        """Upgrade the stream to TLS and read the ``OK`` response nsqd sends
+        right after the handshake.
+
+        A session of the previous connection to the endpoint is resumed
+        if there's one and the context is a ``tls.ResumingSSLContext``.
+        """
+        assert self._writer is not None
+
+        # Stop reading the plain stream, the reader task is restarted
+        # after the handshake
+        if self._reader_task is not None and not self._reader_task.done():
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+
+        context = self._get_tls_context()
+        server_hostname = self._get_tls_server_hostname()
+        session = tls.session_cache.get(context, self._addr)
+
+        self.logger.debug(
+            "Upgrade %s to TLS%s",
+            self.endpoint,
+            " resuming session" if session is not None else "",
+        )
+        with tls.resume_session(session):
+            await self._start_tls(context, server_hostname)
+        self._set_write_buffer_limits()
+
+        response = await self._read_upgrade_response()
+        self._store_tls_session()
+        self._reader_task = self._loop.create_task(self._read_data_task())
+
+        if not isinstance(response, NSQResponseSchema) or not response.is_ok:
+            raise ProtocolError(f"Unexpected response to TLS upgrade: {response}")
+
+    def _get_tls_context(self) -> ssl.SSLContext:
+        return self._options.tls_context or tls.get_default_context()
+
+    def _get_tls_server_hostname(self) -> Optional[str]:
+        """Return the host name the certificate of nsqd is checked against.
+
+        :raises ValueError: The connection is to a unix socket, no host name
+            is set and the context checks host names.
+        """
+        if self._options.tls_server_hostname is not None:
+            return self._options.tls_server_hostname
+        if not self._is_unix_socket:
+            return self._addr.rsplit(":", 1)[0]
+        if self._get_tls_context().check_hostname:
+            raise ValueError(
+                "TLS over a unix socket requires `tls_server_hostname` "
+                "connection option or a context not checking host names"
+            )
+        return None
+
+    async def _start_tls(
+        self, context: ssl.SSLContext, server_hostname: Optional[str]
+    ) -> None:
+        assert self._writer is not None
+
+        if PY311:
+            await self._writer.start_tls(context, server_hostname=server_hostname)
+            return
+
+        # Before Python 3.11 the stream writer can't be upgraded in place,
+        # the protocol keeps feeding the stream reader with decrypted data
+        transport = await self._loop.start_tls(
+            self._writer.transport,
+            self._writer.transport.get_protocol(),
+            context,
+            server_hostname=server_hostname,
+        )
+        self._writer._transport = transport  # type: ignore[attr-defined]
+
+    def _set_write_buffer_limits(self) -> None:
+        high, low = self._options.write_buffer_high, self._options.write_buffer_low
+        if high is None and low is None:
+            return
+        assert self._writer is not None
+        self._writer.transport.set_write_buffer_limits(high=high, low=low)
+
+    async def _read_upgrade_response(self) -> TCPResponse:
+        """Read a response from the stream while the reader task is stopped."""
+        assert self._reader is not None
+
+        while True:
+            response = self._parser.get()
+            if response is not None:
+                return response
+
+            data = await self._reader.read(consts.MAX_CHUNK_SIZE)
+            if not data:
+                raise ConnectionClosedError("Connection is closed")
+            self._parser.feed(data)
+
+    def _store_tls_session(self) -> None:
+        ssl_object = self._get_ssl_object()
+        if ssl_object is None or ssl_object.session is None:
+            return
+
+        tls.session_cache.set(self._get_tls_context(), self._addr, ssl_object.session)
 
     def _upgrade_to_snappy(self) -> asyncio.Future:
-        raise NotImplementedError("Upgrade to snappy not implemented yet")
+        return self._upgrade_to_compression(SnappyCodec())
+
+    def _upgrade_to_deflate(self, level: int = 6) -> asyncio.Future:
+        return self._upgrade_to_compression(DeflateCodec(level))
+
+    async def _drain(self) -> None:
+        """Wait for the write buffer to drain below the low mark if it's above
+        the high one, so publishers faster than nsqd don't grow it without
+        limit.
+        """
+        assert self._writer is not None
+        async with self._drain_lock:
+            await self._writer.drain()
 
-    def _upgrade_to_deflate(self) -> asyncio.Future:
-        raise NotImplementedError("Upgrade to deflate not implemented yet")
+    def _upgrade_to_compression(self, codec: Codec) -> asyncio.Future:
+        """Compress the stream with the given codec.
+
+        Returns a future of the compressed ``OK`` response nsqd sends
+        right after the ``IDENTIFY`` response.
+        """
+        self.logger.debug("Upgrade %s to %s", self.endpoint, type(codec).__name__)
+
+        # Data received after the IDENTIFY response is already compressed
+        buffer = self._parser.buffer
+        data = bytes(buffer)
+        buffer.clear()
+        self._codec = codec
+        self._parser.feed(codec.decompress(data))
+
+        future = self._loop.create_future()
+        self._cmd_waiters.append((future, None))
+        return future
 
     async def _read_data_task(self) -> None:
         """Response reader task."""
@@ -384,18 +678,63 @@ class NSQConnection(NSQConnectionBase):
                 await self._do_close(exc)
                 return
 
+            self._last_data_time = time.monotonic()
+            if self._codec is not None:
+                try:
+                    data = self._codec.decompress(data)
+                except Exception as exc:
+                    await self._do_close(ProtocolError(f"Bad compressed data: {exc}"))
+                    return
+
             self._parser.feed(data)
 
             if not self._is_upgrading:
                 await self._read_buffer()
 
         self.logger.info("Lost connection to NSQ %s", self.endpoint)
-        if self._auto_reconnect:
-            await asyncio.sleep(1)
-            self._reconnect_task = self._loop.create_task(self._do_auto_reconnect())
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            # The connection is lost while reconnecting, fail the attempt, so
+            # the reconnect task retries it
+            self._fail_cmd_waiters()
+        elif self._auto_reconnect:
+            # Mark the connection as reconnecting right away, so it's not used
+            # for publishing until it's restored
+            self._status = ConnectionStatus.RECONNECTING
+            backoff = ReconnectBackoff(self._options.reconnect_policy)
+            await asyncio.sleep(backoff.next_delay())
+            self._reconnect_task = self._loop.create_task(
+                self._do_auto_reconnect(backoff)
+            )
         else:
             await self._do_close()
 
+    async def _watch_heartbeats(self) -> None:
+        """Drop the connection if nsqd sends nothing, heartbeats included,
+        for ``missed_heartbeats`` heartbeat intervals.
+
+        A half-open connection would otherwise stay silent until TCP gives up
+        on it, dropping it lets the connection be reconnected.
+        """
+        heartbeat_interval = self._options.features.heartbeat_interval
+        missed_heartbeats = self._options.missed_heartbeats
+        if heartbeat_interval <= 0 or not missed_heartbeats:
+            return
+
+        timeout = heartbeat_interval / 1000 * missed_heartbeats
+        while True:
+            idle = time.monotonic() - self._last_data_time
+            if idle >= timeout:
+                break
+            await asyncio.sleep(timeout - idle)
+
+        self.logger.warning(
+            "No heartbeats from %s for %.1f seconds, dropping the connection",
+            self.endpoint,
+            idle,
+        )
+        assert self._writer is not None
+        self._writer.transport.abort()
+
     async def _parse_data(self) -> bool:
         try:
             response = self._parser.get()
@@ -434,6 +773,7 @@ class NSQConnection(NSQConnectionBase):
             return False
 
         future, callback = self._cmd_waiters.popleft()
+        self._timed_out_waiters.discard(future)
 
         if response.is_response:
             if not future.cancelled():
@@ -464,15 +804,17 @@ class NSQConnection(NSQConnectionBase):
 
     async def _read_buffer(self) -> None:
         is_continue = True
-        while is_continue:
+        # Data following the IDENTIFY response may be compressed or encrypted,
+        # so it's parsed after upgrading
+        while is_continue and not self._is_upgrading:
             is_continue = await self._parse_data()
 
     def _start_upgrading(self, resp: Optional[TCPResponse] = None) -> None:
         self._is_upgrading = True
 
     async def _finish_upgrading(self, resp: Optional[TCPResponse] = None) -> None:
-        await self._read_buffer()
         self._is_upgrading = False
+        await self._read_buffer()
 
     async def auth(self, secret: str) -> TCPResponse:
         """If the ``IDENTIFY`` response indicates ``auth_required=true``
@@ -499,25 +841,55 @@ class NSQConnection(NSQConnectionBase):
             self._is_subscribed = True
         return response
 
-    async def pub(self, topic: str, message: Any) -> TCPResponse:
-        """Publish a message to a topic"""
+    async def pub(
+        self, topic: str, message: Any, *, timeout: Optional[float] = None
+    ) -> TCPResponse:
+        """Publish a message to a topic
+
+        :param timeout: Seconds to wait for the response, ``command_timeout``
+            of connection options is used if not set.
+        """
         validate_topic_channel_name(topic)
-        return await self.execute(NSQCommands.PUB, topic, data=message)
+        return await self.execute(
+            NSQCommands.PUB, topic, data=self._encode_message(message), timeout=timeout
+        )
 
-    async def dpub(self, topic: str, message: Any, delay_time: int) -> TCPResponse:
+    async def dpub(
+        self,
+        topic: str,
+        message: Any,
+        delay_time: int,
+        *,
+        timeout: Optional[float] = None,
+    ) -> TCPResponse:
         """Publish a deferred message to a topic"""
         validate_topic_channel_name(topic)
-        return await self.execute(NSQCommands.DPUB, topic, delay_time, data=message)
+        return await self.execute(
+            NSQCommands.DPUB,
+            topic,
+            delay_time,
+            data=self._encode_message(message),
+            timeout=timeout,
+        )
 
-    async def mpub(self, topic: str, *messages: Any) -> TCPResponse:
+    async def mpub(
+        self, topic: str, *messages: Any, timeout: Optional[float] = None
+    ) -> TCPResponse:
         """Publish multiple messages to a topic"""
         validate_topic_channel_name(topic)
+        # Messages could be passed as a single list or tuple argument
+        if len(messages) == 1 and isinstance(messages[0], (list, tuple)):
+            messages = tuple(messages[0])
         return await self.execute(
             NSQCommands.MPUB,
             topic,
-            data=messages if len(messages) > 1 else messages[0],
+            data=tuple(self._encode_message(message) for message in messages),
+            timeout=timeout,
         )
 
+    def _encode_message(self, message: Any) -> BytesLike:
+        return encode_message(message, self._options.codec)
+
     async def rdy(self, messages_count: int = 1) -> None:
         """Update RDY state (indicate you are ready to receive N messages)"""
         assert isinstance(
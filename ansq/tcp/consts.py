@@ -8,5 +8,8 @@ ATTEMPTS_SIZE = 2
 MSG_ID_SIZE = 16
 MSG_HEADER = TIMESTAMP_SIZE + ATTEMPTS_SIZE + MSG_ID_SIZE
 MAX_CHUNK_SIZE = 4096
+# Smaller message bodies are copied into a command buffer, larger ones are
+# written as separate chunks without copying
+MIN_ZERO_COPY_SIZE = 16 * 1024
 
 DEFAULT_REQ_TIMEOUT = 1000 * 10
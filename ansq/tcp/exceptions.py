@@ -21,6 +21,14 @@ class NSQNoConnections(NSQException):
     pass
 
 
+class SpillBufferFull(NSQException):
+    pass
+
+
+class PublishBufferFull(NSQException):
+    pass
+
+
 class NSQHttpError(NSQException):
     pass
 
@@ -77,6 +85,10 @@ class NSQMPubFailed(NSQErrorCode):
     """E_MPUB_FAILED"""
 
 
+class NSQDPubFailed(NSQErrorCode):
+    """E_DPUB_FAILED"""
+
+
 class NSQAuthDisabled(NSQErrorCode):
     """E_AUTH_DISABLED"""
 
@@ -116,6 +128,7 @@ ERROR_CODES = {
     "E_PUT_FAILED": NSQPutFailed,
     "E_PUB_FAILED": NSQPubFailed,
     "E_MPUB_FAILED": NSQMPubFailed,
+    "E_DPUB_FAILED": NSQDPubFailed,
     "E_FINISH_FAILED": NSQFinishFailed,
     "E_AUTH_DISABLED": NSQAuthDisabled,
     "E_AUTH_FAILED": NSQAuthFailed,
@@ -0,0 +1,96 @@
+import time
+from typing import FrozenSet, Optional
+
+import attr
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class FailoverPolicy:
+    """Publish failover settings of a writer.
+
+    :param timeout: Seconds to wait for a publish response before retrying
+        the publish on a different open connection. Be aware that a timed out
+        message could still be published by the slow nsqd, so it can be
+        delivered twice.
+    :param max_attempts: Maximum number of connections a publish is tried on.
+    :param hedged_topics: Topics to send hedged publishes for. If the first
+        connection does not respond within ``hedge_delay`` seconds or fails,
+        the message is published to a different connection as well and
+        the first successful response wins. Be aware that a hedged message
+        can be delivered twice.
+    :param hedge_delay: Seconds to wait for the first response before sending
+        a hedged publish.
+    :param failure_threshold: Number of consecutive failures after which
+        a connection is taken out of rotation.
+    :param recovery_timeout: Seconds a failing connection stays out of rotation
+        before a trial publish is allowed again.
+    """
+
+    timeout: float = 1.0
+    max_attempts: int = 3
+    hedged_topics: FrozenSet[str] = attr.field(factory=frozenset, converter=frozenset)
+    hedge_delay: float = 0.05
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+
+
+class CircuitBreaker:
+    """Circuit breaker of a single connection.
+
+    The breaker opens after ``failure_threshold`` consecutive failures.
+    An open breaker lets a single trial request through once ``recovery_timeout``
+    seconds have passed since the last failure, other requests are not allowed
+    until the trial one resolves. A success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float) -> None:
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._is_trial_pending = False
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker: failures={self._failures}, is_open={self.is_open}>"
+
+    @property
+    def failures(self) -> int:
+        """Return the number of consecutive failures."""
+        return self._failures
+
+    @property
+    def is_open(self) -> bool:
+        """True if the connection is out of rotation."""
+        return self._opened_at is not None
+
+    def allows_request(self) -> bool:
+        """True if a request may be sent through the connection."""
+        if self._opened_at is None:
+            return True
+        if self._is_trial_pending:
+            return False
+        return time.monotonic() - self._opened_at >= self._recovery_timeout
+
+    def start_request(self) -> bool:
+        """Mark a request as sent, return true if it's the trial request
+        of an open breaker past its recovery timeout.
+        """
+        if self._opened_at is None or not self.allows_request():
+            return False
+        self._is_trial_pending = True
+        return True
+
+    def cancel_trial(self) -> None:
+        """Allow another trial request, the pending one has no result."""
+        self._is_trial_pending = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._is_trial_pending = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            self._is_trial_pending = False
@@ -0,0 +1,96 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+DEFAULT_REPLICAS = 160
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring of nodes.
+
+    Every node is placed on the ring ``replicas`` times, so keys are spread
+    evenly and adding or removing a node moves only keys of that node.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = DEFAULT_REPLICAS):
+        if replicas <= 0:
+            raise ValueError("replicas must be greater than 0")
+
+        self._replicas = replicas
+        self._nodes: Set[str] = set()
+        # Sorted hashes of node replicas and their owners
+        self._hashes: List[int] = []
+        self._owners: Dict[int, str] = {}
+
+        for node in nodes:
+            self.add(node)
+
+    def __repr__(self) -> str:
+        return f"<HashRing: nodes={sorted(self._nodes)}>"
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    @property
+    def nodes(self) -> Set[str]:
+        """Return a set of nodes on the ring."""
+        return set(self._nodes)
+
+    def add(self, node: str) -> None:
+        """Place the node on the ring."""
+        if node in self._nodes:
+            return
+
+        self._nodes.add(node)
+        for point in self._node_points(node):
+            # Hash collisions are extremely unlikely, the first owner wins
+            if point in self._owners:
+                continue
+            self._owners[point] = node
+            bisect.insort(self._hashes, point)
+
+    def remove(self, node: str) -> None:
+        """Remove the node from the ring."""
+        if node not in self._nodes:
+            return
+
+        self._nodes.discard(node)
+        for point in self._node_points(node):
+            if self._owners.get(point) != node:
+                continue
+            del self._owners[point]
+            del self._hashes[bisect.bisect_left(self._hashes, point)]
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return the node owning the key or ``None`` if the ring is empty."""
+        return next(self.iter_nodes(key), None)
+
+    def iter_nodes(self, key: bytes) -> Iterator[str]:
+        """Yield distinct nodes clockwise starting from the key owner.
+
+        The first node owns the key, the following ones are its fallbacks.
+        """
+        if not self._hashes:
+            return
+
+        start = bisect.bisect(self._hashes, _hash(key))
+        seen: Set[str] = set()
+        for i in range(len(self._hashes)):
+            node = self._owners[self._hashes[(start + i) % len(self._hashes)]]
+            if node in seen:
+                continue
+            seen.add(node)
+            yield node
+            if len(seen) == len(self._nodes):
+                return
+
+    def _node_points(self, node: str) -> Iterator[int]:
+        for replica in range(self._replicas):
+            yield _hash(f"{node}#{replica}".encode("utf-8"))
@@ -0,0 +1,450 @@
+import abc
+import asyncio
+import contextlib
+import itertools
+import random
+import time
+from asyncio import AbstractEventLoop
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from weakref import WeakKeyDictionary
+
+import attr
+
+from ansq.http import NsqLookupd
+from ansq.http.lookupd import Producers
+from ansq.utils import get_logger
+
+if TYPE_CHECKING:
+    from ansq.tcp.connection import NSQConnection
+    from ansq.tcp.reader import Reader
+    from ansq.tcp.types import Client
+    from ansq.tcp.writer import Writer
+
+
+class Address(NamedTuple):
+    host: str
+    port: int
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class LookupdQueryStats:
+    """Latency and errors of queries to a lookupd."""
+
+    def __init__(self) -> None:
+        self._queries = 0
+        self._errors = 0
+        self._total_latency = 0.0
+        self._last_latency: Optional[float] = None
+        self._last_error: Optional[Exception] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<LookupdQueryStats: queries={self._queries}, errors={self._errors}, "
+            f"average_latency={self.average_latency:.3f}>"
+        )
+
+    @property
+    def queries(self) -> int:
+        """Return the number of queries, failed ones included."""
+        return self._queries
+
+    @property
+    def errors(self) -> int:
+        """Return the number of failed queries."""
+        return self._errors
+
+    @property
+    def last_latency(self) -> Optional[float]:
+        """Return seconds the last query took."""
+        return self._last_latency
+
+    @property
+    def average_latency(self) -> float:
+        """Return average seconds a query takes."""
+        return self._total_latency / self._queries if self._queries else 0.0
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Return the error of the last failed query."""
+        return self._last_error
+
+    def record_success(self, latency: float) -> None:
+        self._record(latency)
+
+    def record_failure(self, latency: float, error: Exception) -> None:
+        self._record(latency)
+        self._errors += 1
+        self._last_error = error
+
+    def _record(self, latency: float) -> None:
+        self._queries += 1
+        self._total_latency += latency
+        self._last_latency = latency
+
+
+# Shared lookupd connections with numbers of their users by addresses
+# and cache TTLs
+_Connections = Dict[Tuple[str, float], Tuple[NsqLookupd, int]]
+
+
+class LookupdConnectionRegistry:
+    """Lookupd connections shared by lookupd wrappers of an event loop.
+
+    Wrappers querying the same lookupd share a connection, so their queries
+    share cached producers and concurrent queries of a topic share a request.
+    A connection is closed once all of its users release it.
+    """
+
+    def __init__(self) -> None:
+        self._connections: "WeakKeyDictionary[AbstractEventLoop, _Connections]" = (
+            WeakKeyDictionary()
+        )
+
+    def acquire(
+        self, address: str, cache_ttl: float, loop: AbstractEventLoop
+    ) -> NsqLookupd:
+        """Return a connection to the lookupd with the cache TTL in seconds."""
+        connections = self._connections.setdefault(loop, {})
+        key = (address, cache_ttl)
+        connection, users = connections.get(key, (None, 0))
+        if connection is None:
+            connection = NsqLookupd(address, cache_ttl=cache_ttl, loop=loop)
+        connections[key] = (connection, users + 1)
+        return connection
+
+    async def release(self, connection: NsqLookupd, loop: AbstractEventLoop) -> None:
+        """Release a connection, close it if it has no more users."""
+        connections = self._connections.get(loop, {})
+        key = (connection.addr, connection.cache_ttl)
+        shared_connection, users = connections.get(key, (None, 0))
+
+        if shared_connection is connection and users > 1:
+            connections[key] = (connection, users - 1)
+            return
+
+        if shared_connection is connection:
+            del connections[key]
+        await connection.close()
+
+
+lookupd_connections = LookupdConnectionRegistry()
+
+
+class BaseLookupd(abc.ABC):
+    """Base lookupd wrapper helps to connect a client to nsqd found
+    via lookupd services.
+
+    Lookupd services are queried one per poll in a round robin fashion way.
+    With ``query_all`` all of them are queried concurrently and producers
+    found by any of them are connected, so a lagging or failing lookupd
+    doesn't delay discovery. ``query_timeout`` limits each query,
+    in milliseconds. Connections to a producer are closed once none
+    of lookupd services report it.
+
+    Producers are cached for ``cache_ttl`` milliseconds. Connections to
+    lookupd services are shared by all wrappers of the event loop, so readers
+    of the same topic query lookupd once per ``cache_ttl``.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        http_addresses: Sequence[str],
+        poll_interval: float,
+        poll_jitter: float,
+        loop: Optional[AbstractEventLoop] = None,
+        debug: bool = False,
+        query_all: bool = False,
+        query_timeout: Optional[float] = None,
+        cache_ttl: float = 10000,
+    ):
+        self._client = client
+        self._poll_interval = poll_interval / 1000
+        self._poll_jitter = poll_jitter
+        self._query_all = query_all
+        self._query_timeout = query_timeout / 1000 if query_timeout else None
+        self._loop = loop or asyncio.get_event_loop()
+        self._query_lookupd_attempts = 0
+        self._logger = get_logger(debug, "lookupd")
+        self._debug = debug
+        self._poll_lookup_task: Optional[asyncio.Task] = None
+        # Lookupd addresses that responded without a producer since it was
+        # last found, by producer addresses
+        self._missing_producers: Dict[str, Set[str]] = {}
+
+        # Keep original on close callback to call it in `self._on_close_connection`
+        self._orig_on_close_callback = self._client.connection_options.on_close
+
+        # When a connection is closed it should be removed from the client.
+        # Lookupd would add it later if the producer is up.
+        self._client.connection_options = attr.evolve(
+            self._client.connection_options, on_close=self._on_close_connection
+        )
+        # Lookupd adds and removes connections to discovered producers itself,
+        # so disable auto-reconnect for them. Connections to configured nsqd
+        # addresses keep the client options.
+        self._connection_options = attr.evolve(
+            self._client.connection_options, auto_reconnect=False
+        )
+
+        # Acquire shared lookupd connections
+        self._lookupd_connections = [
+            lookupd_connections.acquire(address, cache_ttl / 1000, self._loop)
+            for address in http_addresses
+        ]
+        self._query_stats = {address: LookupdQueryStats() for address in http_addresses}
+
+    @property
+    def query_stats(self) -> Dict[str, LookupdQueryStats]:
+        """Return query stats by lookupd addresses."""
+        return dict(self._query_stats)
+
+    async def query_lookup(self) -> None:
+        """Query lookupd for producers and connect to them."""
+        if self._query_all:
+            connections = self._lookupd_connections
+        else:
+            # Get lookupd connection in a round robin fashion way
+            connections = [self._get_lookupd_connection()]
+
+        results = await asyncio.gather(
+            *(self._query(connection) for connection in connections)
+        )
+        responses = {
+            connection.addr: addresses
+            for connection, addresses in zip(connections, results)
+            if addresses is not None
+        }
+        if not responses:
+            return
+
+        await self._update_connections(responses)
+
+    async def _query(self, lookupd_connection: "NsqLookupd") -> Optional[List[Address]]:
+        """Query a lookupd recording its stats, return ``None`` on failure."""
+        stats = self._query_stats[lookupd_connection.addr]
+        start = time.monotonic()
+        try:
+            producer_addresses = await asyncio.wait_for(
+                self._do_query_lookup(lookupd_connection), self._query_timeout
+            )
+        except Exception as exc:
+            stats.record_failure(time.monotonic() - start, exc)
+            self._logger.error(
+                "Failed to query lookupd %s due to: %r",
+                lookupd_connection,
+                exc,
+                exc_info=exc if self._debug else False,
+            )
+            return None
+
+        stats.record_success(time.monotonic() - start)
+        return producer_addresses
+
+    async def poll_lookup(self) -> NoReturn:
+        """Poll ``query_lookup()`` infinitely."""
+        # Add a delay to poll which helps to distribute evenly requests
+        # even if multiple readers restart at the same time.
+        delay = self._poll_interval * self._poll_jitter
+        await asyncio.sleep(random.random() * delay)
+
+        # Poll infinitely lookup
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            await self.query_lookup()
+
+    async def start_polling(self) -> None:
+        """Start polling lookupd."""
+        # Polling is already started
+        if self._poll_lookup_task is not None and not self._poll_lookup_task.done():
+            return
+
+        # Start polling task
+        self._poll_lookup_task = self._loop.create_task(self.poll_lookup())
+
+    async def stop_polling(self) -> None:
+        """Stop polling lookupd."""
+        if self._poll_lookup_task is None:
+            return
+
+        self._poll_lookup_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._poll_lookup_task
+
+    async def close(self) -> None:
+        """Stop poll lookup task and release all lookupd connections."""
+        await self.stop_polling()
+
+        for lookupd_connection in self._lookupd_connections:
+            await lookupd_connections.release(lookupd_connection, self._loop)
+        self._lookupd_connections = []
+
+    def _get_lookupd_connection(self) -> "NsqLookupd":
+        """Return lookupd connection in a round robin fashion way."""
+        index = self._query_lookupd_attempts % len(self._lookupd_connections)
+        lookupd_connection = self._lookupd_connections[index]
+        self._query_lookupd_attempts += 1
+        return lookupd_connection
+
+    @abc.abstractmethod
+    async def _do_query_lookup(self, lookupd_connection: "NsqLookupd") -> List[Address]:
+        """Query lookup with a given connection and return producer addresses."""
+        raise NotImplementedError()
+
+    async def _update_connections(self, responses: Dict[str, List[Address]]) -> None:
+        """Connect to new producers and close connections to the gone ones.
+
+        ``responses`` are producer addresses by addresses of the lookupd
+        services queried. A producer is gone once every lookupd has responded
+        without it since it was last found, so a lookupd lagging behind
+        the others doesn't close connections. An empty response is skipped,
+        as lookupd could have been restarted and not have registrations yet.
+        Connections to configured nsqd addresses are never closed.
+        """
+        # Union of producers keeping the order they're found in
+        producer_addresses = list(
+            dict.fromkeys(itertools.chain.from_iterable(responses.values()))
+        )
+        found_addresses = [str(address) for address in producer_addresses]
+        for address in found_addresses:
+            self._missing_producers[address] = set()
+
+        for lookupd_address, addresses in responses.items():
+            if not addresses:
+                continue
+            response_addresses = {str(address) for address in addresses}
+            for address, lookupd_addresses in self._missing_producers.items():
+                if address not in response_addresses:
+                    lookupd_addresses.add(lookupd_address)
+
+        all_lookupd_addresses = set(self._query_stats)
+        gone_addresses = {
+            address
+            for address, lookupd_addresses in self._missing_producers.items()
+            if lookupd_addresses >= all_lookupd_addresses
+        }
+        for address in gone_addresses:
+            del self._missing_producers[address]
+
+        gone_addresses.difference_update(self._client.nsqd_tcp_addresses)
+        for connection in self._client.connections:
+            if connection.id in gone_addresses:
+                self._logger.debug("Producer %s is gone", connection.id)
+                await connection.close()
+
+        # New producers are connected concurrently, so a hanging one doesn't
+        # delay the others
+        static_addresses = set(self._client.nsqd_tcp_addresses)
+        errors = await self._client.connect_to_nsqd_addresses(
+            (address for address in found_addresses if address not in static_addresses),
+            connection_options=self._connection_options,
+        )
+        errors.update(
+            await self._client.connect_to_nsqd_addresses(
+                address for address in found_addresses if address in static_addresses
+            )
+        )
+        for address, error in errors.items():
+            self._logger.error("Failed to connect to %s: %r", address, error)
+
+    @staticmethod
+    def _get_producer_addresses(producers: Producers) -> List[Address]:
+        """Return TCP addresses of producers."""
+        return [
+            Address(producer.broadcast_address, producer.tcp_port)
+            for producer in producers
+        ]
+
+    def _on_close_connection(self, connection: "NSQConnection") -> None:
+        """A callback to be called after a connection being closed."""
+        # Remove the connection from the client so that lookupd could add it later
+        self._client.remove_connection(connection)
+
+        # Call an original on_close callback if specified
+        if self._orig_on_close_callback is not None:
+            self._orig_on_close_callback(connection)
+
+
+class Lookupd(BaseLookupd):
+    """Lookupd wrapper helps to connect a reader to producers of its topic."""
+
+    def __init__(
+        self,
+        reader: "Reader",
+        http_addresses: Sequence[str],
+        poll_interval: float,
+        poll_jitter: float,
+        loop: Optional[AbstractEventLoop] = None,
+        debug: bool = False,
+        query_all: bool = False,
+        query_timeout: Optional[float] = None,
+        cache_ttl: float = 10000,
+    ):
+        self._reader = reader
+        super().__init__(
+            client=reader,
+            http_addresses=http_addresses,
+            poll_interval=poll_interval,
+            poll_jitter=poll_jitter,
+            loop=loop,
+            debug=debug,
+            query_all=query_all,
+            query_timeout=query_timeout,
+            cache_ttl=cache_ttl,
+        )
+
+    async def _do_query_lookup(self, lookupd_connection: "NsqLookupd") -> List[Address]:
+        """Query lookup with a given connection and return producer addresses."""
+        # Lookup for the reader's topic
+        self._logger.debug("Query %s", lookupd_connection)
+        producers = await lookupd_connection.lookup_producers(self._reader.topic)
+        return self._get_producer_addresses(producers)
+
+
+class NodesLookupd(BaseLookupd):
+    """Lookupd wrapper helps to keep a writer connected to all nsqd nodes.
+
+    Connections to nodes which are gone from lookupd are closed.
+    """
+
+    def __init__(
+        self,
+        writer: "Writer",
+        http_addresses: Sequence[str],
+        poll_interval: float,
+        poll_jitter: float,
+        loop: Optional[AbstractEventLoop] = None,
+        debug: bool = False,
+        query_all: bool = False,
+        query_timeout: Optional[float] = None,
+        cache_ttl: float = 10000,
+    ):
+        super().__init__(
+            client=writer,
+            http_addresses=http_addresses,
+            poll_interval=poll_interval,
+            poll_jitter=poll_jitter,
+            loop=loop,
+            debug=debug,
+            query_all=query_all,
+            query_timeout=query_timeout,
+            cache_ttl=cache_ttl,
+        )
+
+    async def _do_query_lookup(self, lookupd_connection: "NsqLookupd") -> List[Address]:
+        """Query nodes with a given connection and return their addresses."""
+        self._logger.debug("Query %s", lookupd_connection)
+        producers = await lookupd_connection.node_producers()
+        return self._get_producer_addresses(producers)
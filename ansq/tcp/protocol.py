@@ -4,7 +4,7 @@
 """
 import abc
 import struct
-from typing import Any, Optional, Tuple, Union
+from typing import Any, List, Optional, Tuple, Union
 
 from ansq.tcp import consts
 from ansq.tcp.exceptions import ProtocolError
@@ -14,7 +14,8 @@ from ansq.tcp.types import (
     NSQMessageSchema,
     NSQResponseSchema,
 )
-from ansq.utils import convert_to_bytes
+from ansq.typedefs import BytesLike
+from ansq.utils import to_bytes
 
 __all__ = "Reader"
 
@@ -139,25 +140,46 @@ class Reader(BaseReader):
         self, cmd: Union[str, bytes], *args: Any, data: Any = None
     ) -> bytes:
         """Encode command to bytes"""
-        _cmd = convert_to_bytes(cmd.upper().strip())
-        _args = [convert_to_bytes(a) for a in args]
-        body_data, params_data = b"", b""
+        return b"".join(self.encode_command_parts(cmd, *args, data=data))
 
+    def encode_command_parts(
+        self, cmd: Union[str, bytes], *args: Any, data: Any = None
+    ) -> List[BytesLike]:
+        """Encode command to a list of chunks to be written with ``writelines()``.
+
+        Large bodies are separate chunks referring to the original buffers,
+        so they are not copied.
+        """
+        _cmd = to_bytes(cmd.upper().strip())
+        _args = [to_bytes(a) for a in args]
+
+        chunk = bytearray(_cmd)
         if len(_args):
-            params_data = b" " + b" ".join(_args)
+            chunk += b" " + b" ".join(_args)
+        chunk += consts.NL
 
         if data and isinstance(data, (list, tuple)):
-            data_encoded = [self._encode_body(part) for part in data]
-            num_parts = len(data_encoded)
-            payload = struct.pack(">l", num_parts) + b"".join(data_encoded)
-            body_data = struct.pack(">l", len(payload)) + payload
+            bodies = [to_bytes(part) for part in data]
+            payload_size = consts.DATA_SIZE * (len(bodies) + 1) + sum(
+                len(body) for body in bodies
+            )
+            chunk += struct.pack(">ll", payload_size, len(bodies))
         elif data:
-            body_data = self._encode_body(data)
-
-        return b"".join((_cmd, params_data, consts.NL, body_data))
-
-    @staticmethod
-    def _encode_body(data: Any) -> bytes:
-        _data = convert_to_bytes(data)
-        result = struct.pack(">l", len(_data)) + _data
-        return result
+            bodies = [to_bytes(data)]
+        else:
+            return [chunk]
+
+        parts: List[BytesLike] = []
+        for body in bodies:
+            chunk += struct.pack(">l", len(body))
+            if len(body) < consts.MIN_ZERO_COPY_SIZE:
+                chunk += body
+                continue
+
+            parts.append(chunk)
+            parts.append(body)
+            chunk = bytearray()
+
+        if chunk:
+            parts.append(chunk)
+        return parts
@@ -0,0 +1,328 @@
+import asyncio
+import contextlib
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+import attr
+
+from ansq.tcp.exceptions import (
+    ConnectionClosedError,
+    NSQErrorCode,
+    NSQMPubFailed,
+    NSQNoConnections,
+    NSQPubFailed,
+    PublishBufferFull,
+    get_exception,
+)
+from ansq.tcp.reconnect import ReconnectBackoff, ReconnectPolicy
+from ansq.tcp.types import NSQErrorSchema
+from ansq.utils import convert_to_bytes, get_logger
+
+if TYPE_CHECKING:
+    from ansq.typedefs import TCPResponse
+
+# Errors after which a batch is put back to the buffer to be sent again,
+# a batch failed with any other error is dropped
+RETRY_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionClosedError,
+    NSQNoConnections,
+    OSError,
+    NSQPubFailed,
+    NSQMPubFailed,
+)
+
+
+class OverflowPolicy(Enum):
+    # Wait for free space, `put_nowait()` raises `PublishBufferFull`
+    BLOCK = "block"
+    # Drop the oldest messages to free space
+    DROP_OLDEST = "drop_oldest"
+    # Raise `PublishBufferFull`
+    RAISE = "raise"
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class PublishBufferOptions:
+    """In-memory publish buffer settings of a writer.
+
+    :param max_messages: Maximum number of buffered messages.
+    :param max_bytes: Maximum size of buffered messages in bytes.
+    :param overflow: What to do with a new message when the buffer is full.
+    :param flush_interval: Seconds to wait for a full batch before sending
+        a smaller one.
+    :param batch_size: Maximum number of messages in a single ``MPUB``.
+    :param close_timeout: Seconds to wait for buffered messages to be sent
+        on close, messages left after that are dropped.
+    :param on_error: Callback called with a topic, message bodies and
+        the error of a batch rejected by nsqd, e.g. with ``E_BAD_TOPIC``.
+        Rejected batches are dropped instead of being sent again.
+    :param retry_policy: Delays between attempts to send a batch failed due
+        to connection errors and timeouts, ``max_attempts`` and limiter
+        settings of the policy are not used.
+    """
+
+    max_messages: int = 10_000
+    max_bytes: int = 64 * 1024 * 1024
+    overflow: OverflowPolicy = OverflowPolicy.BLOCK
+    flush_interval: float = 0.01
+    batch_size: int = 100
+    close_timeout: float = 5.0
+    on_error: Optional[Callable[[str, List[bytes], Exception], None]] = None
+    retry_policy: ReconnectPolicy = ReconnectPolicy(min_interval=0.1, max_interval=5.0)
+
+
+class PublishBuffer:
+    """Bounded in-memory buffer of messages published in the background
+    with ``MPUB`` batches.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[str, List[bytes]], Awaitable["TCPResponse"]],
+        options: PublishBufferOptions = PublishBufferOptions(),
+        debug: bool = False,
+        encode: Callable[[Any], bytes] = convert_to_bytes,
+    ) -> None:
+        self._publish = publish
+        self._encode = encode
+        self._options = options
+        self._logger = get_logger(debug, "publish_buffer")
+
+        self._messages: Deque[Tuple[str, bytes]] = deque()
+        # Size of buffered and being sent messages in bytes
+        self._nbytes = 0
+        # Number of messages being sent
+        self._sending = 0
+        self._dropped = 0
+        self._rejected = 0
+
+        # Asyncio primitives are created in `start()` within a running loop
+        self._not_empty: Optional[asyncio.Event] = None
+        self._not_full: Optional[asyncio.Event] = None
+        self._flushed: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __repr__(self) -> str:
+        return f"<PublishBuffer: messages={len(self)}, bytes={self._nbytes}>"
+
+    def __len__(self) -> int:
+        """Return the number of buffered messages including being sent ones."""
+        return len(self._messages) + self._sending
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of buffered messages in bytes."""
+        return self._nbytes
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of messages dropped due to overflow."""
+        return self._dropped
+
+    @property
+    def rejected(self) -> int:
+        """Return the number of messages dropped as nsqd rejected them."""
+        return self._rejected
+
+    @property
+    def options(self) -> PublishBufferOptions:
+        return self._options
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._flush_task is not None:
+            return
+
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._flushed = asyncio.Event()
+        self._update_events()
+        self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def close(self) -> None:
+        """Publish buffered messages and stop the background flusher."""
+        if self._flush_task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.flush(), self._options.close_timeout)
+        except asyncio.TimeoutError:
+            self._logger.error(
+                "Dropped %s buffered messages on close", len(self._messages)
+            )
+
+        self._flush_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._flush_task
+        self._flush_task = None
+
+    def put_nowait(self, topic: str, message: Any) -> None:
+        """Buffer a message without waiting.
+
+        :raises PublishBufferFull: The buffer is full and the overflow policy
+            is ``BLOCK`` or ``RAISE``, or the message is larger than the buffer.
+        """
+        body = self._encode(message)
+        if len(body) > self._options.max_bytes:
+            raise PublishBufferFull("Message is larger than the publish buffer")
+
+        if (
+            not self._has_room(len(body))
+            and self._options.overflow is OverflowPolicy.DROP_OLDEST
+        ):
+            while not self._has_room(len(body)) and self._messages:
+                self._nbytes -= len(self._messages.popleft()[1])
+                self._dropped += 1
+
+        if not self._has_room(len(body)):
+            raise PublishBufferFull("Publish buffer is full")
+
+        self._append(topic, body)
+
+    async def put(self, topic: str, message: Any) -> None:
+        """Buffer a message, wait for free space if the overflow policy
+        is ``BLOCK``.
+        """
+        if self._options.overflow is not OverflowPolicy.BLOCK:
+            self.put_nowait(topic, message)
+            return
+
+        body = self._encode(message)
+        if len(body) > self._options.max_bytes:
+            raise PublishBufferFull("Message is larger than the publish buffer")
+
+        while not self._has_room(len(body)):
+            assert self._not_full is not None, "Publish buffer is not started"
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        self._append(topic, body)
+
+    async def flush(self) -> None:
+        """Wait until all buffered messages are sent."""
+        assert self._flushed is not None, "Publish buffer is not started"
+        await self._flushed.wait()
+
+    def _has_room(self, size: int) -> bool:
+        return (
+            len(self) < self._options.max_messages
+            and self._nbytes + size <= self._options.max_bytes
+        )
+
+    def _append(self, topic: str, body: bytes) -> None:
+        self._messages.append((topic, body))
+        self._nbytes += len(body)
+        self._update_events()
+
+    def _update_events(self) -> None:
+        if self._not_empty is None:
+            return
+
+        assert self._not_full is not None
+        assert self._flushed is not None
+
+        if self._messages:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+
+        if self._messages or self._sending:
+            self._flushed.clear()
+        else:
+            self._flushed.set()
+
+        if len(self) < self._options.max_messages:
+            self._not_full.set()
+
+    async def _flush_loop(self) -> None:
+        assert self._not_empty is not None
+        # Backoff of the current streak of failed attempts
+        backoff: Optional[ReconnectBackoff] = None
+
+        while True:
+            await self._not_empty.wait()
+
+            # Give the batch a chance to fill up
+            if len(self._messages) < self._options.batch_size:
+                await asyncio.sleep(self._options.flush_interval)
+
+            try:
+                await self._flush_batch()
+            except Exception as exc:
+                # Log once per streak, not on every attempt during an outage
+                if backoff is None:
+                    backoff = ReconnectBackoff(self._options.retry_policy)
+                    self._logger.error("Failed to publish buffered messages: %s", exc)
+                else:
+                    self._logger.debug("Failed to publish buffered messages: %s", exc)
+                await asyncio.sleep(backoff.next_delay())
+            else:
+                if backoff is not None:
+                    self._logger.info(
+                        "Published buffered messages after %s failed attempts",
+                        backoff.attempts,
+                    )
+                    backoff = None
+
+    async def _flush_batch(self) -> None:
+        """Publish the oldest messages of the same topic with a single ``MPUB``.
+
+        Messages are put back to the buffer if publishing fails due to
+        connection errors and timeouts. Messages rejected by nsqd are dropped
+        and passed to the ``on_error`` callback.
+        """
+        if not self._messages:
+            return
+
+        topic = self._messages[0][0]
+        bodies: List[bytes] = []
+        while (
+            self._messages
+            and self._messages[0][0] == topic
+            and len(bodies) < self._options.batch_size
+        ):
+            bodies.append(self._messages.popleft()[1])
+        self._sending = len(bodies)
+
+        try:
+            response = await self._publish(topic, bodies)
+            if isinstance(response, NSQErrorSchema):
+                raise get_exception(response.code, response.body)
+        except Exception as exc:
+            if _is_retriable(exc):
+                self._requeue(topic, bodies)
+                raise
+            self._reject(topic, bodies, exc)
+        except BaseException:
+            self._requeue(topic, bodies)
+            raise
+        else:
+            self._nbytes -= sum(len(body) for body in bodies)
+        finally:
+            self._sending = 0
+            self._update_events()
+
+    def _requeue(self, topic: str, bodies: List[bytes]) -> None:
+        for body in reversed(bodies):
+            self._messages.appendleft((topic, body))
+
+    def _reject(self, topic: str, bodies: List[bytes], error: Exception) -> None:
+        self._nbytes -= sum(len(body) for body in bodies)
+        self._rejected += len(bodies)
+        self._logger.error(
+            "Dropped %s buffered messages of topic %s: %s", len(bodies), topic, error
+        )
+
+        if self._options.on_error is not None:
+            try:
+                self._options.on_error(topic, bodies, error)
+            except Exception as exc:
+                self._logger.exception("Publish buffer error callback failed: %s", exc)
+
+
+def _is_retriable(error: Exception) -> bool:
+    if isinstance(error, RETRY_ERRORS):
+        return True
+    return isinstance(error, NSQErrorCode) and not error.fatal
@@ -0,0 +1,214 @@
+"""Backoff between reconnect attempts and limiting of reconnect storms.
+
+When nsqd restarts, every client connected to it reconnects at the same
+time. Delays between attempts are randomized, so clients spread over time
+instead of retrying in lockstep, and a limiter shared by all connections
+of the event loop limits the rate and the concurrency of reconnects.
+"""
+import asyncio
+import random
+import time
+from asyncio import AbstractEventLoop
+from enum import Enum
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+import attr
+
+
+class Jitter(Enum):
+    # Sleep exactly the exponential backoff
+    NONE = "none"
+    # Sleep a random time between zero and the exponential backoff
+    FULL = "full"
+    # Sleep a random time between the minimum interval and the previous
+    # delay multiplied by the ratio
+    DECORRELATED = "decorrelated"
+
+
+class TokenBucket:
+    """Token bucket allowing ``rate`` acquisitions per second on average
+    and bursts of up to ``capacity`` ones.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be greater than zero")
+        if capacity < 1:
+            raise ValueError("capacity must be greater than zero")
+
+        self._rate = rate
+        self._capacity = capacity
+        # Tokens go negative when acquisitions wait for them, so waiters are
+        # served in the order they came
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"<TokenBucket: rate={self._rate}, tokens={self.tokens:.1f}>"
+
+    @property
+    def tokens(self) -> float:
+        """Return the number of available tokens."""
+        self._refill()
+        return max(self._tokens, 0.0)
+
+    async def acquire(self) -> None:
+        """Take a token, wait until one is added if there are none."""
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+
+        try:
+            await asyncio.sleep(-self._tokens / self._rate)
+        except asyncio.CancelledError:
+            self._tokens += 1
+            raise
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+
+class ReconnectLimiter:
+    """Limiter of reconnect attempts of the connections sharing it.
+
+    Attempts take a token from a bucket allowing ``rate`` attempts per second
+    on average and bursts of up to ``capacity`` ones, and at most
+    ``max_concurrent`` attempts are in progress at once, as a token bucket
+    doesn't limit attempts hanging on unreachable nsqd.
+
+    A limiter must be used with a single event loop.
+    """
+
+    def __init__(
+        self, rate: float = 10.0, capacity: int = 10, max_concurrent: int = 10
+    ) -> None:
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be greater than zero")
+
+        self._bucket = TokenBucket(rate=rate, capacity=capacity)
+        self._max_concurrent = max_concurrent
+        # Created on first use, so it's bound to the loop of the connections
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<ReconnectLimiter: bucket={self._bucket!r}, "
+            f"max_concurrent={self._max_concurrent}>"
+        )
+
+    async def __aenter__(self) -> None:
+        """Wait for a free slot and a token to attempt a reconnect."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        assert self._semaphore is not None
+        self._semaphore.release()
+
+
+# Limiters of connections not configured with their own one by event loops
+_default_limiters: "WeakKeyDictionary[AbstractEventLoop, ReconnectLimiter]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_default_limiter(loop: AbstractEventLoop) -> ReconnectLimiter:
+    """Return the reconnect limiter shared by connections of the event loop."""
+    limiter = _default_limiters.get(loop)
+    if limiter is None:
+        limiter = _default_limiters[loop] = ReconnectLimiter()
+    return limiter
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class ReconnectPolicy:
+    """Auto-reconnect settings of a connection.
+
+    :param min_interval: Seconds to wait before the first reconnect attempt.
+    :param max_interval: Maximum seconds to wait between attempts.
+    :param ratio: Multiplier of the delay after every failed attempt.
+    :param jitter: How delays are randomized.
+    :param max_attempts: Number of attempts after which the connection is
+        closed, reconnects are attempted forever if not set.
+    :param limiter: Limiter of reconnect attempts, share one between
+        connections to limit their reconnects together. A limiter shared
+        by all connections of the event loop is used if not set.
+    :param limit_reconnects: Reconnects are not limited if set to ``False``.
+    :param attempt_timeout: Seconds a reconnect attempt may take if
+        ``setup_timeout`` of connection options is not set, so an nsqd hanging
+        the handshake doesn't hold a slot of the limiter forever.
+    """
+
+    min_interval: float = 1.0
+    max_interval: float = 60.0
+    ratio: float = 2.0
+    jitter: Jitter = Jitter.FULL
+    max_attempts: Optional[int] = None
+    limiter: Optional[ReconnectLimiter] = None
+    limit_reconnects: bool = True
+    attempt_timeout: float = 30.0
+
+    def get_limiter(self, loop: AbstractEventLoop) -> Optional[ReconnectLimiter]:
+        """Return the limiter of reconnect attempts of connections
+        of the event loop, ``None`` if reconnects are not limited.
+        """
+        if not self.limit_reconnects:
+            return None
+        if self.limiter is not None:
+            return self.limiter
+        return get_default_limiter(loop)
+
+
+class ReconnectBackoff:
+    """Delays between reconnect attempts of a connection."""
+
+    def __init__(self, policy: ReconnectPolicy) -> None:
+        self._policy = policy
+        self._attempts = 0
+        # Exponential backoff before jitter and the last returned delay
+        self._backoff = min(policy.min_interval, policy.max_interval)
+        self._delay = 0.0
+
+    def __repr__(self) -> str:
+        return f"<ReconnectBackoff: attempts={self._attempts}>"
+
+    @property
+    def attempts(self) -> int:
+        """Return the number of delays returned, an attempt follows each one."""
+        return self._attempts
+
+    @property
+    def is_exhausted(self) -> bool:
+        """True if the maximum number of attempts is reached."""
+        max_attempts = self._policy.max_attempts
+        return max_attempts is not None and self._attempts >= max_attempts
+
+    def next_delay(self) -> float:
+        """Return seconds to wait before the next attempt."""
+        policy = self._policy
+
+        if policy.jitter is Jitter.DECORRELATED:
+            upper = max(self._delay * policy.ratio, policy.min_interval)
+            delay = random.uniform(policy.min_interval, upper)
+        else:
+            delay = self._backoff
+            self._backoff = min(self._backoff * policy.ratio, policy.max_interval)
+            if policy.jitter is Jitter.FULL:
+                delay = random.uniform(0, delay)
+
+        self._delay = min(delay, policy.max_interval)
+        self._attempts += 1
+        return self._delay
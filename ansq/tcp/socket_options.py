@@ -0,0 +1,110 @@
+"""Options of sockets connected to nsqd."""
+import socket
+from typing import Optional
+
+import attr
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class SocketOptions:
+    """Options set on a socket once it's connected, system defaults are kept
+    for options that are not set.
+
+    Options not supported by the platform or the socket family are skipped,
+    only buffer sizes apply to unix sockets.
+
+    :param nodelay: Send small writes right away instead of coalescing them,
+        ``TCP_NODELAY``. asyncio enables it for TCP sockets by default.
+    :param receive_buffer_size: Size of the kernel receive buffer in bytes,
+        ``SO_RCVBUF``.
+    :param send_buffer_size: Size of the kernel send buffer in bytes,
+        ``SO_SNDBUF``.
+    """
+
+    nodelay: Optional[bool] = None
+    receive_buffer_size: Optional[int] = None
+    send_buffer_size: Optional[int] = None
+
+    @classmethod
+    def throughput(cls) -> "SocketOptions":
+        """Return options for consumers and producers of large volumes:
+        writes are coalesced and kernel buffers are large.
+        """
+        return cls(
+            nodelay=False,
+            receive_buffer_size=4 * 1024 * 1024,
+            send_buffer_size=4 * 1024 * 1024,
+        )
+
+    @classmethod
+    def latency(cls) -> "SocketOptions":
+        """Return options for latency sensitive producers: writes are sent
+        right away.
+        """
+        return cls(nodelay=True)
+
+
+def apply_socket_options(sock: socket.socket, options: SocketOptions) -> None:
+    """Set options on a connected socket."""
+    if options.receive_buffer_size is not None:
+        sock.setsockopt(
+            socket.SOL_SOCKET, socket.SO_RCVBUF, options.receive_buffer_size
+        )
+    if options.send_buffer_size is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, options.send_buffer_size)
+
+    if not _is_tcp(sock):
+        return
+
+    if options.nodelay is not None:
+        _set_tcp_option(sock, socket.TCP_NODELAY, int(options.nodelay))
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class KeepaliveOptions:
+    """TCP keepalive settings of a connection.
+
+    Options not supported by the platform are skipped.
+
+    :param idle: Seconds of idle before keepalive probes are sent.
+    :param interval: Seconds between keepalive probes.
+    :param count: Number of unanswered probes after which the connection
+        is dropped.
+    :param user_timeout: Seconds sent data may stay unacknowledged before
+        the connection is dropped, ``TCP_USER_TIMEOUT`` on Linux.
+    """
+
+    idle: int = 60
+    interval: int = 10
+    count: int = 3
+    user_timeout: Optional[float] = None
+
+
+def apply_keepalive(sock: socket.socket, options: KeepaliveOptions) -> None:
+    """Enable TCP keepalive on a socket, unix sockets are left as is."""
+    if not _is_tcp(sock):
+        return
+
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # macOS names the idle time TCP_KEEPALIVE
+    idle_option = getattr(
+        socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None)
+    )
+    _set_tcp_option(sock, idle_option, options.idle)
+    _set_tcp_option(sock, getattr(socket, "TCP_KEEPINTVL", None), options.interval)
+    _set_tcp_option(sock, getattr(socket, "TCP_KEEPCNT", None), options.count)
+    if options.user_timeout is not None:
+        _set_tcp_option(
+            sock,
+            getattr(socket, "TCP_USER_TIMEOUT", None),
+            int(options.user_timeout * 1000),
+        )
+
+
+def _set_tcp_option(sock: socket.socket, option: Optional[int], value: int) -> None:
+    if option is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, option, value)
+
+
+def _is_tcp(sock: socket.socket) -> bool:
+    return sock.family in (socket.AF_INET, socket.AF_INET6)
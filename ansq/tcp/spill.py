@@ -0,0 +1,271 @@
+"""Local spill-to-disk buffer for messages that can't be published.
+
+The buffer is an append-only log of memory-mapped segment files. A record
+is laid out as::
+
+    [crc32 (4 bytes)][topic size (2 bytes)][body size (4 bytes)][topic][body]
+
+Segment files are zero-filled on creation, so a zero topic size marks
+the end of written records. Records are consumed in the order they were
+appended, and a segment file is removed once all of its records are consumed.
+Records of a partially consumed segment are read again after a restart.
+"""
+import mmap
+import os
+import struct
+import zlib
+from collections import deque
+from enum import Enum
+from typing import Deque, List, Optional, Tuple
+
+import attr
+
+from ansq.tcp.exceptions import SpillBufferFull
+
+RECORD_HEADER = struct.Struct(">IHI")
+SEGMENT_SUFFIX = ".seg"
+
+
+class FsyncPolicy(Enum):
+    # Flush a segment to disk after every appended record
+    ALWAYS = "always"
+    # Flush segments to disk periodically, see `SpillOptions.drain_interval`
+    INTERVAL = "interval"
+    # Leave flushing to the operating system
+    NEVER = "never"
+
+
+@attr.define(frozen=True, auto_attribs=True, kw_only=True)
+class SpillOptions:
+    """Spill-to-disk buffer settings of a writer.
+
+    :param directory: Directory to keep segment files in.
+    :param segment_size: Size of a segment file in bytes.
+    :param max_size: Maximum size of buffered records in bytes.
+    :param fsync: When to flush segments to disk.
+    :param drain_interval: Seconds between attempts to drain the buffer.
+    :param drain_batch_size: Maximum number of messages in a single ``MPUB``
+        sent while draining the buffer.
+    """
+
+    directory: str
+    segment_size: int = 16 * 1024 * 1024
+    max_size: int = 1024 * 1024 * 1024
+    fsync: FsyncPolicy = FsyncPolicy.INTERVAL
+    drain_interval: float = 1.0
+    drain_batch_size: int = 100
+
+
+class Segment:
+    """Memory-mapped segment file of the spill buffer."""
+
+    def __init__(self, path: str, size: Optional[int] = None) -> None:
+        self.path = path
+
+        if size is not None:
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        with open(path, "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0)
+
+        self.read_pos = 0
+        self.write_pos = 0
+        if size is None:
+            self.write_pos = self._recover_write_pos()
+
+    def __repr__(self) -> str:
+        return f"<Segment: {self.path}, read={self.read_pos}, write={self.write_pos}>"
+
+    @property
+    def size(self) -> int:
+        return len(self._mmap)
+
+    @property
+    def is_consumed(self) -> bool:
+        return self.read_pos >= self.write_pos
+
+    def has_room(self, record_size: int) -> bool:
+        return self.write_pos + record_size <= self.size
+
+    def write(self, record: bytes) -> None:
+        end = self.write_pos + len(record)
+        self._mmap[self.write_pos : end] = record
+        self.write_pos = end
+
+    def read(self, pos: int) -> Optional[Tuple[str, bytes, int]]:
+        """Return a topic, a body and the next record position of the record
+        at the given position or ``None`` if there's no valid record.
+        """
+        body_start = pos + RECORD_HEADER.size
+        if body_start > self.size:
+            return None
+
+        crc, topic_size, body_size = RECORD_HEADER.unpack_from(self._mmap, pos)
+        end = body_start + topic_size + body_size
+        if not topic_size or end > self.size:
+            return None
+
+        data = self._mmap[body_start:end]
+        if zlib.crc32(data) != crc:
+            return None
+
+        return data[:topic_size].decode("utf-8"), data[topic_size:], end
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def remove(self) -> None:
+        self.close()
+        os.remove(self.path)
+
+    def _recover_write_pos(self) -> int:
+        """Return the end of valid records, a torn record is dropped."""
+        pos = 0
+        while True:
+            record = self.read(pos)
+            if record is None:
+                return pos
+            pos = record[2]
+
+
+class SpillBuffer:
+    """Append-only buffer of messages on disk."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 16 * 1024 * 1024,
+        max_size: int = 1024 * 1024 * 1024,
+        fsync: FsyncPolicy = FsyncPolicy.INTERVAL,
+    ) -> None:
+        self._directory = directory
+        self._segment_size = segment_size
+        self._max_size = max_size
+        self._fsync = fsync
+
+        self._segments: Deque[Segment] = deque()
+        self._next_segment_number = 0
+        # Size of not consumed records in bytes
+        self._size = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_segments()
+
+    def __repr__(self) -> str:
+        return f"<SpillBuffer: {self._directory}, size={self._size}>"
+
+    @property
+    def size(self) -> int:
+        """Return the size of not consumed records in bytes."""
+        return self._size
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._size
+
+    @property
+    def fsync(self) -> FsyncPolicy:
+        return self._fsync
+
+    def append(self, topic: str, body: bytes) -> None:
+        """Append a message to the buffer.
+
+        :raises SpillBufferFull: The buffer reached its maximum size.
+        """
+        topic_raw = topic.encode("utf-8")
+        data = topic_raw + body
+        record = RECORD_HEADER.pack(zlib.crc32(data), len(topic_raw), len(body)) + data
+
+        if self._size + len(record) > self._max_size:
+            raise SpillBufferFull(
+                f"Spill buffer {self._directory} reached its maximum size"
+            )
+
+        if not self._segments or not self._segments[-1].has_room(len(record)):
+            self._new_segment(max(self._segment_size, len(record)))
+
+        segment = self._segments[-1]
+        segment.write(record)
+        self._size += len(record)
+
+        if self._fsync is FsyncPolicy.ALWAYS:
+            segment.flush()
+
+    def peek(self, max_records: int) -> List[Tuple[str, bytes]]:
+        """Return up to ``max_records`` oldest not consumed messages."""
+        records: List[Tuple[str, bytes]] = []
+
+        for segment in self._segments:
+            pos = segment.read_pos
+            while pos < segment.write_pos and len(records) < max_records:
+                record = segment.read(pos)
+                assert record is not None
+                topic, body, pos = record
+                records.append((topic, body))
+
+            if len(records) >= max_records:
+                break
+
+        return records
+
+    def consume(self, count: int) -> None:
+        """Mark ``count`` oldest messages as consumed."""
+        while count and self._segments:
+            segment = self._segments[0]
+
+            while count and not segment.is_consumed:
+                record = segment.read(segment.read_pos)
+                assert record is not None
+                self._size -= record[2] - segment.read_pos
+                segment.read_pos = record[2]
+                count -= 1
+
+            if segment.is_consumed:
+                self._segments.popleft().remove()
+
+    def flush(self) -> None:
+        """Flush not consumed records to disk."""
+        for segment in self._segments:
+            segment.flush()
+
+    def close(self) -> None:
+        """Flush and unmap segment files."""
+        if self._fsync is not FsyncPolicy.NEVER:
+            self.flush()
+
+        for segment in self._segments:
+            segment.close()
+        self._segments.clear()
+
+    def _open_segments(self) -> None:
+        """Open segment files left in the directory."""
+        names = sorted(
+            name
+            for name in os.listdir(self._directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+        for name in names:
+            self._next_segment_number = int(name[: -len(SEGMENT_SUFFIX)]) + 1
+            path = os.path.join(self._directory, name)
+
+            # Segment file creation was interrupted
+            if not os.path.getsize(path):
+                os.remove(path)
+                continue
+
+            segment = Segment(path)
+            if segment.is_consumed:
+                segment.remove()
+                continue
+            self._segments.append(segment)
+            self._size += segment.write_pos
+
+    def _new_segment(self, size: int) -> None:
+        name = f"{self._next_segment_number:020d}{SEGMENT_SUFFIX}"
+        self._next_segment_number += 1
+        self._segments.append(Segment(os.path.join(self._directory, name), size))
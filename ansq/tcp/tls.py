@@ -0,0 +1,136 @@
+"""TLS upgrade helpers of NSQ connections.
+
+``loop.start_tls()`` has no way to pass a TLS session to resume, so
+``ResumingSSLContext`` injects the session into SSL objects it creates
+through a context variable set for the duration of the handshake. Sessions
+are resumed only with contexts of this class, other contexts are used
+as is.
+"""
+import contextlib
+import contextvars
+import ssl
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple
+
+DEFAULT_SESSION_CACHE_SIZE = 1024
+
+_default_context: Optional[ssl.SSLContext] = None
+
+# A session to resume by the next SSL object created in the current context
+_session_to_resume: "contextvars.ContextVar[Optional[ssl.SSLSession]]" = (
+    contextvars.ContextVar("session_to_resume", default=None)
+)
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSL context resuming the session set with ``resume_session()``."""
+
+    def wrap_bio(  # type: ignore[override]
+        self,
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,
+        server_hostname: Optional[str] = None,
+        session: Optional[ssl.SSLSession] = None,
+        **kwargs: Any,
+    ) -> ssl.SSLObject:
+        if session is None and not server_side:
+            session = _session_to_resume.get()
+
+        if session is not None:
+            try:
+                return super().wrap_bio(
+                    incoming,
+                    outgoing,
+                    server_side=server_side,
+                    server_hostname=server_hostname,
+                    session=session,
+                    **kwargs,
+                )
+            except ValueError:
+                # The session belongs to another context, do a full handshake
+                pass
+
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            **kwargs,
+        )
+
+
+def create_default_context(
+    cafile: Optional[str] = None,
+    capath: Optional[str] = None,
+    cadata: Optional[str] = None,
+) -> ResumingSSLContext:
+    """Return a client context with the settings of
+    ``ssl.create_default_context()`` which resumes TLS sessions.
+    """
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if cafile or capath or cadata:
+        context.load_verify_locations(cafile, capath, cadata)
+    else:
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    return context
+
+
+def get_default_context() -> ssl.SSLContext:
+    """Return a shared SSL context with default settings."""
+    global _default_context
+    if _default_context is None:
+        _default_context = create_default_context()
+    return _default_context
+
+
+@contextlib.contextmanager
+def resume_session(session: Optional[ssl.SSLSession]) -> Iterator[None]:
+    """Resume the session by SSL objects created within the block."""
+    token = _session_to_resume.set(session)
+    try:
+        yield
+    finally:
+        _session_to_resume.reset(token)
+
+
+class TLSSessionCache:
+    """LRU cache of TLS sessions per endpoint.
+
+    Sessions are shared by connections to the same endpoint, so reconnects
+    resume a session instead of doing a full handshake.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SESSION_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._sessions: "OrderedDict[Tuple[int, str], ssl.SSLSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, context: ssl.SSLContext, endpoint: str) -> Optional[ssl.SSLSession]:
+        key = (id(context), endpoint)
+        session = self._sessions.get(key)
+        if session is not None:
+            self._sessions.move_to_end(key)
+        return session
+
+    def set(
+        self, context: ssl.SSLContext, endpoint: str, session: ssl.SSLSession
+    ) -> None:
+        key = (id(context), endpoint)
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self._max_size:
+            self._sessions.popitem(last=False)
+
+    def remove(self, context: ssl.SSLContext, endpoint: str) -> None:
+        self._sessions.pop((id(context), endpoint), None)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+
+# Sessions are cached process-wide, so new connections to an endpoint
+# resume sessions of closed ones
+session_cache = TLSSessionCache()
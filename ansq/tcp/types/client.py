@@ -1,7 +1,10 @@
-from typing import TYPE_CHECKING, Dict, Sequence, Tuple
+import asyncio
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Tuple
 
 import attr
 
+from ansq.utils import get_logger
+
 from .connection import ConnectionOptions
 
 if TYPE_CHECKING:
@@ -23,37 +26,96 @@ class Client:
             connection_options = attr.evolve(connection_options, debug=True)
 
         self.connection_options = connection_options
+        self._logger = get_logger(connection_options.debug, "client")
 
         self._connections: Dict[str, NSQConnection] = {}
 
     async def connect(self) -> None:
-        """Connect to nsqd addresses."""
-        for address in self._nsqd_tcp_addresses:
-            await self.connect_to_nsqd(address)
+        """Connect to nsqd addresses.
+
+        Failed addresses are logged and skipped, the error of the first one
+        is raised only if connecting to every address failed.
+        """
+        errors = await self.connect_to_nsqd_addresses(self._nsqd_tcp_addresses)
+        if errors and len(errors) == len(set(self._nsqd_tcp_addresses)):
+            raise next(iter(errors.values()))
+
+        for address, error in errors.items():
+            self._logger.error("Failed to connect to %s: %r", address, error)
 
     async def close(self) -> None:
         """Close all connections."""
         for connection in self.connections:
             await connection.close()
 
-    async def connect_to_nsqd(self, addr: str) -> "NSQConnection":
-        """Connect and identify to nsqd by given address."""
+    async def connect_to_nsqd(
+        self, addr: str, connection_options: Optional[ConnectionOptions] = None
+    ) -> "NSQConnection":
+        """Connect and identify to nsqd by given address.
+
+        Connection options of the client are used if ``connection_options``
+        is not set.
+        """
         from ansq.tcp.connection import NSQConnection
 
         connection = NSQConnection(
-            addr=addr, connection_options=self.connection_options
+            addr=addr, connection_options=connection_options or self.connection_options
         )
 
         existing_connection = self._connections.get(connection.id)
         if existing_connection is not None:
             return existing_connection
 
-        await connection.connect()
-        await connection.identify()
+        try:
+            await connection.connect()
+            await connection.identify()
+        except BaseException:
+            # Don't leave a half set up connection open on errors and timeouts
+            await connection.close()
+            raise
 
         self.add_connection(connection)
         return connection
 
+    async def connect_to_nsqd_addresses(
+        self,
+        addresses: Iterable[str],
+        connection_options: Optional[ConnectionOptions] = None,
+    ) -> Dict[str, Exception]:
+        """Connect to nsqd addresses concurrently, return errors by addresses
+        failed to connect.
+
+        At most ``connect_concurrency`` connections are set up at once, each
+        limited by ``setup_timeout`` of connection options. Duplicate and
+        already connected addresses are skipped. See ``connect_to_nsqd()``
+        for ``connection_options``.
+        """
+        addresses = [
+            address
+            for address in dict.fromkeys(addresses)
+            if address not in self._connections
+        ]
+        semaphore = asyncio.Semaphore(self.connection_options.connect_concurrency)
+
+        async def connect(address: str) -> None:
+            async with semaphore:
+                await asyncio.wait_for(
+                    self.connect_to_nsqd(address, connection_options),
+                    self.connection_options.setup_timeout,
+                )
+
+        results = await asyncio.gather(
+            *(connect(address) for address in addresses), return_exceptions=True
+        )
+
+        errors: Dict[str, Exception] = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, Exception):
+                errors[address] = result
+            elif isinstance(result, BaseException):
+                raise result
+        return errors
+
     def add_connection(self, connection: "NSQConnection") -> None:
         """Add connection to connections pool."""
         self._connections[connection.id] = connection
@@ -63,6 +125,11 @@ class Client:
         if connection.id in self._connections:
             del self._connections[connection.id]
 
+    @property
+    def nsqd_tcp_addresses(self) -> Sequence[str]:
+        """Return configured nsqd addresses."""
+        return self._nsqd_tcp_addresses
+
     @property
     def connections(self) -> Tuple["NSQConnection", ...]:
         """Return a tuple of all instantiated connections."""
@@ -1,6 +1,7 @@
 import abc
 import asyncio
 import logging
+import ssl
 import warnings
 from asyncio.events import AbstractEventLoop
 from asyncio.streams import StreamReader, StreamWriter
@@ -14,16 +15,21 @@ from typing import (
     Dict,
     Mapping,
     Optional,
+    Set,
     Tuple,
     Union,
 )
 
 import attr
 
+from ansq.codecs import MessageCodec, resolve_codec
+from ansq.tcp.reconnect import ReconnectPolicy
+from ansq.tcp.socket_options import KeepaliveOptions, SocketOptions
 from ansq.typedefs import TCPResponse
 from ansq.utils import is_unix_socket
 
 if TYPE_CHECKING:
+    from ansq.tcp.compression import Codec
     from ansq.tcp.types import ConnectionStatus, NSQMessage, NSQMessageSchema
 
 
@@ -49,9 +55,46 @@ class ConnectionOptions:
     on_close: Optional[Callable[["TCPConnection"], None]] = None
     loop: Optional[AbstractEventLoop] = None
     auto_reconnect: bool = True
+    reconnect_policy: ReconnectPolicy = ReconnectPolicy()
     features: ConnectionFeatures = ConnectionFeatures()
     debug: bool = False
     logger: Optional[logging.Logger] = None
+    # SSL context used when `tls_v1` feature is negotiated, a default one is
+    # used if not set. TLS sessions are resumed on reconnects with contexts
+    # created by `ansq.tcp.tls.create_default_context()`.
+    tls_context: Optional[ssl.SSLContext] = None
+    # Host name the certificate of nsqd is checked against, the host of
+    # the address by default. Unix sockets have no host, so it's required
+    # for them unless the context doesn't check host names.
+    tls_server_hostname: Optional[str] = None
+    # Codec of message bodies, a registered codec name or a codec instance.
+    # Without a codec messages are converted with `convert_to_bytes()`.
+    codec: Optional[MessageCodec] = attr.field(default=None, converter=resolve_codec)
+    # Maximum number of connections a client sets up at once
+    connect_concurrency: int = 10
+    # Seconds to wait for a client to connect, identify and subscribe to
+    # an nsqd, no limit if not set
+    setup_timeout: Optional[float] = None
+    # Seconds to wait for the socket connection to nsqd to be opened
+    connect_timeout: Optional[float] = None
+    # Seconds to wait for IDENTIFY and the negotiated upgrades to complete
+    identify_timeout: Optional[float] = None
+    # Seconds to wait for a response to a command, a connection with timed
+    # out commands is unhealthy until their late responses arrive
+    command_timeout: Optional[float] = None
+    # Number of heartbeat intervals without any data from nsqd after which
+    # the connection is considered dead and dropped, so it's reconnected.
+    # Half-open connections are not detected if not set, 2 is a good value.
+    missed_heartbeats: Optional[int] = None
+    # TCP keepalive of the socket, system defaults are used if not set
+    keepalive: Optional[KeepaliveOptions] = None
+    # Buffer sizes and TCP options of the socket, see `SocketOptions` presets
+    socket_options: Optional[SocketOptions] = None
+    # Bytes buffered by the transport above which publishing waits for
+    # the buffer to drain below the low mark, asyncio defaults are used
+    # if not set
+    write_buffer_high: Optional[int] = None
+    write_buffer_low: Optional[int] = None
 
     def _evolve(self, **kwargs: Any) -> "ConnectionOptions":
         option_names = set(attr.fields_dict(type(self)))
@@ -120,6 +163,11 @@ class TCPConnection(abc.ABC):
         self._reader: Optional[StreamReader] = None
         self._writer: Optional[StreamWriter] = None
         self._reader_task: Optional[asyncio.Task] = None
+        self._watchdog_task: Optional[asyncio.Task] = None
+        # Publishers wait for the write buffer to drain one at a time
+        self._drain_lock = asyncio.Lock()
+        # Monotonic time data was last received at, heartbeats included
+        self._last_data_time = 0.0
         self._reconnect_task: Optional[asyncio.Task] = None
         self._auto_reconnect = self._options.auto_reconnect
 
@@ -130,8 +178,12 @@ class TCPConnection(abc.ABC):
         self._cmd_waiters: Deque[
             Tuple[asyncio.Future, Optional[Callable[[TCPResponse], Any]]]
         ] = deque()
+        # Waiters of commands timed out before their responses arrived
+        self._timed_out_waiters: Set[asyncio.Future] = set()
         # Mark connection in upgrading state to ssl socket
         self._is_upgrading = False
+        # Stream compression negotiated with IDENTIFY
+        self._codec: Optional["Codec"] = None
         # Number of received but not acknowledged or req messages
         self._in_flight = 0
         self._secret: Optional[str] = None
@@ -208,11 +260,41 @@ class TCPConnection(abc.ABC):
     def is_authorized(self) -> bool:
         return self._is_authorized
 
+    @property
+    def is_tls(self) -> bool:
+        """True if connection is upgraded to TLS."""
+        return self._get_ssl_object() is not None
+
+    @property
+    def is_tls_session_reused(self) -> bool:
+        """True if TLS handshake resumed a previous session."""
+        ssl_object = self._get_ssl_object()
+        return ssl_object is not None and ssl_object.session_reused
+
+    def _get_ssl_object(self) -> Optional[ssl.SSLObject]:
+        if self._writer is None:
+            return None
+        return self._writer.get_extra_info("ssl_object")
+
     @property
     def is_connected(self) -> bool:
         """Return true if connection is connected."""
         return self.status.is_connected
 
+    @property
+    def write_buffer_size(self) -> int:
+        """Return the number of bytes buffered by the transport to be sent."""
+        if self._writer is None or self._writer.transport.is_closing():
+            return 0
+        return self._writer.transport.get_write_buffer_size()
+
+    @property
+    def is_healthy(self) -> bool:
+        """True if connection is connected and has no commands timed out
+        waiting for responses.
+        """
+        return self.is_connected and not self._timed_out_waiters
+
     @property
     def is_closed(self) -> bool:
         """True if connection is closed or closing."""
@@ -254,6 +336,7 @@ class TCPConnection(abc.ABC):
         *args: Any,
         data: Optional[Any] = None,
         callback: Optional[Callable[[TCPResponse], Any]] = None,
+        timeout: Optional[float] = None,
     ) -> TCPResponse:
         raise NotImplementedError()
 
@@ -281,7 +364,7 @@ class TCPConnection(abc.ABC):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def _upgrade_to_deflate(self) -> asyncio.Future:
+    def _upgrade_to_deflate(self, level: int = 6) -> asyncio.Future:
         raise NotImplementedError()
 
     @abc.abstractmethod
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 from functools import wraps
 from typing import TYPE_CHECKING, Any, Callable
 
+from ansq.codecs import get_codec
 from ansq.tcp.consts import DEFAULT_REQ_TIMEOUT
 
 if TYPE_CHECKING:
@@ -11,6 +12,9 @@ if TYPE_CHECKING:
 
 __all__ = ["NSQMessage"]
 
+# Marks a message body which is not decoded yet
+_NOT_DECODED = object()
+
 
 def ensure_can_be_processed(func: Callable) -> Callable:
     """Decorator to verify that the message can be processed.
@@ -46,6 +50,7 @@ class NSQMessage:
         )
         self._is_processed = False
         self._initialized_at = datetime.now(tz=timezone.utc)
+        self._decoded: Any = _NOT_DECODED
 
     def __repr__(self) -> str:
         return (
@@ -73,6 +78,23 @@ class NSQMessage:
         """
         return self.body.decode("utf-8")
 
+    @property
+    def decoded(self) -> Any:
+        """Return the body decoded with the codec of the connection,
+        JSON codec is used if the connection has no codec.
+
+        The body is decoded once on first access.
+        """
+        if self._decoded is _NOT_DECODED:
+            codec = self._connection.options.codec or get_codec("json")
+            self._decoded = codec.decode(self.body)
+        return self._decoded
+
+    @property
+    def connection(self) -> "NSQConnection":
+        """Return the connection the message is received with."""
+        return self._connection
+
     @property
     def is_processed(self) -> bool:
         """True if message has been processed:
@@ -1,12 +1,59 @@
+import asyncio
+import contextlib
+import itertools
 import random
-from typing import TYPE_CHECKING, Any, Optional, Sequence
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from ansq.codecs import PreparedMessage, encode_message
 from ansq.tcp.connection import NSQConnection
-from ansq.tcp.types import Client, ConnectionOptions
+from ansq.tcp.exceptions import (
+    ConnectionClosedError,
+    NSQDPubFailed,
+    NSQMPubFailed,
+    NSQNoConnections,
+    NSQPubFailed,
+    get_exception,
+)
+from ansq.tcp.failover import CircuitBreaker, FailoverPolicy
+from ansq.tcp.hash_ring import HashRing
+from ansq.tcp.lookupd import LookupdQueryStats, NodesLookupd
+from ansq.tcp.publish_buffer import PublishBuffer, PublishBufferOptions
+from ansq.tcp.spill import FsyncPolicy, SpillBuffer, SpillOptions
+from ansq.tcp.types import Client, ConnectionOptions, NSQErrorSchema
+from ansq.utils import convert_to_bytes, get_logger, is_bytes_like
 
 if TYPE_CHECKING:
     from ansq.typedefs import TCPResponse
 
+Publish = Callable[[NSQConnection], Awaitable["TCPResponse"]]
+
+# Errors after which a publish is retried on a different connection
+FAILOVER_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionClosedError,
+    OSError,
+    NSQPubFailed,
+    NSQMPubFailed,
+    NSQDPubFailed,
+)
+# Error responses of nsqd failing to publish, they're raised as errors
+# with the failover policy
+FAILOVER_ERROR_CODES = frozenset(("E_PUB_FAILED", "E_MPUB_FAILED", "E_DPUB_FAILED"))
+
 
 class Writer(Client):
     """A producer that provides an interface for publishing messages to nsqd."""
@@ -15,45 +62,616 @@ class Writer(Client):
         self,
         nsqd_tcp_addresses: Optional[Sequence[str]] = None,
         connection_options: ConnectionOptions = ConnectionOptions(),
+        failover_policy: Optional[FailoverPolicy] = None,
+        spill_options: Optional[SpillOptions] = None,
+        publish_buffer_options: Optional[PublishBufferOptions] = None,
+        lookupd_http_addresses: Optional[Sequence[str]] = None,
+        lookupd_poll_interval: float = 60000,
+        lookupd_poll_jitter: float = 0.3,
+        lookupd_query_all: bool = False,
+        lookupd_query_timeout: Optional[float] = None,
+        lookupd_cache_ttl: float = 10000,
     ):
         super().__init__(
             nsqd_tcp_addresses=nsqd_tcp_addresses or [],
             connection_options=connection_options,
         )
 
-        if not self._nsqd_tcp_addresses:
+        if not any((self._nsqd_tcp_addresses, lookupd_http_addresses)):
             self._nsqd_tcp_addresses = ["localhost:4150"]
 
-    async def pub(self, topic: str, message: Any) -> "TCPResponse":
-        """Publish a message to a topic to a random connection."""
-        conn = self._get_random_open_connection()
-        return await conn.pub(topic=topic, message=message)
+        self._logger = get_logger(self.connection_options.debug, "writer")
+        self._failover_policy = failover_policy
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        # Consistent hash ring of connection ids for publishing with keys
+        self._hash_ring = HashRing()
 
-    async def dpub(self, topic: str, message: Any, delay_time: int) -> "TCPResponse":
-        """Publish a deferred message to a topic to a random connection."""
-        conn = self._get_random_open_connection()
-        return await conn.dpub(topic=topic, message=message, delay_time=delay_time)
+        # Messages are spilled to disk while there are no open connections
+        self._spill_options = spill_options
+        self._spill_buffer: Optional[SpillBuffer] = None
+        self._drain_spill_buffer_task: Optional[asyncio.Task] = None
+        if spill_options is not None:
+            self._spill_buffer = SpillBuffer(
+                directory=spill_options.directory,
+                segment_size=spill_options.segment_size,
+                max_size=spill_options.max_size,
+                fsync=spill_options.fsync,
+            )
+
+        # Messages published with `publish()` and `publish_nowait()` are sent
+        # in the background
+        self._publish_buffer: Optional[PublishBuffer] = None
+        if publish_buffer_options is not None:
+            self._publish_buffer = PublishBuffer(
+                publish=self._publish_batch,
+                options=publish_buffer_options,
+                debug=self.connection_options.debug,
+                encode=self._encode_message,
+            )
+
+        # Connections to nsqd nodes are added and removed as they're
+        # discovered via lookupd
+        self._lookupd: Optional[NodesLookupd] = None
+        if lookupd_http_addresses:
+            self._lookupd = NodesLookupd(
+                writer=self,
+                http_addresses=lookupd_http_addresses,
+                poll_interval=lookupd_poll_interval,
+                poll_jitter=lookupd_poll_jitter,
+                query_all=lookupd_query_all,
+                query_timeout=lookupd_query_timeout,
+                cache_ttl=lookupd_cache_ttl,
+                debug=self.connection_options.debug,
+            )
+
+    async def connect(self) -> None:
+        """Connect to nsqd addresses.
+
+        Queries lookupd for nsqd nodes if specified. Starts the publish buffer
+        flusher and draining the spill buffer if they're enabled.
+
+        If the spill buffer is enabled, failing to connect is logged instead
+        of being raised, messages are spilled until nsqd addresses are
+        connected by the spill buffer drainer.
+        """
+        if self._spill_buffer is not None and self._drain_spill_buffer_task is None:
+            self._drain_spill_buffer_task = asyncio.ensure_future(
+                self._drain_spill_buffer()
+            )
+
+        try:
+            await super().connect()
+        except Exception as exc:
+            if self._spill_buffer is None:
+                raise
+            self._logger.error("Failed to connect to nsqd: %r", exc)
+
+        if self._lookupd is not None:
+            # Do first lookup manually
+            await self._lookupd.query_lookup()
+            await self._lookupd.start_polling()
+
+        if self._publish_buffer is not None:
+            self._publish_buffer.start()
+
+    async def close(self) -> None:
+        """Flush the publish buffer, close all connections and the spill buffer."""
+        if self._publish_buffer is not None:
+            await self._publish_buffer.close()
+
+        if self._lookupd is not None:
+            await self._lookupd.close()
+
+        if self._drain_spill_buffer_task is not None:
+            self._drain_spill_buffer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._drain_spill_buffer_task
+            self._drain_spill_buffer_task = None
+
+        if self._spill_buffer is not None:
+            self._spill_buffer.close()
+
+        await super().close()
+
+    async def pub(
+        self,
+        topic: str,
+        message: Any,
+        *,
+        key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> "TCPResponse":
+        """Publish a message to a topic to a random connection.
+
+        If ``key`` is given, the message is published to the connection
+        the key is mapped to by the consistent hash ring, so all messages
+        with the same key go to the same nsqd.
+
+        ``timeout`` limits seconds to wait for the response of a connection,
+        ``command_timeout`` of connection options is used if not set.
+
+        With the failover policy, a failed publish is retried on a different
+        connection, error responses of nsqd failing to publish included, and
+        the last error is raised once all attempts fail.
+
+        If the spill buffer is enabled and the message can't be delivered,
+        as there are no open connections or all attempts failed, the message
+        is appended to the spill buffer and ``None`` is returned. A message
+        spilled after a timeout could still be published by the slow nsqd,
+        so it can be delivered twice.
+
+        :raises SpillBufferFull: The spill buffer reached its maximum size.
+        """
+        message = self._prepare_message(message)
+        return await self._publish(
+            topic,
+            lambda conn: conn.pub(topic=topic, message=message, timeout=timeout),
+            key=key,
+            spill_messages=(message,),
+        )
+
+    async def dpub(
+        self,
+        topic: str,
+        message: Any,
+        delay_time: int,
+        *,
+        key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> "TCPResponse":
+        """Publish a deferred message to a topic to a random connection.
+
+        See ``pub()`` for the ``key`` and ``timeout`` description. Deferred
+        messages are never spilled to disk.
+        """
+        message = self._prepare_message(message)
+        return await self._publish(
+            topic,
+            lambda conn: conn.dpub(
+                topic=topic, message=message, delay_time=delay_time, timeout=timeout
+            ),
+            key=key,
+        )
+
+    async def mpub(
+        self,
+        topic: str,
+        *messages: Any,
+        key: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> "TCPResponse":
+        """Publish multiple messages to a topic to a random connection.
+
+        See ``pub()`` for the ``key``, ``timeout`` and the spill buffer
+        description.
+        """
+        # Messages could be passed as a single list or tuple argument
+        if len(messages) == 1 and isinstance(messages[0], (list, tuple)):
+            messages = tuple(messages[0])
+        messages = tuple(self._prepare_message(message) for message in messages)
+        return await self._publish(
+            topic,
+            lambda conn: conn.mpub(topic, *messages, timeout=timeout),
+            key=key,
+            spill_messages=messages,
+        )
+
+    async def mpub_by_key(
+        self, topic: str, messages: Iterable[Tuple[Any, Any]]
+    ) -> List["TCPResponse"]:
+        """Publish ``(key, message)`` pairs to a topic with one ``MPUB``
+        per connection the keys are mapped to.
+
+        The order of messages with the same key is kept.
+
+        :returns: Responses of the sent ``MPUB`` commands.
+        """
+        batches: Dict[str, List[Any]] = {}
+        batch_keys: Dict[str, Any] = {}
+
+        for key, message in messages:
+            conn = self._get_keyed_open_connection(key)
+            batches.setdefault(conn.id, []).append(message)
+            batch_keys.setdefault(conn.id, key)
+
+        return list(
+            await asyncio.gather(
+                *(
+                    self.mpub(topic, batch, key=batch_keys[conn_id])
+                    for conn_id, batch in batches.items()
+                )
+            )
+        )
+
+    def publish_nowait(self, topic: str, message: Any) -> None:
+        """Put a message to the publish buffer without waiting, the message
+        is published in the background.
+
+        :raises PublishBufferFull: The publish buffer is full, see
+            :class:`~ansq.tcp.publish_buffer.OverflowPolicy`.
+        """
+        self._get_publish_buffer().put_nowait(topic, message)
+
+    async def publish(self, topic: str, message: Any) -> None:
+        """Put a message to the publish buffer, the message is published
+        in the background.
+
+        Waits for free space in the buffer if the overflow policy is ``BLOCK``.
+        """
+        await self._get_publish_buffer().put(topic, message)
+
+    async def flush(self) -> None:
+        """Wait until all messages in the publish buffer are published."""
+        await self._get_publish_buffer().flush()
+
+    @property
+    def publish_buffer(self) -> Optional[PublishBuffer]:
+        """Return the publish buffer if it's enabled."""
+        return self._publish_buffer
+
+    @property
+    def failover_policy(self) -> Optional[FailoverPolicy]:
+        """Return the publish failover policy."""
+        return self._failover_policy
+
+    @property
+    def lookupd_stats(self) -> Dict[str, LookupdQueryStats]:
+        """Return query stats by lookupd addresses if lookupd is enabled."""
+        if self._lookupd is None:
+            return {}
+        return self._lookupd.query_stats
+
+    @property
+    def circuit_breakers(self) -> Dict[str, CircuitBreaker]:
+        """Return circuit breakers of connections by connection ids."""
+        return dict(self._circuit_breakers)
+
+    @property
+    def write_buffer_sizes(self) -> Dict[str, int]:
+        """Return bytes buffered to be sent by connection ids."""
+        return {
+            conn_id: conn.write_buffer_size
+            for conn_id, conn in self._connections.items()
+        }
+
+    @property
+    def spill_buffer(self) -> Optional[SpillBuffer]:
+        """Return the spill buffer if it's enabled."""
+        return self._spill_buffer
+
+    def add_connection(self, connection: "NSQConnection") -> None:
+        """Add connection to connections pool."""
+        super().add_connection(connection)
+        self._hash_ring.add(connection.id)
+
+    def remove_connection(self, connection: "NSQConnection") -> None:
+        """Remove connection from connections pool."""
+        super().remove_connection(connection)
+        self._hash_ring.remove(connection.id)
+        self._circuit_breakers.pop(connection.id, None)
+
+    def _get_publish_buffer(self) -> PublishBuffer:
+        if self._publish_buffer is None:
+            raise RuntimeError("Publish buffer is not enabled")
+        return self._publish_buffer
+
+    async def _publish_batch(self, topic: str, messages: List[bytes]) -> "TCPResponse":
+        return await self.mpub(topic, messages)
+
+    def _prepare_message(self, message: Any) -> Any:
+        """Encode a message once to be reused by retries, failover and
+        spilling, bytes-like messages are already encoded.
+        """
+        if isinstance(message, PreparedMessage) or is_bytes_like(message):
+            return message
+        return PreparedMessage(message, self.connection_options.codec)
+
+    def _encode_message(self, message: Any) -> bytes:
+        """Encode a message to be buffered, so a copy of bytes-like message
+        is made as it could be changed before being published.
+        """
+        body = encode_message(message, self.connection_options.codec)
+        return body if type(body) is bytes else bytes(body)
+
+    async def _publish(
+        self,
+        topic: str,
+        publish: Publish,
+        key: Optional[Any] = None,
+        spill_messages: Sequence[Any] = (),
+    ) -> "TCPResponse":
+        """Publish or spill messages to disk if they can't be delivered."""
+        try:
+            return await self._publish_to_connection(topic, publish, key)
+        except (NSQNoConnections,) + FAILOVER_ERRORS as exc:
+            if self._spill_buffer is None or not spill_messages:
+                raise
+            self._logger.debug("Failed to publish, spilling messages: %r", exc)
+
+        for message in spill_messages:
+            self._spill_buffer.append(topic, self._encode_message(message))
+        return None
+
+    async def _publish_to_connection(
+        self, topic: str, publish: Publish, key: Optional[Any] = None
+    ) -> "TCPResponse":
+        """Publish with the failover policy if it's set."""
+        if self._failover_policy is None:
+            return await publish(self._get_open_connection(key))
+
+        # Hedging would break the order of messages with the same key
+        if topic in self._failover_policy.hedged_topics and key is None:
+            return await self._hedged_publish(publish)
+
+        return await self._failover_publish(publish, key)
+
+    async def _failover_publish(
+        self, publish: Publish, key: Optional[Any] = None
+    ) -> "TCPResponse":
+        """Publish to a connection, retry on a different one on failure."""
+        assert self._failover_policy is not None
+
+        tried: Set[str] = set()
+        last_error: Optional[BaseException] = None
+
+        for _ in range(self._failover_policy.max_attempts):
+            try:
+                conn = self._get_open_connection(key, exclude=tried)
+            except NSQNoConnections:
+                if last_error is not None:
+                    raise last_error
+                raise
+
+            tried.add(conn.id)
+            try:
+                return await self._publish_to(conn, publish)
+            except FAILOVER_ERRORS as exc:
+                self._logger.debug("Failed to publish to %s: %r", conn.endpoint, exc)
+                last_error = exc
+
+        assert last_error is not None
+        raise last_error
+
+    async def _hedged_publish(self, publish: Publish) -> "TCPResponse":
+        """Publish to a random connection. If the connection doesn't respond
+        within the hedge delay or fails, publish to a different connection too
+        and return the first successful response.
+        """
+        assert self._failover_policy is not None
 
-    async def mpub(self, topic: str, *messages: Any) -> "TCPResponse":
-        """Publish multiple messages to a topic to a random connection."""
         conn = self._get_random_open_connection()
-        return await conn.mpub(topic, *messages)
+        tried = {conn.id}
+        pending = {asyncio.ensure_future(self._publish_to(conn, publish))}
+        errors: List[BaseException] = []
+
+        try:
+            done, pending = await asyncio.wait(
+                pending, timeout=self._failover_policy.hedge_delay
+            )
+            while True:
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        return task.result()
+                    errors.append(exc)
+
+                if len(tried) < self._failover_policy.max_attempts:
+                    hedge = self._get_hedge_connection(exclude=tried)
+                    if hedge is not None:
+                        tried.add(hedge.id)
+                        pending.add(
+                            asyncio.ensure_future(self._publish_to(hedge, publish))
+                        )
+
+                if not pending:
+                    raise errors[-1]
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _get_hedge_connection(
+        self, exclude: Collection[str]
+    ) -> Optional[NSQConnection]:
+        try:
+            return self._get_random_open_connection(exclude=exclude)
+        except NSQNoConnections:
+            return None
+
+    async def _publish_to(self, conn: NSQConnection, publish: Publish) -> "TCPResponse":
+        """Publish to the connection within the failover timeout and track
+        the result in the connection circuit breaker.
+
+        Error responses of nsqd failing to publish are raised, so they count
+        as failures and the publish is retried on a different connection.
+        Publishing through an open breaker, when all connections are out
+        of rotation, doesn't change the breaker unless it's the trial request.
+        """
+        assert self._failover_policy is not None
+
+        breaker = self._get_circuit_breaker(conn)
+        is_trial = breaker.start_request()
+        is_tracked = is_trial or not breaker.is_open
+        try:
+            response = await asyncio.wait_for(
+                publish(conn), timeout=self._failover_policy.timeout
+            )
+            if (
+                isinstance(response, NSQErrorSchema)
+                and response.code in FAILOVER_ERROR_CODES
+            ):
+                raise get_exception(response.code, response.body)
+        except FAILOVER_ERRORS:
+            if is_tracked:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if is_trial:
+                breaker.cancel_trial()
+            raise
 
-    def _get_random_open_connection(self) -> NSQConnection:
-        """Return a random open connection."""
+        if is_tracked:
+            breaker.record_success()
+        return response
+
+    def _get_circuit_breaker(self, conn: NSQConnection) -> CircuitBreaker:
+        assert self._failover_policy is not None
+
+        breaker = self._circuit_breakers.get(conn.id)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=self._failover_policy.failure_threshold,
+                recovery_timeout=self._failover_policy.recovery_timeout,
+            )
+            self._circuit_breakers[conn.id] = breaker
+        return breaker
+
+    async def _drain_spill_buffer(self) -> NoReturn:
+        """Publish spilled messages once there are open connections.
+
+        nsqd addresses failed to connect on ``connect()`` are connected
+        before draining.
+        """
+        assert self._spill_buffer is not None
+        assert self._spill_options is not None
+
+        while True:
+            await asyncio.sleep(self._spill_options.drain_interval)
+
+            if self._spill_options.fsync is FsyncPolicy.INTERVAL:
+                self._spill_buffer.flush()
+
+            errors = await self.connect_to_nsqd_addresses(self._nsqd_tcp_addresses)
+            for address, error in errors.items():
+                self._logger.debug("Failed to connect to %s: %r", address, error)
+
+            try:
+                await self._drain_spill_buffer_once()
+            except Exception as exc:
+                self._logger.error("Failed to drain spill buffer: %s", exc)
+
+    async def _drain_spill_buffer_once(self) -> None:
+        assert self._spill_buffer is not None
+        assert self._spill_options is not None
+
+        while not self._spill_buffer.is_empty and any(
+            conn.is_connected for conn in self._connections.values()
+        ):
+            records = self._spill_buffer.peek(self._spill_options.drain_batch_size)
+
+            # Send records of the same topic with a single MPUB
+            topic = records[0][0]
+            bodies = [
+                body
+                for _, body in itertools.takewhile(lambda r: r[0] == topic, records)
+            ]
+
+            conn = self._get_random_open_connection()
+            response = await conn.mpub(topic, bodies)
+            if not response:
+                self._logger.error("Failed to drain spill buffer: %s", response)
+                return
+
+            self._spill_buffer.consume(len(bodies))
+
+    def _get_open_connection(
+        self, key: Optional[Any] = None, exclude: Collection[str] = ()
+    ) -> NSQConnection:
+        """Return an open connection the key is mapped to or a random one
+        if the key is ``None``.
+        """
+        if key is None:
+            return self._get_random_open_connection(exclude=exclude)
+        return self._get_keyed_open_connection(key, exclude=exclude)
+
+    def _get_random_open_connection(
+        self, exclude: Collection[str] = ()
+    ) -> NSQConnection:
+        """Return a random open connection.
+
+        Unhealthy connections and connections with an open circuit breaker
+        are skipped unless there are no other open connections.
+
+        :raises NSQNoConnections: There are no open connections.
+        """
         open_connections = tuple(
-            conn for conn in self._connections.values() if conn.is_connected
+            conn
+            for conn in self._connections.values()
+            if conn.is_connected and conn.id not in exclude
+        )
+        if not open_connections:
+            raise NSQNoConnections("There are no open connections to nsqd")
+
+        available_connections = tuple(
+            conn for conn in open_connections if self._is_available(conn)
         )
-        return random.choice(open_connections)
+        return random.choice(available_connections or open_connections)
+
+    def _get_keyed_open_connection(
+        self, key: Any, exclude: Collection[str] = ()
+    ) -> NSQConnection:
+        """Return the first open connection clockwise from the key on
+        the hash ring.
+
+        Unhealthy connections and connections with an open circuit breaker
+        are skipped unless there are no other open connections.
+
+        :raises NSQNoConnections: There are no open connections.
+        """
+        first_open_connection: Optional[NSQConnection] = None
+
+        for conn_id in self._hash_ring.iter_nodes(convert_to_bytes(key)):
+            conn = self._connections[conn_id]
+            if not conn.is_connected or conn_id in exclude:
+                continue
+            if self._is_available(conn):
+                return conn
+            if first_open_connection is None:
+                first_open_connection = conn
+
+        if first_open_connection is None:
+            raise NSQNoConnections("There are no open connections to nsqd")
+        return first_open_connection
+
+    def _is_available(self, conn: NSQConnection) -> bool:
+        """True if the connection is healthy and its circuit breaker allows
+        requests.
+        """
+        if not conn.is_healthy:
+            return False
+        breaker = self._circuit_breakers.get(conn.id)
+        return breaker is None or breaker.allows_request()
 
 
 async def create_writer(
     nsqd_tcp_addresses: Optional[Sequence[str]] = None,
     connection_options: ConnectionOptions = ConnectionOptions(),
+    failover_policy: Optional[FailoverPolicy] = None,
+    spill_options: Optional[SpillOptions] = None,
+    publish_buffer_options: Optional[PublishBufferOptions] = None,
+    lookupd_http_addresses: Optional[Sequence[str]] = None,
+    lookupd_poll_interval: float = 60000,
+    lookupd_poll_jitter: float = 0.3,
+    lookupd_query_all: bool = False,
+    lookupd_query_timeout: Optional[float] = None,
+    lookupd_cache_ttl: float = 10000,
 ) -> Writer:
     """Return created and connected writer."""
     writer = Writer(
-        nsqd_tcp_addresses=nsqd_tcp_addresses, connection_options=connection_options
+        nsqd_tcp_addresses=nsqd_tcp_addresses,
+        connection_options=connection_options,
+        failover_policy=failover_policy,
+        spill_options=spill_options,
+        publish_buffer_options=publish_buffer_options,
+        lookupd_http_addresses=lookupd_http_addresses,
+        lookupd_poll_interval=lookupd_poll_interval,
+        lookupd_poll_jitter=lookupd_poll_jitter,
+        lookupd_query_all=lookupd_query_all,
+        lookupd_query_timeout=lookupd_query_timeout,
+        lookupd_cache_ttl=lookupd_cache_ttl,
     )
     await writer.connect()
     return writer
@@ -4,5 +4,6 @@ if TYPE_CHECKING:
     from ansq.tcp.types import NSQErrorSchema, NSQMessageSchema, NSQResponseSchema
 
 
-HTTPResponse = Union[Dict, str]
+BytesLike = Union[bytes, bytearray, memoryview]
+HTTPResponse = Union[Dict, str, bytes]
 TCPResponse = Optional[Union["NSQResponseSchema", "NSQErrorSchema", "NSQMessageSchema"]]
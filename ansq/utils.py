@@ -11,7 +11,10 @@ from sys import version_info
 from typing import Any, Optional, Tuple, Union
 from urllib.parse import urlsplit
 
+from ansq.typedefs import BytesLike
+
 PY37 = version_info >= (3, 7)
+PY311 = version_info >= (3, 11)
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -44,7 +47,8 @@ def convert_to_bytes(value: Any) -> bytes:
     """Dispatch for convertible types.
 
     Allowed types: ``bytes``, ``bytearray``, ``str``, ``int``, ``float``,
-        ``dict``, ``Decimal``, ``dataclass``.
+        ``dict``, ``Decimal``, ``dataclass`` and objects supporting
+        the buffer protocol like ``memoryview`` or ``mmap``.
 
     :raises TypeError:
     """
@@ -53,6 +57,11 @@ def convert_to_bytes(value: Any) -> bytes:
 
         if is_dataclass(value) and not isinstance(value, type):
             return convert_to_bytes(asdict(value))
+
+    # Objects supporting the buffer protocol are converted without copying
+    if is_bytes_like(value):
+        return _memoryview_to_bytes(memoryview(value))
+
     raise TypeError(
         "Argument {} expected to be type of "
         "bytes, bytearray, str, int, float, dict, Decimal, datetime "
@@ -67,6 +76,14 @@ def _(value: Union[bytes, bytearray]) -> bytes:
     return value
 
 
+@convert_to_bytes.register(memoryview)
+def _memoryview_to_bytes(value: memoryview) -> BytesLike:
+    """Return a flat byte view of ``memoryview`` without copying if possible"""
+    if value.c_contiguous:
+        return value.cast("B")
+    return value.tobytes()
+
+
 @convert_to_bytes.register(str)
 def _str_to_bytes(value: str) -> bytes:
     """Convert ``str`` to bytes"""
@@ -99,6 +116,35 @@ def _datetime_to_bytes(value: datetime) -> bytes:
     return value.isoformat().encode("utf-8")
 
 
+def is_bytes_like(value: Any) -> bool:
+    """Return true if the value supports the buffer protocol."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return True
+    try:
+        memoryview(value)
+    except TypeError:
+        return False
+    return True
+
+
+def to_bytes(value: Any) -> BytesLike:
+    """Convert a value to bytes like ``convert_to_bytes()`` does.
+
+    Common types are converted inline skipping the dispatch, bytes-like
+    values are returned as is.
+    """
+    value_type = type(value)
+    if value_type is bytes or value_type is bytearray:
+        return value
+    if value_type is str:
+        return value.encode("utf-8")
+    if value_type is int:
+        return str(value).encode("utf-8")
+    if value_type is memoryview:
+        return _memoryview_to_bytes(value)
+    return convert_to_bytes(value)
+
+
 @singledispatch
 def convert_to_str(value: Any) -> str:
     """Dispatch for convertible types.
@@ -0,0 +1,94 @@
+"""Benchmark of stream compression codecs on NSQ commands.
+
+Shows the CPU time spent on compressing and decompressing ``PUB`` commands
+against the bytes saved on the wire.
+
+Usage from the repository root, ``PYTHONPATH`` is not needed if ansq is installed::
+
+    PYTHONPATH=. python benchmarks/compression.py [--messages 10000] [--size 1024]
+"""
+import argparse
+import functools
+import json
+import random
+import string
+import time
+from typing import Callable, Dict, List
+
+from ansq.tcp.compression import Codec, DeflateCodec, SnappyCodec, is_snappy_available
+from ansq.tcp.protocol import Reader
+
+
+def get_codecs() -> Dict[str, Callable[[], Codec]]:
+    codecs: Dict[str, Callable[[], Codec]] = {
+        f"deflate-{level}": functools.partial(DeflateCodec, level)
+        for level in (1, 6, 9)
+    }
+    if is_snappy_available():
+        codecs["snappy"] = SnappyCodec
+    return codecs
+
+
+def make_message(size: int) -> bytes:
+    """Return a JSON message looking like a typical event payload."""
+    event: Dict[str, object] = {"type": "event", "items": []}
+    items: List[Dict[str, object]] = []
+    while len(json.dumps(event)) < size:
+        items.append(
+            {
+                "id": random.randint(0, 10**9),
+                "name": "".join(random.choices(string.ascii_lowercase, k=8)),
+                "status": random.choice(("active", "inactive", "pending")),
+                "score": round(random.random(), 4),
+            }
+        )
+        event["items"] = items
+    return json.dumps(event).encode("utf-8")
+
+
+def run(name: str, codec_factory: Callable[[], Codec], commands: List[bytes]) -> None:
+    sender, receiver = codec_factory(), codec_factory()
+    raw_size = sum(len(command) for command in commands)
+
+    started = time.process_time()
+    compressed = [sender.compress(command) for command in commands]
+    compress_time = time.process_time() - started
+
+    started = time.process_time()
+    for chunk in compressed:
+        receiver.decompress(chunk)
+    decompress_time = time.process_time() - started
+
+    compressed_size = sum(len(chunk) for chunk in compressed)
+    megabytes = raw_size / 1024 / 1024
+    print(
+        f"{name:<10} ratio {raw_size / compressed_size:5.2f}x  "
+        f"saved {(raw_size - compressed_size) / 1024 / 1024:8.2f} MiB  "
+        f"compress {megabytes / compress_time:8.1f} MiB/s  "
+        f"decompress {megabytes / decompress_time:8.1f} MiB/s  "
+        f"cpu {(compress_time + decompress_time) * 1e6 / len(commands):6.1f} us/msg"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=1024)
+    args = parser.parse_args()
+
+    protocol = Reader()
+    commands = [
+        protocol.encode_command("PUB", "events", data=make_message(args.size))
+        for _ in range(args.messages)
+    ]
+    print(
+        f"{args.messages} PUB commands, "
+        f"{sum(map(len, commands)) / 1024 / 1024:.2f} MiB"
+    )
+
+    for name, codec_factory in get_codecs().items():
+        run(name, codec_factory, commands)
+
+
+if __name__ == "__main__":
+    main()
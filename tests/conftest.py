@@ -5,6 +5,7 @@ import inspect
 import os
 import shutil
 import signal
+import subprocess
 import time
 from asyncio.subprocess import Process
 from typing import Awaitable, Callable, List, Optional, Sequence, Type, Union
@@ -104,6 +105,8 @@ class NSQD(BaseNSQServer):
         data_path="/tmp",
         broadcast_address: Optional[str] = None,
         lookupd_tcp_addresses: Optional[Sequence[str]] = None,
+        tls_cert: Optional[str] = None,
+        tls_key: Optional[str] = None,
     ) -> None:
         super().__init__(
             addr=addr,
@@ -112,6 +115,8 @@ class NSQD(BaseNSQServer):
         self.data_path = data_path
         self.broadcast_address = broadcast_address
         self.lookupd_tcp_addresses = lookupd_tcp_addresses or []
+        self.tls_cert = tls_cert
+        self.tls_key = tls_key
 
     @property
     def command(self) -> str:
@@ -128,6 +133,9 @@ class NSQD(BaseNSQServer):
         if self.broadcast_address:
             args.extend(["-broadcast-address", self.broadcast_address])
 
+        if self.tls_cert and self.tls_key:
+            args.extend(["-tls-cert", self.tls_cert, "-tls-key", self.tls_key])
+
         return args
 
 
@@ -181,6 +189,8 @@ def create_nsqd(tmp_path):
         http_addr="127.0.0.1:4151",
         lookupd_tcp_addresses=None,
         broadcast_address="127.0.0.1",
+        tls_cert=None,
+        tls_key=None,
     ):
         data_path = tmp_path / f"{addr}"
         data_path.mkdir(parents=True)
@@ -191,6 +201,8 @@ def create_nsqd(tmp_path):
             data_path=str(data_path),
             lookupd_tcp_addresses=lookupd_tcp_addresses,
             broadcast_address=broadcast_address,
+            tls_cert=tls_cert,
+            tls_key=tls_key,
         )
         try:
             await nsqd.start()
@@ -245,6 +257,38 @@ async def nsqd(create_nsqd) -> NSQD:
         yield nsqd
 
 
+@pytest.fixture
+def tls_cert(tmp_path):
+    """Self-signed certificate and key for 127.0.0.1."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl must be installed")
+
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            str(key),
+            "-out",
+            str(cert),
+            "-days",
+            "1",
+            "-subj",
+            "/CN=127.0.0.1",
+            "-addext",
+            "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return str(cert), str(key)
+
+
 @pytest.fixture
 async def nsqd_with_unix_sockets(create_nsqd_with_unix_sockets) -> NSQD:
     async with create_nsqd_with_unix_sockets() as nsqd:
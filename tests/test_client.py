@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from ansq import ConnectionOptions
+from ansq.tcp.types import Client
+
+
+class Connection:
+    def __init__(self, id):
+        self.id = id
+
+
+class SlowClient(Client):
+    """Client connecting to addresses with delays of their names."""
+
+    def __init__(self, nsqd_tcp_addresses, **options):
+        super().__init__(
+            nsqd_tcp_addresses=nsqd_tcp_addresses,
+            connection_options=ConnectionOptions(**options),
+        )
+        self.attempts = []
+        self.running = 0
+        self.max_running = 0
+
+    async def connect_to_nsqd(self, addr, connection_options=None):
+        self.attempts.append(addr)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if addr.startswith("refused"):
+                raise ConnectionRefusedError()
+            await asyncio.sleep(float(addr.split(":")[0]))
+        finally:
+            self.running -= 1
+        self.add_connection(Connection(addr))
+
+
+async def test_connect_concurrently():
+    addresses = [f"0.0{i}:4150" for i in range(8)]
+    client = SlowClient([*addresses, addresses[0]], connect_concurrency=3)
+
+    await client.connect()
+    assert client.attempts == addresses
+    assert client.max_running == 3
+    assert [connection.id for connection in client.connections] == addresses
+
+    # Connected addresses are skipped
+    assert await client.connect_to_nsqd_addresses(addresses) == {}
+    assert len(client.attempts) == 8
+
+
+async def test_connect_partial_failure():
+    client = SlowClient(["0:4150", "refused:4150", "1:4150"], setup_timeout=0.1)
+
+    await client.connect()
+    assert [connection.id for connection in client.connections] == ["0:4150"]
+
+    errors = await client.connect_to_nsqd_addresses(["refused:4150", "1:4150"])
+    assert isinstance(errors["refused:4150"], ConnectionRefusedError)
+    assert isinstance(errors["1:4150"], asyncio.TimeoutError)
+
+
+async def test_connect_failure():
+    client = SlowClient(["refused:4150", "1:4150"], setup_timeout=0.1)
+
+    with pytest.raises(ConnectionRefusedError):
+        await client.connect()
+    assert client.connections == ()
@@ -0,0 +1,109 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from ansq import ConnectionOptions
+from ansq.codecs import (
+    JSONCodec,
+    MessageCodec,
+    MsgpackCodec,
+    ORJSONCodec,
+    PreparedMessage,
+    encode_message,
+    get_codec,
+    register_codec,
+)
+from ansq.utils import to_bytes
+
+
+class UpperCodec(MessageCodec):
+    name = "upper"
+
+    def encode(self, value):
+        return value.upper().encode("utf-8")
+
+    def decode(self, data):
+        return data.decode("utf-8").lower()
+
+
+@pytest.fixture
+def codecs():
+    codecs = [JSONCodec()]
+    for codec_class, module in ((ORJSONCodec, "orjson"), (MsgpackCodec, "msgpack")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        codecs.append(codec_class())
+    return codecs
+
+
+def test_roundtrip(codecs):
+    value = {"key": "value", "items": [1, 2.5, None, True]}
+    for codec in codecs:
+        assert codec.decode(codec.encode(value)) == value
+
+
+def test_encode_convertible_types(codecs):
+    value = {"at": datetime(2020, 1, 1, 10, 34, 2), "price": Decimal("3.14")}
+    for codec in codecs:
+        assert codec.decode(codec.encode(value)) == {
+            "at": "2020-01-01T10:34:02",
+            "price": "3.14",
+        }
+
+
+def test_json_codec():
+    assert JSONCodec().encode({"key": "value"}) == b'{"key":"value"}'
+
+
+def test_get_codec():
+    assert isinstance(get_codec("json"), JSONCodec)
+    with pytest.raises(ValueError, match="Unknown codec 'unknown'"):
+        get_codec("unknown")
+
+
+def test_register_codec(monkeypatch):
+    monkeypatch.setattr("ansq.codecs._codecs", {})
+    register_codec(UpperCodec())
+    assert isinstance(get_codec("upper"), UpperCodec)
+
+
+def test_encode_message():
+    codec = UpperCodec()
+    assert encode_message("test", codec) == b"TEST"
+    # Bytes-like messages are encoded already
+    assert encode_message(b"test", codec) == b"test"
+    assert encode_message(bytearray(b"test"), codec) == b"test"
+    # Messages are converted with `convert_to_bytes()` without a codec
+    assert encode_message({"key": 1}) == b'{"key":1}'
+
+
+def test_prepared_message():
+    codec = UpperCodec()
+    prepared = PreparedMessage("test", codec)
+    assert prepared.body == b"TEST"
+    assert prepared.size == len(prepared) == 4
+    assert repr(prepared) == "<PreparedMessage: 4 bytes>"
+
+    # Prepared messages are never encoded again
+    assert encode_message(prepared, codec) is prepared.body
+    assert encode_message(prepared) is prepared.body
+    assert to_bytes(prepared) is prepared.body
+    assert PreparedMessage(prepared, codec).body is prepared.body
+
+    assert PreparedMessage({"key": 1}).body == b'{"key":1}'
+    with pytest.raises(ValueError, match="Unknown codec"):
+        PreparedMessage("test", "unknown")
+
+
+def test_connection_options_codec():
+    assert ConnectionOptions().codec is None
+    assert isinstance(ConnectionOptions(codec="json").codec, JSONCodec)
+
+    codec = UpperCodec()
+    assert ConnectionOptions(codec=codec).codec is codec
+
+    with pytest.raises(ValueError, match="Unknown codec"):
+        ConnectionOptions(codec="unknown")
@@ -0,0 +1,62 @@
+import pytest
+
+from ansq.tcp.compression import DeflateCodec, SnappyCodec
+
+
+@pytest.fixture
+def snappy_codecs():
+    pytest.importorskip("snappy")
+    return SnappyCodec(), SnappyCodec()
+
+
+def test_snappy_roundtrip(snappy_codecs):
+    sender, receiver = snappy_codecs
+    data = b"PUB foo\n" + b"test_message" * 1000
+
+    compressed = sender.compress(data)
+    assert len(compressed) < len(data)
+    assert receiver.decompress(compressed) == data
+
+
+def test_snappy_partial_chunks(snappy_codecs):
+    sender, receiver = snappy_codecs
+    compressed = sender.compress(b"first") + sender.compress(b"second")
+
+    decompressed = b"".join(
+        receiver.decompress(compressed[i : i + 3]) for i in range(0, len(compressed), 3)
+    )
+    assert decompressed == b"firstsecond"
+
+
+def test_snappy_not_installed(monkeypatch):
+    monkeypatch.setattr("ansq.tcp.compression.snappy", None)
+    with pytest.raises(RuntimeError, match="python-snappy is required"):
+        SnappyCodec()
+
+
+@pytest.mark.parametrize("level", (1, 6, 9))
+def test_deflate_roundtrip(level):
+    sender, receiver = DeflateCodec(level), DeflateCodec(level)
+    data = b"PUB foo\n" + b"test_message" * 1000
+
+    compressed = sender.compress(data)
+    assert len(compressed) < len(data)
+    assert receiver.decompress(compressed) == data
+
+
+def test_deflate_sync_flush():
+    sender, receiver = DeflateCodec(), DeflateCodec()
+
+    # Every compressed chunk can be decompressed without waiting for more data
+    for data in (b"first", b"second", b"third"):
+        assert receiver.decompress(sender.compress(data)) == data
+
+
+def test_deflate_partial_chunks():
+    sender, receiver = DeflateCodec(), DeflateCodec()
+    compressed = sender.compress(b"first") + sender.compress(b"second")
+
+    decompressed = b"".join(
+        receiver.decompress(compressed[i : i + 3]) for i in range(0, len(compressed), 3)
+    )
+    assert decompressed == b"firstsecond"
@@ -1,6 +1,23 @@
+import asyncio
+import os
+import socket
+import struct
+import tempfile
+
 import pytest
 
-from ansq import ConnectionFeatures, ConnectionOptions, open_connection
+from ansq import (
+    ConnectionFeatures,
+    ConnectionOptions,
+    Jitter,
+    ReconnectLimiter,
+    ReconnectPolicy,
+    open_connection,
+)
+from ansq.tcp.connection import NSQConnection
+from ansq.tcp.exceptions import ConnectionClosedError
+from ansq.tcp.socket_options import KeepaliveOptions, SocketOptions
+from ansq.tcp.tls import create_default_context
 from ansq.tcp.types import NSQCommands
 
 
@@ -95,3 +112,404 @@ async def test_errors_from_commands_without_responses(nsqd, wait_for, cmd, caplo
     expected_log = f"[E_INVALID] cannot {cmd.decode('utf8')} in current state"
     assert expected_log in caplog.text
     assert response is None
+
+
+async def test_snappy(nsqd, wait_for):
+    pytest.importorskip("snappy")
+    nsq = await open_connection(
+        connection_options=ConnectionOptions(features=ConnectionFeatures(snappy=True))
+    )
+    assert nsq._codec is not None
+
+    response = await nsq.pub("foo", "test_message" * 100)
+    assert response.is_ok
+
+    await nsq.subscribe("foo", "bar")
+    message = await nsq.wait_for_message()
+    assert message.body == b"test_message" * 100
+
+    await nsq.close()
+
+
+async def test_snappy_not_installed(nsqd, monkeypatch, caplog):
+    monkeypatch.setattr("ansq.tcp.connection.is_snappy_available", lambda: False)
+    nsq = await open_connection(
+        connection_options=ConnectionOptions(features=ConnectionFeatures(snappy=True))
+    )
+    assert nsq.status.is_connected
+    assert nsq._codec is None
+    assert "python-snappy is not installed" in caplog.text
+
+    response = await nsq.pub("foo", "test_message")
+    assert response.is_ok
+
+    await nsq.close()
+
+
+async def test_deflate(nsqd):
+    nsq = await open_connection(
+        connection_options=ConnectionOptions(
+            features=ConnectionFeatures(deflate=True, deflate_level=1)
+        )
+    )
+    assert nsq._codec is not None
+
+    response = await nsq.pub("foo", "test_message" * 100)
+    assert response.is_ok
+
+    await nsq.subscribe("foo", "bar")
+    message = await nsq.wait_for_message()
+    assert message.body == b"test_message" * 100
+
+    await nsq.close()
+
+
+async def test_tls(create_nsqd, tls_cert):
+    cert, key = tls_cert
+    async with create_nsqd(
+        addr="127.0.0.1:4250",
+        http_addr="127.0.0.1:4251",
+        tls_cert=cert,
+        tls_key=key,
+    ):
+        nsq = await open_connection(
+            "127.0.0.1:4250",
+            connection_options=ConnectionOptions(
+                tls_context=create_default_context(cafile=cert),
+                features=ConnectionFeatures(tls_v1=True, deflate=True),
+            ),
+        )
+        assert nsq.is_tls
+
+        response = await nsq.pub("foo", "test_message")
+        assert response.is_ok
+
+        # Reconnect resumes the TLS session
+        assert await nsq.reconnect()
+        assert nsq.is_tls_session_reused
+
+        response = await nsq.pub("foo", "test_message")
+        assert response.is_ok
+
+        await nsq.close()
+
+
+@pytest.mark.parametrize(
+    "check_hostname, hostname, error",
+    (
+        (True, None, ValueError),
+        (True, "nsqd", asyncio.TimeoutError),
+        (False, None, asyncio.TimeoutError),
+    ),
+)
+async def test_tls_over_unix_socket(check_hostname, hostname, error):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "nsqd.sock")
+        server = await asyncio.start_unix_server(lambda reader, writer: None, path)
+
+        context = create_default_context()
+        context.check_hostname = check_hostname
+        nsq = NSQConnection(
+            path,
+            connection_options=ConnectionOptions(
+                tls_context=context,
+                tls_server_hostname=hostname,
+                features=ConnectionFeatures(tls_v1=True),
+                identify_timeout=0.1,
+            ),
+        )
+        await nsq.connect()
+
+        # The server never responds, so IDENTIFY times out if it's sent
+        with pytest.raises(error):
+            await nsq.identify()
+
+        await nsq.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.fixture
+async def silent_nsqd():
+    """Address of a server accepting connections and never responding, and
+    a list of its client streams.
+    """
+    writers = []
+
+    async def handle(reader, writer):
+        writers.append(writer)
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    yield f"{host}:{port}", writers
+
+    for writer in writers:
+        writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_mpub_single_message():
+    streams = []
+
+    async def handle(reader, writer):
+        streams.append((reader, writer))
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    nsq = NSQConnection(f"{host}:{port}")
+    await nsq.connect()
+
+    pub = asyncio.ensure_future(nsq.mpub("foo", "test_message"))
+    await asyncio.sleep(0.1)
+
+    # A single message is sent as an MPUB body of one message
+    reader, writer = streams[0]
+    body = struct.pack(">ll", 20, 1) + struct.pack(">l", 12) + b"test_message"
+    assert await reader.readexactly(4 + 9 + len(body)) == b"  V2MPUB foo\n" + body
+
+    writer.write(struct.pack(">ll", 6, 0) + b"OK")
+    assert (await pub).is_ok
+
+    await nsq.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_close_fails_pending_commands(silent_nsqd):
+    addr, _ = silent_nsqd
+    nsq = NSQConnection(addr)
+    await nsq.connect()
+
+    pub = asyncio.ensure_future(nsq.pub("foo", "test_message"))
+    await asyncio.sleep(0.01)
+    await nsq.close()
+
+    with pytest.raises(ConnectionClosedError):
+        await pub
+    assert not nsq._cmd_waiters
+
+
+async def test_status_is_reconnecting_once_connection_is_lost(silent_nsqd):
+    addr, writers = silent_nsqd
+    policy = ReconnectPolicy(min_interval=10, jitter=Jitter.NONE)
+    nsq = NSQConnection(
+        addr, connection_options=ConnectionOptions(reconnect_policy=policy)
+    )
+    await nsq.connect()
+    await asyncio.sleep(0.01)
+
+    # The connection is not used for publishing during the reconnect delay
+    writers[0].close()
+    await asyncio.sleep(0.1)
+    assert nsq.status.is_reconnecting
+    assert not nsq.is_connected
+
+    await nsq.close()
+
+
+async def test_hung_reconnect_does_not_block_others(silent_nsqd):
+    addr, _ = silent_nsqd
+    policy = ReconnectPolicy(
+        min_interval=10,
+        limiter=ReconnectLimiter(max_concurrent=1),
+        attempt_timeout=0.1,
+    )
+    options = ConnectionOptions(reconnect_policy=policy)
+    hung = NSQConnection(addr, connection_options=options)
+    other = NSQConnection(addr, connection_options=options)
+    await hung.connect()
+    await other.connect()
+
+    reconnected = asyncio.Event()
+
+    async def reconnect():
+        reconnected.set()
+        return True
+
+    other.reconnect = reconnect
+
+    # The server never responds to IDENTIFY, so the attempt hangs
+    hung_task = asyncio.ensure_future(hung._do_auto_reconnect())
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(other._do_auto_reconnect(), timeout=1)
+    assert reconnected.is_set()
+
+    hung_task.cancel()
+    await hung.close()
+    await other.close()
+
+
+async def test_identify_timeout(silent_nsqd):
+    addr, _ = silent_nsqd
+    with pytest.raises(asyncio.TimeoutError):
+        await open_connection(
+            addr, connection_options=ConnectionOptions(identify_timeout=0.1)
+        )
+
+
+async def test_command_timeout(silent_nsqd):
+    addr, writers = silent_nsqd
+    nsq = NSQConnection(addr, connection_options=ConnectionOptions(command_timeout=5))
+    await nsq.connect()
+    assert nsq.is_healthy
+
+    with pytest.raises(asyncio.TimeoutError):
+        await nsq.pub("foo", "test_message", timeout=0.1)
+    assert not nsq.is_healthy
+
+    # The late response is consumed by the timed out command
+    writers[0].write(struct.pack(">ll", 6, 0) + b"OK")
+    await asyncio.sleep(0.1)
+    assert nsq.is_healthy
+
+    await nsq.close()
+
+
+async def test_cancelled_command(silent_nsqd):
+    addr, writers = silent_nsqd
+    nsq = NSQConnection(addr)
+    await nsq.connect()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(nsq.pub("foo", "test_message"), 0.1)
+    assert not nsq.is_healthy
+
+    writers[0].write(struct.pack(">ll", 6, 0) + b"OK")
+    await asyncio.sleep(0.1)
+    assert nsq.is_healthy
+
+    await nsq.close()
+
+
+async def test_missed_heartbeats(silent_nsqd):
+    addr, _ = silent_nsqd
+    nsq = NSQConnection(
+        addr,
+        connection_options=ConnectionOptions(
+            features=ConnectionFeatures(heartbeat_interval=50),
+            auto_reconnect=False,
+            missed_heartbeats=2,
+        ),
+    )
+    await nsq.connect()
+    assert nsq.status.is_connected
+
+    # Nothing arrives within two heartbeat intervals
+    await asyncio.sleep(0.3)
+    assert nsq.status.is_closed
+
+
+async def test_keepalive(silent_nsqd):
+    addr, _ = silent_nsqd
+    nsq = NSQConnection(
+        addr,
+        connection_options=ConnectionOptions(
+            keepalive=KeepaliveOptions(idle=30, interval=5, count=4)
+        ),
+    )
+    await nsq.connect()
+
+    sock = nsq._writer.get_extra_info("socket")
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+    if hasattr(socket, "TCP_KEEPCNT"):
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT) == 4
+
+    await nsq.close()
+
+
+@pytest.mark.parametrize(
+    "socket_options, nodelay",
+    (
+        (None, True),
+        (SocketOptions.throughput(), False),
+        (SocketOptions.latency(), True),
+        (SocketOptions(nodelay=False, receive_buffer_size=65536), False),
+    ),
+)
+async def test_socket_options(silent_nsqd, socket_options, nodelay):
+    addr, _ = silent_nsqd
+    nsq = NSQConnection(
+        addr, connection_options=ConnectionOptions(socket_options=socket_options)
+    )
+    await nsq.connect()
+
+    sock = nsq._writer.get_extra_info("socket")
+    assert bool(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)) is nodelay
+    if socket_options is not None and socket_options.receive_buffer_size == 65536:
+        # Linux doubles the requested size
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 65536
+
+    await nsq.close()
+
+
+async def test_publish_waits_for_write_buffer_to_drain():
+    readers = []
+
+    async def handle(reader, writer):
+        readers.append((reader, writer))
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    nsq = NSQConnection(
+        f"{host}:{port}",
+        connection_options=ConnectionOptions(
+            write_buffer_high=65536, write_buffer_low=1024
+        ),
+    )
+    await nsq.connect()
+
+    # The server doesn't read, so the message stays buffered
+    message = b"x" * 32 * 1024 * 1024
+    first_pub = asyncio.ensure_future(nsq.pub("foo", message))
+    await asyncio.sleep(0.1)
+    assert nsq.write_buffer_size > 65536
+
+    # The next publish waits until the buffer drains
+    second_pub = asyncio.ensure_future(nsq.pub("foo", "test_message"))
+    await asyncio.sleep(0.1)
+    assert len(nsq._cmd_waiters) == 1
+
+    reader, writer = readers[0]
+    await reader.readexactly(4 + len(b"PUB foo\n") + 4 + len(message))
+    await asyncio.sleep(0.1)
+    assert nsq.write_buffer_size == 0
+    assert len(nsq._cmd_waiters) == 2
+
+    writer.write(struct.pack(">ll", 6, 0) + b"OK" + struct.pack(">ll", 6, 0) + b"OK")
+    assert (await first_pub).is_ok
+    assert (await second_pub).is_ok
+
+    await nsq.close()
+    server.close()
+    await server.wait_closed()
+
+
+def message_frame(message_id, body):
+    data = struct.pack(">qh", 0, 1) + message_id + body
+    return struct.pack(">ll", len(data) + 4, 2) + data
+
+
+async def test_close_removes_own_queued_messages(silent_nsqd):
+    addr, writers = silent_nsqd
+    queue = asyncio.Queue()
+    options = ConnectionOptions(message_queue=queue, auto_reconnect=False)
+    first = NSQConnection(addr, connection_options=options)
+    second = NSQConnection(addr, connection_options=options)
+    await first.connect()
+    await second.connect()
+    await asyncio.sleep(0.01)
+
+    writers[0].write(message_frame(b"1" * 16, b"first"))
+    writers[1].write(message_frame(b"2" * 16, b"second"))
+    writers[0].write(message_frame(b"3" * 16, b"first"))
+    await asyncio.sleep(0.1)
+    assert queue.qsize() == 3
+
+    await first.close()
+    assert queue.qsize() == 1
+    message = queue.get_nowait()
+    assert message.connection is second
+    assert message.body == b"second"
+
+    await second.close()
@@ -1,3 +1,4 @@
+from array import array
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
@@ -6,7 +7,7 @@ from typing import Optional
 
 import pytest
 
-from ansq.utils import convert_to_bytes
+from ansq.utils import convert_to_bytes, to_bytes
 
 PY37 = version_info >= (3, 7)
 
@@ -57,10 +58,32 @@ class Color(Enum):
         (Color.RED, b"RED"),
         (Color.GREEN, b"GREEN"),
         (Color.BLUE, b"BLUE"),
+        (memoryview(b"memoryview"), b"memoryview"),
+        (memoryview(b"memoryview")[2:6], b"mory"),
+        (array("B", b"array"), b"array"),
     ),
 )
 def test_convert_to_bytes(value, expected):
     assert convert_to_bytes(value) == expected
+    assert to_bytes(value) == expected
+
+
+def test_to_bytes_returns_bytes_like_as_is():
+    value = bytearray(b"bytearray")
+    assert to_bytes(value) is value
+
+    view = to_bytes(memoryview(value)[:4])
+    assert isinstance(view, memoryview)
+    assert view.obj is value
+
+
+def test_convert_memoryview_to_bytes():
+    # Multi-byte items are flattened to bytes
+    view = convert_to_bytes(memoryview(array("H", [1, 2])))
+    assert view.nbytes == len(view) == 4
+
+    # Not contiguous memoryview is copied
+    assert convert_to_bytes(memoryview(b"abcdef")[::2]) == b"ace"
 
 
 if PY37:
@@ -114,3 +137,5 @@ if PY37:
 def test_convert_to_bytes_with_exception(value):
     with pytest.raises(TypeError):
         convert_to_bytes(value)
+    with pytest.raises(TypeError):
+        to_bytes(value)
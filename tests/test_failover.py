@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+from ansq import FailoverPolicy, SpillOptions
+from ansq.tcp.exceptions import ConnectionClosedError
+from ansq.tcp.failover import CircuitBreaker
+from ansq.tcp.types import FrameType, NSQErrorSchema, NSQResponseSchema
+from ansq.tcp.writer import Writer
+
+
+def test_circuit_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+
+    breaker.record_failure()
+    assert not breaker.is_open
+    assert breaker.allows_request()
+
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allows_request()
+
+
+def test_circuit_breaker_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.is_open
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.failures == 0
+
+
+def test_circuit_breaker_allows_trial_request_after_recovery_timeout(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert breaker.is_open
+    assert breaker.allows_request()
+
+
+def test_circuit_breaker_allows_single_trial_request(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert breaker.start_request()
+    assert not breaker.allows_request()
+    assert not breaker.start_request()
+
+    breaker.cancel_trial()
+    assert breaker.allows_request()
+
+    assert breaker.start_request()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allows_request()
+    assert not breaker.start_request()
+
+
+def test_circuit_breaker_no_trial_before_recovery_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+
+    assert not breaker.start_request()
+    assert breaker.is_open
+    assert not breaker.allows_request()
+
+
+@pytest.mark.parametrize(
+    "hedged_topics", (["foo", "bar"], ("foo", "bar"), {"foo", "bar"})
+)
+def test_failover_policy_hedged_topics(hedged_topics):
+    policy = FailoverPolicy(hedged_topics=hedged_topics)
+    assert policy.hedged_topics == frozenset(("foo", "bar"))
+
+
+class FakeConnection:
+    def __init__(self, id_, response):
+        self.id = id_
+        self.endpoint = f"tcp://{id_}"
+        self.is_connected = True
+        self.is_healthy = True
+        self.response = response
+        self.published = 0
+
+    async def pub(self, topic, message, timeout=None):
+        self.published += 1
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+async def test_failover_on_pub_failed_response():
+    failing = FakeConnection(
+        "failing:4150", NSQErrorSchema(b"E_PUB_FAILED", b"", FrameType.ERROR)
+    )
+    healthy = FakeConnection(
+        "healthy:4150", NSQResponseSchema(b"OK", FrameType.RESPONSE)
+    )
+
+    writer = Writer(failover_policy=FailoverPolicy(failure_threshold=1))
+    writer._connections = {failing.id: failing, healthy.id: healthy}
+
+    for i in range(10):
+        response = await writer.pub(topic="foo", message=f"test_message_{i}")
+        assert response.is_ok
+
+    # The failing connection is taken out of rotation after the first failure
+    assert failing.published <= 1
+    assert healthy.published == 10
+    assert writer.circuit_breakers[failing.id].is_open
+
+
+async def test_fallback_publish_keeps_circuit_breaker_open():
+    conn = FakeConnection("fallback:4150", NSQResponseSchema(b"OK", FrameType.RESPONSE))
+
+    writer = Writer(failover_policy=FailoverPolicy(failure_threshold=1))
+    writer._connections = {conn.id: conn}
+    writer._get_circuit_breaker(conn).record_failure()
+
+    # The only connection is used although its breaker is open
+    response = await writer.pub(topic="foo", message="test_message")
+    assert response.is_ok
+    assert conn.published == 1
+    assert writer.circuit_breakers[conn.id].is_open
+
+
+async def test_spill_after_failover_attempts_fail(tmp_path):
+    connections = [
+        FakeConnection(f"closed{i}:4150", ConnectionClosedError("Connection is closed"))
+        for i in range(2)
+    ]
+
+    writer = Writer(
+        failover_policy=FailoverPolicy(),
+        spill_options=SpillOptions(directory=str(tmp_path)),
+    )
+    writer._connections = {conn.id: conn for conn in connections}
+
+    assert await writer.pub(topic="foo", message="test_message") is None
+    assert all(conn.published == 1 for conn in connections)
+    assert writer.spill_buffer.peek(10) == [("foo", b"test_message")]
+    writer.spill_buffer.close()
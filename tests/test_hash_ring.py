@@ -0,0 +1,70 @@
+from collections import Counter
+
+import pytest
+
+from ansq.tcp.hash_ring import HashRing
+
+KEYS = [f"key-{i}".encode() for i in range(1000)]
+
+
+def test_empty_ring():
+    ring = HashRing()
+    assert len(ring) == 0
+    assert ring.get(b"key") is None
+    assert list(ring.iter_nodes(b"key")) == []
+
+
+def test_invalid_replicas():
+    with pytest.raises(ValueError, match=r"^replicas must be greater than 0$"):
+        HashRing(replicas=0)
+
+
+def test_get_is_stable():
+    ring = HashRing(["a", "b", "c"])
+    assert [ring.get(key) for key in KEYS] == [ring.get(key) for key in KEYS]
+
+
+def test_keys_are_spread_between_nodes():
+    ring = HashRing(["a", "b", "c"])
+    counter = Counter(ring.get(key) for key in KEYS)
+    assert set(counter) == {"a", "b", "c"}
+    assert min(counter.values()) > len(KEYS) / 6
+
+
+def test_iter_nodes_yields_distinct_nodes():
+    ring = HashRing(["a", "b", "c"])
+    for key in KEYS[:10]:
+        nodes = list(ring.iter_nodes(key))
+        assert sorted(nodes) == ["a", "b", "c"]
+        assert nodes[0] == ring.get(key)
+
+
+def test_add_node_moves_keys_to_new_node_only():
+    ring = HashRing(["a", "b"])
+    before = {key: ring.get(key) for key in KEYS}
+
+    ring.add("c")
+    assert "c" in ring
+    for key, node in before.items():
+        assert ring.get(key) in (node, "c")
+
+
+def test_remove_node_moves_keys_of_removed_node_only():
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.get(key) for key in KEYS}
+
+    ring.remove("c")
+    assert "c" not in ring
+    assert ring.nodes == {"a", "b"}
+    for key, node in before.items():
+        if node != "c":
+            assert ring.get(key) == node
+
+
+def test_remove_and_add_node_restores_ring():
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.get(key) for key in KEYS}
+
+    ring.remove("b")
+    ring.add("b")
+    assert {key: ring.get(key) for key in KEYS} == before
@@ -0,0 +1,319 @@
+import asyncio
+
+import pytest
+
+from ansq.http import NSQDHTTPWriter, TopicStats
+from ansq.http.base import NSQHTTPConnection
+from ansq.http.http_exceptions import (
+    ConnectionPoolFull,
+    HTTPConnectionError,
+    NotFoundError,
+)
+
+
+class HTTPServer:
+    """HTTP server replying with prepared raw responses."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.responses = []
+        self.requests = []
+        self.connections = 0
+        self.close_after_response = False
+        self._server = None
+
+    @property
+    def addr(self):
+        if self.path is not None:
+            return self.path
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def start(self):
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode().split("\r\n")
+                headers = dict(line.lower().split(": ", 1) for line in lines[1:-2])
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests.append((lines[0], body))
+
+                response = self.responses.pop(0)
+                # Close the connection without a response
+                if response is None:
+                    break
+                writer.write(response)
+                await writer.drain()
+                if (
+                    self.close_after_response
+                    or b"connection: close" in response.lower()
+                ):
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        writer.close()
+
+
+def ok(body=b"OK", *headers):
+    head = [b"HTTP/1.1 200 OK", b"Content-Length: %d" % len(body), *headers]
+    return b"\r\n".join(head) + b"\r\n\r\n" + body
+
+
+@pytest.fixture
+async def server():
+    server = await HTTPServer().start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+async def connection(server):
+    connection = NSQHTTPConnection(server.addr)
+    yield connection
+    await connection.close()
+
+
+async def test_keep_alive(server, connection):
+    server.responses = [ok(), ok(b'{"key": 1}')]
+
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert await connection.perform_request(
+        "POST", "pub", {"topic": "foo"}, "message"
+    ) == {"key": 1}
+
+    assert server.connections == 1
+    assert server.requests == [
+        ("GET /ping HTTP/1.1", b""),
+        ("POST /pub?topic=foo HTTP/1.1", b"message"),
+    ]
+
+
+async def test_connection_close(server, connection):
+    server.responses = [ok(b"OK", b"Connection: close"), ok()]
+
+    await connection.perform_request("GET", "ping", None, None)
+    await connection.perform_request("GET", "ping", None, None)
+    assert server.connections == 2
+
+
+async def test_chunked_response(server, connection):
+    server.responses = [
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"2\r\n{}\r\n0\r\n\r\n",
+        ok(),
+    ]
+
+    assert await connection.perform_request("GET", "stats", None, None) == {}
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert server.connections == 1
+
+
+async def test_close_delimited_response(server, connection):
+    server.responses = [b"HTTP/1.0 200 OK\r\nConnection: close\r\n\r\nOK", ok()]
+
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert server.connections == 2
+
+
+async def test_retry_on_closed_idle_connection(server, connection):
+    # The server closes connections after responses without telling
+    server.close_after_response = True
+    server.responses = [ok(), ok()]
+
+    await connection.perform_request("GET", "ping", None, None)
+    await asyncio.sleep(0.01)
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert server.connections == 2
+    assert len(server.requests) == 2
+
+
+async def test_pool_size(server):
+    server.responses = [ok(), ok()]
+    connection = NSQHTTPConnection(server.addr, pool_size=1)
+
+    results = await asyncio.gather(
+        connection.perform_request("GET", "ping", None, None),
+        connection.perform_request("GET", "ping", None, None),
+    )
+    assert results == ["OK", "OK"]
+    assert server.connections == 1
+    assert connection.pool.size == connection.pool.idle_size == 1
+
+    await connection.close()
+
+
+async def test_pool_wait_queue(server):
+    server.responses = [ok(), ok()]
+    connection = NSQHTTPConnection(server.addr, pool_size=1, max_waiting=1)
+    pool = connection.pool
+
+    first = await pool.acquire()
+    second = asyncio.ensure_future(
+        connection.perform_request("GET", "ping", None, None)
+    )
+    await asyncio.sleep(0.01)
+    assert pool.in_use == 1
+    assert pool.waiting == 1
+
+    with pytest.raises(ConnectionPoolFull):
+        await connection.perform_request("GET", "ping", None, None)
+    assert pool.rejected == 1
+
+    pool.release(first)
+    assert await second == "OK"
+    assert pool.waiting == pool.in_use == 0
+    assert pool.acquired == 2
+
+    await connection.close()
+
+
+async def test_pool_idle_timeout(server):
+    server.responses = [ok(), ok()]
+    connection = NSQHTTPConnection(server.addr, idle_timeout=0)
+
+    await connection.perform_request("GET", "ping", None, None)
+    assert connection.pool.idle_size == 0
+    await connection.perform_request("GET", "ping", None, None)
+    assert server.connections == 2
+
+    await connection.close()
+
+
+async def test_pool_health_check(server, connection):
+    server.close_after_response = True
+    server.responses = [ok(), ok()]
+
+    await connection.perform_request("GET", "ping", None, None)
+    await asyncio.sleep(0.01)
+    assert connection.pool.idle_size == 1
+
+    # The connection closed by the server is dropped without sending a request
+    connection_to_drop = connection.pool._idle[0][0]
+    assert not connection_to_drop.is_healthy
+    await connection.perform_request("GET", "ping", None, None)
+    assert connection_to_drop.requests_count == 1
+
+
+async def test_retry_idempotent_request_on_closed_connection(server, connection):
+    server.responses = [ok(), None, ok(b"retried")]
+
+    await connection.perform_request("GET", "ping", None, None)
+    # The kept alive connection is closed by the server, so a new one is used
+    assert await connection.perform_request("GET", "ping", None, None) == "retried"
+    assert len(server.requests) == 3
+    assert server.connections == 2
+
+
+async def test_no_retry_of_publish_on_closed_connection(server, connection):
+    server.responses = [ok(), None, ok()]
+
+    await connection.perform_request("GET", "ping", None, None)
+    # The message could be published already, so the request is not retried
+    with pytest.raises(HTTPConnectionError):
+        await connection.perform_request("POST", "pub", {"topic": "foo"}, "message")
+    assert len(server.requests) == 2
+
+
+async def test_close_pool(server, connection):
+    server.responses = [ok()]
+    await connection.perform_request("GET", "ping", None, None)
+    assert connection.pool.size == 1
+
+    await connection.close()
+    assert connection.pool.is_closed
+    assert connection.pool.size == 0
+    with pytest.raises(RuntimeError, match="Connection pool is closed"):
+        await connection.perform_request("GET", "ping", None, None)
+
+
+async def test_stream_stats(server):
+    server.responses = [
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b'8\r\n{"topics\r\n'
+        b'1b\r\n": [{"topic_name": "foo"}]}\r\n'
+        b"0\r\n\r\n",
+        ok(),
+    ]
+    writer = NSQDHTTPWriter(server.addr)
+
+    stats = [stats async for stats in writer.stream_stats(topic="foo")]
+    assert stats == [TopicStats(topic_name="foo")]
+    assert server.requests[0][0] == (
+        "GET /stats?format=json&include_clients=false&include_mem=false&topic=foo "
+        "HTTP/1.1"
+    )
+
+    # The whole response is read, so the connection is reused
+    assert await writer.ping() == "OK"
+    assert server.connections == 1
+
+    await writer.close()
+
+
+async def test_stream_request_error_status(server, connection):
+    server.responses = [
+        b"HTTP/1.1 404 Not Found\r\nContent-Length: 27\r\n\r\n"
+        b'{"message":"TOPIC_MISSING"}'
+    ]
+
+    with pytest.raises(NotFoundError):
+        async with connection.stream_request("GET", "stats", None):
+            pass  # pragma: no cover
+    assert connection.pool.in_use == 0
+
+
+async def test_error_status(server, connection):
+    server.responses = [
+        b"HTTP/1.1 404 Not Found\r\nContent-Length: 27\r\n\r\n"
+        b'{"message":"TOPIC_MISSING"}'
+    ]
+
+    with pytest.raises(NotFoundError) as exc_info:
+        await connection.perform_request("GET", "lookup", {"topic": "foo"}, None)
+    assert exc_info.value.status_code == 404
+    assert exc_info.value.info == {"message": "TOPIC_MISSING"}
+
+
+async def test_connection_error(server):
+    addr = server.addr
+    await server.stop()
+
+    connection = NSQHTTPConnection(addr)
+    with pytest.raises(HTTPConnectionError):
+        await connection.perform_request("GET", "ping", None, None)
+
+
+async def test_timeout(server):
+    server.responses = [b"HTTP/1.1 200 OK\r\n"]
+
+    connection = NSQHTTPConnection(server.addr, timeout=0.1)
+    with pytest.raises(HTTPConnectionError):
+        await connection.perform_request("GET", "ping", None, None)
+    assert connection.pool.size == 0
+
+
+async def test_unix_socket(tmp_path):
+    server = await HTTPServer(path=str(tmp_path / "http.sock")).start()
+    server.responses = [ok(), ok()]
+
+    connection = NSQHTTPConnection(server.addr)
+    assert await connection.perform_request("GET", "ping", None, None) == "OK"
+    assert await connection.perform_request("POST", "pub", None, b"test") == "OK"
+    assert server.connections == 1
+    assert server.requests[1] == ("POST /pub HTTP/1.1", b"test")
+
+    await connection.close()
+    await server.stop()
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from ansq.http.stats import ChannelStats, TopicStats, iter_stats
+
+STATS = {
+    "version": "1.2.1",
+    "health": "OK",
+    "start_time": 1600000000,
+    "topics": [
+        {
+            "topic_name": "foo",
+            "channels": [
+                {
+                    "channel_name": "bar",
+                    "depth": 5,
+                    "backend_depth": 1,
+                    "in_flight_count": 2,
+                    "deferred_count": 0,
+                    "message_count": 120,
+                    "requeue_count": 3,
+                    "timeout_count": 4,
+                    "client_count": 2,
+                    "clients": [],
+                    "paused": False,
+                    "e2e_processing_latency": {"count": 0, "percentiles": None},
+                },
+                {
+                    "channel_name": "каналы",
+                    "clients": [{"client_id": "a"}],
+                    "paused": True,
+                },
+            ],
+            "depth": 10,
+            "backend_depth": 2,
+            "message_count": 1234567,
+            "message_bytes": 99,
+            "paused": False,
+            "e2e_processing_latency": {"count": 0, "percentiles": None},
+        },
+        {"topic_name": "baz", "channels": []},
+    ],
+    "memory": {"heap_objects": 1},
+    "producers": [],
+}
+
+EXPECTED = [
+    TopicStats(
+        topic_name="foo",
+        depth=10,
+        backend_depth=2,
+        message_count=1234567,
+        message_bytes=99,
+        channel_count=2,
+    ),
+    ChannelStats(
+        topic_name="foo",
+        channel_name="bar",
+        depth=5,
+        backend_depth=1,
+        in_flight_count=2,
+        message_count=120,
+        requeue_count=3,
+        timeout_count=4,
+        client_count=2,
+    ),
+    ChannelStats(topic_name="foo", channel_name="каналы", client_count=1, paused=True),
+    TopicStats(topic_name="baz"),
+]
+
+
+async def iter_chunks(data, chunk_size):
+    for i in range(0, len(data), chunk_size):
+        yield data[i : i + chunk_size]
+
+
+async def collect(data, chunk_size=None, **filters):
+    chunks = iter_chunks(data, chunk_size or len(data))
+    return [stats async for stats in iter_stats(chunks, **filters)]
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 64, None))
+async def test_iter_stats(chunk_size):
+    data = json.dumps(STATS, indent=2, ensure_ascii=False).encode("utf-8")
+    assert await collect(data, chunk_size) == EXPECTED
+
+
+async def test_iter_stats_wrapped():
+    # nsqd < 1.0 wraps stats with the status
+    data = json.dumps({"status_code": 200, "status_txt": "OK", "data": STATS})
+    assert await collect(data.encode(), 5) == EXPECTED
+
+
+async def test_iter_stats_filters():
+    data = json.dumps(STATS).encode()
+    assert await collect(data, topic="baz") == EXPECTED[3:]
+    assert await collect(data, topic="foo", channel="bar") == EXPECTED[:2]
+
+
+async def test_iter_stats_without_topics():
+    assert await collect(b'{"version": "1.2.1", "topics": []}') == []
+    assert await collect(b"{}") == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    (
+        b'{"topics": [{"topic_name": "foo"}',
+        b"[]",
+        b'{"topics": [{"topic_name": "foo"} 2]}',
+        b'{"topics": [1, 2]}',
+    ),
+)
+async def test_iter_stats_invalid(data):
+    with pytest.raises(ValueError):
+        await collect(data, 3)
+
+
+async def test_iter_stats_reads_to_end():
+    chunks_read = []
+
+    async def chunks():
+        for chunk in (b'{"topics": []', b"}", b"\n"):
+            chunks_read.append(chunk)
+            yield chunk
+
+    assert [stats async for stats in iter_stats(chunks())] == []
+    assert len(chunks_read) == 3
@@ -1,5 +1,6 @@
 import pytest
 
+from ansq.http import ChannelStats, TopicStats
 from ansq.http.writer import NSQDHTTPWriter
 
 
@@ -21,6 +22,29 @@ async def test_info(writer):
     assert res["http_port"] == 4151
 
 
+async def test_stream_stats(writer):
+    await writer.create_topic("test-stats-topic")
+    await writer.create_channel("test-stats-topic", "test-stats-channel")
+    await writer.pub("test-stats-topic", "test-message")
+
+    stats = [stats async for stats in writer.stream_stats(topic="test-stats-topic")]
+    assert stats == [
+        TopicStats(
+            topic_name="test-stats-topic",
+            depth=0,
+            message_count=1,
+            message_bytes=12,
+            channel_count=1,
+        ),
+        ChannelStats(
+            topic_name="test-stats-topic",
+            channel_name="test-stats-channel",
+            depth=1,
+            message_count=1,
+        ),
+    ]
+
+
 async def test_pub(writer):
     res = await writer.pub("test-topic", "test-message")
     assert res == "OK"
@@ -93,3 +117,8 @@ async def test_pausable_channel(writer, method_name):
     method = getattr(writer, method_name)
     res = await method(channel=channel, topic=topic)
     assert res == ""
+
+
+async def test_pub_memoryview(writer):
+    res = await writer.pub("test-topic", memoryview(b"test-message")[5:])
+    assert res == "OK"
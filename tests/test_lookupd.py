@@ -0,0 +1,336 @@
+import asyncio
+
+import pytest
+
+from ansq.http.lookupd import NsqLookupd, Producer, parse_producers
+from ansq.tcp.lookupd import Lookupd
+from ansq.tcp.types import Client
+
+PRODUCER = {
+    "remote_address": "127.0.0.1:51234",
+    "hostname": "nsqd-1",
+    "broadcast_address": "10.0.0.1",
+    "tcp_port": 4150,
+    "http_port": 4151,
+    "version": "1.2.1",
+}
+
+
+class Connection:
+    def __init__(self, id, client):
+        self.id = id
+        self.client = client
+
+    async def close(self):
+        self.client.remove_connection(self)
+
+
+class Reader(Client):
+    topic = "foo"
+
+    def __init__(self, nsqd_tcp_addresses=()):
+        super().__init__(nsqd_tcp_addresses=nsqd_tcp_addresses)
+        self.connected = []
+        self.auto_reconnect = {}
+
+    async def connect_to_nsqd(self, addr, connection_options=None):
+        options = connection_options or self.connection_options
+        self.connected.append(addr)
+        self.auto_reconnect[addr] = options.auto_reconnect
+        self.add_connection(Connection(addr, self))
+
+
+def test_parse_producers():
+    assert parse_producers({"channels": [], "producers": [PRODUCER]}) == (
+        Producer(
+            broadcast_address="10.0.0.1",
+            tcp_port=4150,
+            http_port=4151,
+            hostname="nsqd-1",
+            version="1.2.1",
+        ),
+    )
+    assert parse_producers({"producers": []}) == ()
+    assert Producer.from_dict(PRODUCER).tcp_address == "10.0.0.1:4150"
+
+
+@pytest.mark.parametrize(
+    "response", ("OK", {}, {"producers": {}}, {"producers": ["10.0.0.1:4150"]})
+)
+def test_parse_invalid_producers(response):
+    with pytest.raises(ValueError):
+        parse_producers(response)
+
+
+async def test_lookup_producers_cache(monkeypatch):
+    requests = []
+
+    async def lookup(topic):
+        requests.append(topic)
+        await asyncio.sleep(0)
+        return {"producers": [PRODUCER]}
+
+    lookupd = NsqLookupd(cache_ttl=60)
+    monkeypatch.setattr(lookupd, "lookup", lookup)
+
+    # Concurrent calls share a request
+    results = await asyncio.gather(
+        lookupd.lookup_producers("foo"), lookupd.lookup_producers("foo")
+    )
+    assert results[0] is results[1]
+    assert requests == ["foo"]
+
+    assert await lookupd.lookup_producers("foo") is results[0]
+    await lookupd.lookup_producers("bar")
+    assert requests == ["foo", "bar"]
+
+    lookupd.invalidate_cache()
+    await lookupd.lookup_producers("foo")
+    assert requests == ["foo", "bar", "foo"]
+
+
+async def test_lookup_producers_cancelled_caller(monkeypatch):
+    requests = []
+    response = asyncio.Event()
+
+    async def lookup(topic):
+        requests.append(topic)
+        await response.wait()
+        return {"producers": [PRODUCER]}
+
+    lookupd = NsqLookupd(cache_ttl=60)
+    monkeypatch.setattr(lookupd, "lookup", lookup)
+
+    # A cancelled caller doesn't cancel the request shared with the other one
+    cancelled = asyncio.ensure_future(lookupd.lookup_producers("foo"))
+    waiting = asyncio.ensure_future(lookupd.lookup_producers("foo"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    response.set()
+
+    assert await waiting == (Producer.from_dict(PRODUCER),)
+    assert cancelled.cancelled()
+    assert requests == ["foo"]
+
+
+async def test_lookup_producers_without_cache(monkeypatch):
+    requests = []
+
+    async def lookup(topic):
+        requests.append(topic)
+        return {"producers": [PRODUCER]}
+
+    lookupd = NsqLookupd()
+    monkeypatch.setattr(lookupd, "lookup", lookup)
+
+    await lookupd.lookup_producers("foo")
+    await lookupd.lookup_producers("foo")
+    assert requests == ["foo", "foo"]
+
+
+async def test_lookup_producers_error(monkeypatch):
+    async def lookup(topic):
+        await asyncio.sleep(0)
+        return {"message": "TOPIC_NOT_FOUND"}
+
+    lookupd = NsqLookupd(cache_ttl=60)
+    monkeypatch.setattr(lookupd, "lookup", lookup)
+
+    results = await asyncio.gather(
+        lookupd.lookup_producers("foo"),
+        lookupd.lookup_producers("foo"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not lookupd._producers_cache
+
+
+async def test_update_connections_diff(monkeypatch):
+    reader = Reader(nsqd_tcp_addresses=["10.0.0.3:4150"])
+    lookupd = Lookupd(
+        reader, ["127.0.0.1:4161"], poll_interval=1000, poll_jitter=0, cache_ttl=0
+    )
+
+    def producers(*hosts):
+        return [{**PRODUCER, "broadcast_address": host} for host in hosts]
+
+    responses = [
+        producers("10.0.0.1", "10.0.0.2", "10.0.0.3"),
+        producers("10.0.0.1", "10.0.0.2", "10.0.0.3"),
+        producers("10.0.0.2", "10.0.0.4"),
+        producers(),
+    ]
+
+    async def lookup(topic):
+        return {"producers": responses.pop(0)}
+
+    monkeypatch.setattr(lookupd._lookupd_connections[0], "lookup", lookup)
+
+    await lookupd.query_lookup()
+    assert reader.connected == ["10.0.0.1:4150", "10.0.0.2:4150", "10.0.0.3:4150"]
+
+    # Nothing changed
+    await lookupd.query_lookup()
+    assert len(reader.connected) == 3
+
+    # Auto-reconnect is disabled for discovered producers only
+    assert reader.auto_reconnect == {
+        "10.0.0.1:4150": False,
+        "10.0.0.2:4150": False,
+        "10.0.0.3:4150": True,
+    }
+
+    # Only changes are applied, configured addresses are kept
+    await lookupd.query_lookup()
+    assert reader.connected[3:] == ["10.0.0.4:4150"]
+    assert [c.id for c in reader.connections] == [
+        "10.0.0.2:4150",
+        "10.0.0.3:4150",
+        "10.0.0.4:4150",
+    ]
+
+    # Empty response keeps connections
+    await lookupd.query_lookup()
+    assert len(reader.connections) == 3
+
+    await lookupd.close()
+
+
+async def test_update_connections_of_lagging_lookupd(monkeypatch):
+    reader = Reader()
+    lookupd = Lookupd(
+        reader,
+        ["127.0.0.1:4161", "127.0.0.2:4161"],
+        poll_interval=1000,
+        poll_jitter=0,
+        cache_ttl=0,
+    )
+
+    def producers(*hosts):
+        return [{**PRODUCER, "broadcast_address": host} for host in hosts]
+
+    # The second lookupd doesn't know about the first producer yet
+    responses = {
+        "127.0.0.1:4161": [
+            producers("10.0.0.1", "10.0.0.2"),
+            producers("10.0.0.1", "10.0.0.2"),
+            producers("10.0.0.2"),
+        ],
+        "127.0.0.2:4161": [
+            producers("10.0.0.2"),
+            producers("10.0.0.2"),
+        ],
+    }
+
+    for connection in lookupd._lookupd_connections:
+
+        async def lookup(topic, addr=connection.addr):
+            return {"producers": responses[addr].pop(0)}
+
+        monkeypatch.setattr(connection, "lookup", lookup)
+
+    await lookupd.query_lookup()
+    await lookupd.query_lookup()
+    await lookupd.query_lookup()
+    assert [c.id for c in reader.connections] == ["10.0.0.1:4150", "10.0.0.2:4150"]
+
+    # The producer is closed once both lookupd services don't report it
+    await lookupd.query_lookup()
+    assert [c.id for c in reader.connections] == ["10.0.0.1:4150", "10.0.0.2:4150"]
+    await lookupd.query_lookup()
+    assert [c.id for c in reader.connections] == ["10.0.0.2:4150"]
+
+    await lookupd.close()
+
+
+async def test_share_lookupd_connections(monkeypatch):
+    requests = []
+
+    async def lookup(topic):
+        requests.append(topic)
+        return {"producers": [PRODUCER]}
+
+    readers = [Reader(), Reader()]
+    lookupds = [
+        Lookupd(reader, ["127.0.0.1:4161"], poll_interval=1000, poll_jitter=0)
+        for reader in readers
+    ]
+    connection = lookupds[0]._lookupd_connections[0]
+    assert lookupds[1]._lookupd_connections[0] is connection
+    assert connection.cache_ttl == 10
+    monkeypatch.setattr(connection, "lookup", lookup)
+
+    # Producers of the topic are cached for both readers
+    for lookupd in lookupds:
+        await lookupd.query_lookup()
+    assert requests == ["foo"]
+    assert all(reader.connected == ["10.0.0.1:4150"] for reader in readers)
+
+    # The connection is closed once both lookupd wrappers are closed
+    await lookupds[0].close()
+    assert not connection.pool.is_closed
+    await lookupds[1].close()
+    assert connection.pool.is_closed
+
+
+async def test_query_all_lookupd(monkeypatch):
+    reader = Reader()
+    lookupd = Lookupd(
+        reader,
+        ["127.0.0.1:4161", "127.0.0.1:4261", "127.0.0.1:4361"],
+        poll_interval=1000,
+        poll_jitter=0,
+        query_all=True,
+        query_timeout=50,
+    )
+    connections = lookupd._lookupd_connections
+
+    async def lookup_1(topic):
+        return {"producers": [{**PRODUCER, "broadcast_address": "10.0.0.1"}]}
+
+    async def lookup_2(topic):
+        return {"producers": [PRODUCER, {**PRODUCER, "broadcast_address": "10.0.0.2"}]}
+
+    async def lookup_3(topic):
+        await asyncio.sleep(1)
+
+    for connection, lookup in zip(connections, (lookup_1, lookup_2, lookup_3)):
+        monkeypatch.setattr(connection, "lookup", lookup)
+
+    await lookupd.query_lookup()
+    assert reader.connected == ["10.0.0.1:4150", "10.0.0.2:4150"]
+
+    stats = lookupd.query_stats
+    assert stats["127.0.0.1:4161"].queries == 1
+    assert stats["127.0.0.1:4161"].errors == 0
+    assert stats["127.0.0.1:4361"].errors == 1
+    assert isinstance(stats["127.0.0.1:4361"].last_error, asyncio.TimeoutError)
+    assert stats["127.0.0.1:4361"].last_latency >= 0.05
+
+    await lookupd.close()
+
+
+async def test_query_one_lookupd_per_poll(monkeypatch):
+    reader = Reader()
+    lookupd = Lookupd(
+        reader, ["127.0.0.1:4161", "127.0.0.1:4261"], poll_interval=1000, poll_jitter=0
+    )
+
+    async def failing_lookup(topic):
+        raise ConnectionRefusedError()
+
+    async def lookup(topic):
+        return {"producers": [PRODUCER]}
+
+    monkeypatch.setattr(lookupd._lookupd_connections[0], "lookup", failing_lookup)
+    monkeypatch.setattr(lookupd._lookupd_connections[1], "lookup", lookup)
+
+    await lookupd.query_lookup()
+    assert reader.connected == []
+    await lookupd.query_lookup()
+    assert reader.connected == ["10.0.0.1:4150"]
+
+    assert [stats.errors for stats in lookupd.query_stats.values()] == [1, 0]
+
+    await lookupd.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from ansq.tcp import consts
+from ansq.tcp.protocol import Reader
+
+
+@pytest.fixture
+def protocol():
+    return Reader()
+
+
+@pytest.mark.parametrize(
+    "args, data, expected",
+    (
+        (("NOP",), None, b"NOP\n"),
+        (("RDY", 5), None, b"RDY 5\n"),
+        (("PUB", "foo"), "test", b"PUB foo\n\x00\x00\x00\x04test"),
+        (("PUB", "foo"), memoryview(b"xtestx")[1:5], b"PUB foo\n\x00\x00\x00\x04test"),
+        (
+            ("MPUB", "foo"),
+            ("a", b"bc"),
+            b"MPUB foo\n\x00\x00\x00\x0f\x00\x00\x00\x02"
+            b"\x00\x00\x00\x01a\x00\x00\x00\x02bc",
+        ),
+    ),
+)
+def test_encode_command(protocol, args, data, expected):
+    assert protocol.encode_command(*args, data=data) == expected
+    assert b"".join(protocol.encode_command_parts(*args, data=data)) == expected
+
+
+def test_encode_command_parts_does_not_copy_large_bodies(protocol):
+    buffer = bytearray(consts.MIN_ZERO_COPY_SIZE)
+    body = memoryview(buffer)
+
+    parts = protocol.encode_command_parts("MPUB", "foo", data=(b"small", body, b"a"))
+
+    assert len(parts) == 3
+    assert parts[1].obj is buffer
+    assert b"small" in parts[0]
+    assert parts[2] == b"\x00\x00\x00\x01a"
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from ansq import Jitter, OverflowPolicy, PublishBufferOptions, ReconnectPolicy
+from ansq.tcp.exceptions import NSQBadTopic, PublishBufferFull
+from ansq.tcp.publish_buffer import PublishBuffer
+from ansq.tcp.types import FrameType, NSQErrorSchema
+
+
+class Publisher:
+    def __init__(self):
+        self.batches = []
+        self.event = asyncio.Event()
+        self.event.set()
+
+    async def __call__(self, topic, bodies):
+        await self.event.wait()
+        self.batches.append((topic, list(bodies)))
+
+
+@pytest.fixture
+def publisher():
+    return Publisher()
+
+
+@pytest.fixture
+def create_buffer(publisher):
+    buffers = []
+
+    def _create_buffer(**kwargs):
+        buffer = PublishBuffer(publisher, PublishBufferOptions(**kwargs))
+        buffer.start()
+        buffers.append(buffer)
+        return buffer
+
+    yield _create_buffer
+
+    for buffer in buffers:
+        buffer._flush_task and buffer._flush_task.cancel()
+
+
+async def test_publish_batches(create_buffer, publisher):
+    buffer = create_buffer(batch_size=2)
+
+    for i in range(3):
+        buffer.put_nowait("foo", f"message{i}")
+    buffer.put_nowait("bar", "message3")
+
+    await buffer.flush()
+    assert publisher.batches == [
+        ("foo", [b"message0", b"message1"]),
+        ("foo", [b"message2"]),
+        ("bar", [b"message3"]),
+    ]
+    assert len(buffer) == 0
+    assert buffer.nbytes == 0
+
+
+@pytest.mark.parametrize("overflow", (OverflowPolicy.BLOCK, OverflowPolicy.RAISE))
+async def test_put_nowait_raises_when_full(create_buffer, publisher, overflow):
+    publisher.event.clear()
+    buffer = create_buffer(max_messages=2, overflow=overflow)
+
+    buffer.put_nowait("foo", "message0")
+    buffer.put_nowait("foo", "message1")
+    with pytest.raises(PublishBufferFull):
+        buffer.put_nowait("foo", "message2")
+
+
+async def test_max_bytes(create_buffer, publisher):
+    publisher.event.clear()
+    buffer = create_buffer(max_bytes=10, overflow=OverflowPolicy.RAISE)
+
+    buffer.put_nowait("foo", b"x" * 6)
+    with pytest.raises(PublishBufferFull):
+        buffer.put_nowait("foo", b"x" * 6)
+
+    with pytest.raises(PublishBufferFull):
+        buffer.put_nowait("foo", b"x" * 11)
+
+
+async def test_drop_oldest(create_buffer, publisher):
+    publisher.event.clear()
+    buffer = create_buffer(max_messages=2, overflow=OverflowPolicy.DROP_OLDEST)
+
+    for i in range(4):
+        buffer.put_nowait("foo", f"message{i}")
+    assert buffer.dropped == 2
+
+    publisher.event.set()
+    await buffer.flush()
+    assert publisher.batches == [("foo", [b"message2", b"message3"])]
+
+
+async def test_put_blocks_until_free_space(create_buffer, publisher):
+    publisher.event.clear()
+    buffer = create_buffer(max_messages=1)
+
+    await buffer.put("foo", "message0")
+    put_task = asyncio.ensure_future(buffer.put("foo", "message1"))
+    await asyncio.sleep(0.05)
+    assert not put_task.done()
+
+    publisher.event.set()
+    await asyncio.wait_for(put_task, timeout=1)
+    await buffer.flush()
+    assert publisher.batches == [("foo", [b"message0"]), ("foo", [b"message1"])]
+
+
+async def test_failed_batch_is_requeued(create_buffer):
+    attempts = []
+
+    async def publish(topic, bodies):
+        attempts.append(bodies)
+        if len(attempts) == 1:
+            raise ConnectionError("nsqd is down")
+
+    buffer = PublishBuffer(publish, PublishBufferOptions())
+    buffer.start()
+    buffer.put_nowait("foo", "message")
+
+    await asyncio.wait_for(buffer.flush(), timeout=1)
+    assert attempts == [[b"message"], [b"message"]]
+
+    await buffer.close()
+
+
+async def test_failed_batches_back_off(caplog):
+    attempts = []
+
+    async def publish(topic, bodies):
+        attempts.append(time.monotonic())
+        if len(attempts) <= 3:
+            raise ConnectionError("nsqd is down")
+
+    policy = ReconnectPolicy(min_interval=0.02, max_interval=0.04, jitter=Jitter.NONE)
+    buffer = PublishBuffer(publish, PublishBufferOptions(retry_policy=policy))
+    buffer.start()
+    buffer.put_nowait("foo", "message")
+
+    await asyncio.wait_for(buffer.flush(), timeout=1)
+    assert len(attempts) == 4
+    # Attempts are delayed for 0.02, 0.04 and 0.04 seconds
+    assert attempts[-1] - attempts[0] >= 0.1
+
+    # An error is logged once per streak of failed attempts
+    errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == 1
+
+    await buffer.close()
+
+
+async def test_rejected_batch_is_dropped():
+    attempts = []
+    errors = []
+
+    async def publish(topic, bodies):
+        attempts.append((topic, bodies))
+        if topic == "bad":
+            return NSQErrorSchema(b"E_BAD_TOPIC", b"", FrameType.ERROR)
+
+    buffer = PublishBuffer(
+        publish,
+        PublishBufferOptions(
+            on_error=lambda topic, bodies, error: errors.append((topic, bodies, error))
+        ),
+    )
+    buffer.start()
+    buffer.put_nowait("bad", "message0")
+    buffer.put_nowait("foo", "message1")
+
+    await asyncio.wait_for(buffer.flush(), timeout=1)
+    assert attempts == [("bad", [b"message0"]), ("foo", [b"message1"])]
+    assert buffer.rejected == 1
+    assert buffer.nbytes == 0
+
+    [(topic, bodies, error)] = errors
+    assert (topic, bodies) == ("bad", [b"message0"])
+    assert isinstance(error, NSQBadTopic)
+
+    await buffer.close()
@@ -281,3 +281,23 @@ async def test_read_message_and_touch(nsqd):
 
     await nsq.close()
     assert nsq.is_closed
+
+
+@pytest.mark.parametrize("codec", (None, "json", "orjson"))
+async def test_read_decoded_message(nsqd, codec):
+    nsq = await open_connection(connection_options=ConnectionOptions(codec=codec))
+
+    response = await nsq.pub("test_read_decoded_message", {"key": [1, 2]})
+    assert response.is_ok
+
+    response = await nsq.sub("test_read_decoded_message", "channel1")
+    assert response.is_ok
+
+    await nsq.rdy(1)
+    message = await nsq.message_queue.get()
+    assert message.decoded == {"key": [1, 2]}
+    # Decoded once
+    assert message.decoded is message.decoded
+
+    await message.fin()
+    await nsq.close()
@@ -49,6 +49,7 @@ async def test_create_reader(
         channel="bar",
         lookupd_http_addresses=[nsqlookupd.http_addr, nsqlookupd2.http_addr],
         lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
     )
 
     assert reader.topic == "foo"
@@ -67,6 +68,7 @@ async def test_create_connection(nsqlookupd, wait_for, nsqd, register_producers)
         channel="bar",
         lookupd_http_addresses=[nsqlookupd.http_addr],
         lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
     )
     assert len(reader.connections) == 0
 
@@ -82,6 +84,7 @@ async def test_close_connection(nsqlookupd, nsqd, wait_for, register_producers):
         channel="bar",
         lookupd_http_addresses=[nsqlookupd.http_addr],
         lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
     )
 
     await register_producers(nsqd)
@@ -99,6 +102,7 @@ async def test_restore_connection(nsqlookupd, nsqd, wait_for, register_producers
         channel="bar",
         lookupd_http_addresses=[nsqlookupd.http_addr],
         lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
     )
 
     await register_producers(nsqd)
@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+
+from ansq import ConnectionOptions, Jitter, ReconnectPolicy
+from ansq.tcp.connection import NSQConnection
+from ansq.tcp.reconnect import ReconnectBackoff, ReconnectLimiter, TokenBucket
+
+
+def delays(policy, count):
+    backoff = ReconnectBackoff(policy)
+    return [backoff.next_delay() for _ in range(count)]
+
+
+def test_backoff_without_jitter():
+    policy = ReconnectPolicy(max_interval=10, jitter=Jitter.NONE)
+    assert delays(policy, 6) == [1, 2, 4, 8, 10, 10]
+
+
+def test_backoff_full_jitter():
+    policy = ReconnectPolicy(max_interval=10, jitter=Jitter.FULL)
+    for attempt, delay in enumerate(delays(policy, 100)):
+        assert 0 <= delay <= min(2**attempt, 10)
+
+
+def test_backoff_decorrelated_jitter():
+    policy = ReconnectPolicy(max_interval=10, ratio=3, jitter=Jitter.DECORRELATED)
+    previous = 1
+    for delay in delays(policy, 100):
+        assert 1 <= delay <= min(previous * 3, 10)
+        previous = delay
+
+
+def test_backoff_max_attempts():
+    backoff = ReconnectBackoff(ReconnectPolicy(max_attempts=2))
+    backoff.next_delay()
+    assert not backoff.is_exhausted
+    backoff.next_delay()
+    assert backoff.is_exhausted
+    assert backoff.attempts == 2
+
+
+async def test_token_bucket():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+    # Two tokens are taken right away, the rest wait for 0.05 seconds each
+    assert 0.09 <= time.monotonic() - start < 0.5
+    assert bucket.tokens < 1
+
+
+@pytest.mark.parametrize("rate, capacity", ((0, 1), (1, 0)))
+def test_token_bucket_invalid(rate, capacity):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=rate, capacity=capacity)
+
+
+async def test_reconnect_limiter_concurrency():
+    limiter = ReconnectLimiter(rate=100, capacity=10, max_concurrent=2)
+    running = []
+
+    async def attempt():
+        async with limiter:
+            running.append(1)
+            assert len(running) <= 2
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    await asyncio.gather(*(attempt() for _ in range(6)))
+
+
+def test_reconnect_limiter_invalid():
+    with pytest.raises(ValueError):
+        ReconnectLimiter(max_concurrent=0)
+
+
+async def test_reconnect_policy_limiter():
+    loop = asyncio.get_event_loop()
+    default_limiter = ReconnectPolicy().get_limiter(loop)
+    assert isinstance(default_limiter, ReconnectLimiter)
+    assert ReconnectPolicy(max_attempts=1).get_limiter(loop) is default_limiter
+
+    limiter = ReconnectLimiter()
+    assert ReconnectPolicy(limiter=limiter).get_limiter(loop) is limiter
+    assert ReconnectPolicy(limit_reconnects=False).get_limiter(loop) is None
+
+    # Every event loop has its own default limiter
+    other_loop = asyncio.new_event_loop()
+    try:
+        assert ReconnectPolicy().get_limiter(other_loop) is not default_limiter
+    finally:
+        other_loop.close()
+
+
+async def test_close_after_max_attempts():
+    async def handle(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    closed = asyncio.Event()
+    policy = ReconnectPolicy(min_interval=0.01, max_attempts=3)
+    nsq = NSQConnection(
+        f"{host}:{port}",
+        connection_options=ConnectionOptions(
+            reconnect_policy=policy, on_close=lambda conn: closed.set()
+        ),
+    )
+    await nsq.connect()
+
+    # The server drops the connection and is gone, so reconnects fail
+    server.close()
+    await server.wait_closed()
+
+    await asyncio.wait_for(closed.wait(), timeout=5)
+    assert nsq.status.is_closed
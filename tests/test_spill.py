@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from ansq.tcp.exceptions import SpillBufferFull
+from ansq.tcp.spill import FsyncPolicy, SpillBuffer
+
+
+@pytest.fixture
+def spill_dir(tmp_path):
+    return str(tmp_path / "spill")
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def test_append_peek_consume(spill_dir):
+    buffer = SpillBuffer(spill_dir, segment_size=1024)
+    assert buffer.is_empty
+
+    buffer.append("foo", b"message1")
+    buffer.append("bar", b"message2")
+    assert not buffer.is_empty
+
+    assert buffer.peek(1) == [("foo", b"message1")]
+    assert buffer.peek(10) == [("foo", b"message1"), ("bar", b"message2")]
+
+    buffer.consume(1)
+    assert buffer.peek(10) == [("bar", b"message2")]
+
+    buffer.consume(1)
+    assert buffer.is_empty
+    assert buffer.size == 0
+    assert segment_files(spill_dir) == []
+
+    buffer.close()
+
+
+def test_segments_rollover(spill_dir):
+    buffer = SpillBuffer(spill_dir, segment_size=64)
+
+    for i in range(10):
+        buffer.append("foo", f"message{i}".encode())
+    assert len(segment_files(spill_dir)) > 1
+
+    assert buffer.peek(100) == [("foo", f"message{i}".encode()) for i in range(10)]
+
+    buffer.consume(10)
+    assert segment_files(spill_dir) == []
+
+    buffer.close()
+
+
+def test_record_larger_than_segment(spill_dir):
+    buffer = SpillBuffer(spill_dir, segment_size=16)
+
+    buffer.append("foo", b"x" * 100)
+    assert buffer.peek(1) == [("foo", b"x" * 100)]
+
+    buffer.close()
+
+
+def test_max_size(spill_dir):
+    buffer = SpillBuffer(spill_dir, max_size=32)
+    buffer.append("foo", b"message")
+
+    with pytest.raises(SpillBufferFull):
+        buffer.append("foo", b"message")
+
+    buffer.close()
+
+
+@pytest.mark.parametrize("fsync", tuple(FsyncPolicy))
+def test_recover_after_reopen(spill_dir, fsync):
+    buffer = SpillBuffer(spill_dir, segment_size=64, fsync=fsync)
+    for i in range(5):
+        buffer.append("foo", f"message{i}".encode())
+    buffer.close()
+
+    buffer = SpillBuffer(spill_dir, segment_size=64, fsync=fsync)
+    assert buffer.peek(100) == [("foo", f"message{i}".encode()) for i in range(5)]
+
+    # New records are appended after recovered ones
+    buffer.append("foo", b"message5")
+    assert buffer.peek(100)[-1] == ("foo", b"message5")
+
+    buffer.close()
+
+
+def test_torn_record_is_dropped(spill_dir):
+    buffer = SpillBuffer(spill_dir, segment_size=1024)
+    buffer.append("foo", b"message1")
+    buffer.append("foo", b"message2")
+    buffer.close()
+
+    # Corrupt the body of the last record
+    path = os.path.join(spill_dir, segment_files(spill_dir)[0])
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(data.rindex(b"message2"))
+        f.write(b"MESSAGE2")
+
+    buffer = SpillBuffer(spill_dir, segment_size=1024)
+    assert buffer.peek(10) == [("foo", b"message1")]
+    buffer.close()
@@ -0,0 +1,58 @@
+import ssl
+
+from ansq.tcp.tls import (
+    ResumingSSLContext,
+    TLSSessionCache,
+    create_default_context,
+    resume_session,
+)
+
+
+class Session:
+    """Stand-in for `ssl.SSLSession` which can't be created directly."""
+
+
+def test_session_cache():
+    cache = TLSSessionCache()
+    context = ssl.create_default_context()
+    session = Session()
+
+    assert cache.get(context, "127.0.0.1:4150") is None
+
+    cache.set(context, "127.0.0.1:4150", session)
+    assert cache.get(context, "127.0.0.1:4150") is session
+    assert cache.get(context, "127.0.0.1:4250") is None
+    assert cache.get(ssl.create_default_context(), "127.0.0.1:4150") is None
+
+    cache.remove(context, "127.0.0.1:4150")
+    assert cache.get(context, "127.0.0.1:4150") is None
+
+
+def test_session_cache_evicts_least_recently_used():
+    cache = TLSSessionCache(max_size=2)
+    context = ssl.create_default_context()
+    sessions = [Session() for _ in range(3)]
+
+    cache.set(context, "a", sessions[0])
+    cache.set(context, "b", sessions[1])
+    cache.get(context, "a")
+    cache.set(context, "c", sessions[2])
+
+    assert len(cache) == 2
+    assert cache.get(context, "a") is sessions[0]
+    assert cache.get(context, "b") is None
+    assert cache.get(context, "c") is sessions[2]
+
+
+def test_create_default_context():
+    context = create_default_context()
+    assert isinstance(context, ResumingSSLContext)
+    assert context.verify_mode == ssl.CERT_REQUIRED
+    assert context.check_hostname
+
+    # Without a session to resume SSL objects are created as usual
+    with resume_session(None):
+        ssl_object = context.wrap_bio(
+            ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname="localhost"
+        )
+    assert ssl_object.session is None
@@ -1,6 +1,17 @@
+import asyncio
+from array import array
+
 import pytest
 
-from ansq import create_reader, create_writer
+from ansq import (
+    FailoverPolicy,
+    PreparedMessage,
+    PublishBufferOptions,
+    SpillOptions,
+    create_reader,
+    create_writer,
+)
+from ansq.tcp.exceptions import NSQNoConnections
 from ansq.tcp.writer import Writer
 
 
@@ -66,6 +77,47 @@ async def test_dpub(nsqd):
     await writer.close()
 
 
+async def test_pub_buffer_protocol_messages(nsqd):
+    writer = await create_writer()
+    reader = await create_reader(topic="foo", channel="bar")
+
+    buffer = bytearray(b"x" * 32 * 1024)
+    messages = (memoryview(buffer)[:20000], array("B", b"abc"), memoryview(b"small"))
+
+    response = await writer.pub(topic="foo", message=messages[0])
+    assert response.is_ok
+    response = await writer.mpub("foo", *messages[1:])
+    assert response.is_ok
+
+    for message in messages:
+        received = await reader.wait_for_message()
+        assert received.body == bytes(message)
+        await received.fin()
+
+    await reader.close()
+    await writer.close()
+
+
+async def test_pub_prepared_messages(nsqd):
+    writer = await create_writer()
+    reader = await create_reader(topic="foo", channel="bar")
+
+    messages = (PreparedMessage({"key": 1}), PreparedMessage("test", "json"))
+
+    response = await writer.pub(topic="foo", message=messages[0])
+    assert response.is_ok
+    response = await writer.mpub("foo", *messages)
+    assert response.is_ok
+
+    for body in (b'{"key":1}', b'{"key":1}', b'"test"'):
+        received = await reader.wait_for_message()
+        assert received.body == body
+        await received.fin()
+
+    await reader.close()
+    await writer.close()
+
+
 async def test_pub_to_multiple_tcp_addresses(nsqd, nsqd2):
     writer = await create_writer(
         nsqd_tcp_addresses=[nsqd.tcp_address, nsqd2.tcp_address],
@@ -86,3 +138,151 @@ async def test_pub_to_multiple_tcp_addresses(nsqd, nsqd2):
     assert message.body == b"test_message"
 
     await reader.close()
+
+
+async def test_pub_with_failover_policy(nsqd, nsqd2, wait_for):
+    writer = await create_writer(
+        nsqd_tcp_addresses=[nsqd.tcp_address, nsqd2.tcp_address],
+        failover_policy=FailoverPolicy(timeout=0.5),
+    )
+
+    await nsqd2.stop()
+    await wait_for(
+        lambda: len([conn for conn in writer.connections if conn.is_connected]) == 1
+    )
+
+    for i in range(10):
+        response = await writer.pub(topic="foo", message=f"test_message_{i}")
+        assert response.is_ok
+
+    await writer.close()
+
+
+async def test_hedged_pub(nsqd, nsqd2):
+    writer = await create_writer(
+        nsqd_tcp_addresses=[nsqd.tcp_address, nsqd2.tcp_address],
+        failover_policy=FailoverPolicy(hedged_topics=["foo"], hedge_delay=0),
+    )
+
+    response = await writer.pub(topic="foo", message="test_message")
+    assert response.is_ok
+
+    await writer.close()
+
+
+async def test_pub_without_open_connections(nsqd):
+    writer = await create_writer()
+    await writer.close()
+
+    with pytest.raises(NSQNoConnections):
+        await writer.pub(topic="foo", message="test_message")
+
+
+async def test_pub_with_key(nsqd, nsqd2):
+    writer = await create_writer(
+        nsqd_tcp_addresses=[nsqd.tcp_address, nsqd2.tcp_address],
+    )
+
+    for i in range(5):
+        response = await writer.pub(topic="foo", message=f"test_message{i}", key="k")
+        assert response.is_ok
+
+    address = writer._get_keyed_open_connection("k").id
+    await writer.close()
+
+    reader = await create_reader(
+        topic="foo", channel="bar", nsqd_tcp_addresses=[address]
+    )
+
+    for i in range(5):
+        message = await reader.wait_for_message()
+        assert message.body == f"test_message{i}".encode()
+        await message.fin()
+
+    await reader.close()
+
+
+async def test_mpub_by_key(nsqd, nsqd2):
+    writer = await create_writer(
+        nsqd_tcp_addresses=[nsqd.tcp_address, nsqd2.tcp_address],
+    )
+
+    responses = await writer.mpub_by_key(
+        "foo", [(f"key{i}", f"test_message{i}") for i in range(20)]
+    )
+    assert len(responses) == 2
+    assert all(response.is_ok for response in responses)
+
+    await writer.close()
+
+
+async def test_spill_messages_while_nsqd_is_down(nsqd, tmp_path, wait_for):
+    writer = await create_writer(
+        spill_options=SpillOptions(directory=str(tmp_path), drain_interval=0.1),
+    )
+
+    await nsqd.stop()
+    await wait_for(lambda: not writer.connections[0].is_connected)
+
+    assert await writer.pub(topic="foo", message="test_message1") is None
+    assert await writer.mpub("foo", "test_message2", "test_message3") is None
+    assert not writer.spill_buffer.is_empty
+
+    await nsqd.start()
+    await wait_for(lambda: writer.spill_buffer.is_empty)
+    await writer.close()
+
+    reader = await create_reader(topic="foo", channel="bar")
+    for i in range(1, 4):
+        message = await reader.wait_for_message()
+        assert message.body == f"test_message{i}".encode()
+        await message.fin()
+
+    await reader.close()
+
+
+async def test_publish_nowait(nsqd):
+    writer = await create_writer(publish_buffer_options=PublishBufferOptions())
+
+    for i in range(10):
+        writer.publish_nowait(topic="foo", message=f"test_message{i}")
+    await writer.flush()
+    assert len(writer.publish_buffer) == 0
+
+    await writer.close()
+
+    reader = await create_reader(topic="foo", channel="bar")
+    for i in range(10):
+        message = await reader.wait_for_message()
+        assert message.body == f"test_message{i}".encode()
+        await message.fin()
+
+    await reader.close()
+
+
+async def test_publish_nowait_without_publish_buffer(nsqd):
+    writer = await create_writer()
+
+    with pytest.raises(RuntimeError, match=r"^Publish buffer is not enabled$"):
+        writer.publish_nowait(topic="foo", message="test_message")
+
+    await writer.close()
+
+
+async def test_spill_messages_when_nsqd_is_down_on_connect(tmp_path):
+    # Address of a closed server, so connections are refused
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    server.close()
+    await server.wait_closed()
+
+    writer = await create_writer(
+        nsqd_tcp_addresses=[f"{host}:{port}"],
+        spill_options=SpillOptions(directory=str(tmp_path)),
+    )
+    assert not writer.connections
+
+    assert await writer.pub(topic="foo", message="test_message") is None
+    assert not writer.spill_buffer.is_empty
+
+    await writer.close()
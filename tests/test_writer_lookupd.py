@@ -0,0 +1,75 @@
+import pytest
+
+from ansq import create_writer
+
+
+@pytest.fixture
+async def nsqlookupd(create_nsqlookupd):
+    async with create_nsqlookupd() as nsqlookupd:
+        yield nsqlookupd
+
+
+@pytest.fixture
+async def nsqd(create_nsqd, nsqlookupd):
+    async with create_nsqd(lookupd_tcp_addresses=[nsqlookupd.tcp_address]) as nsqd:
+        yield nsqd
+
+
+@pytest.fixture
+async def nsqd2(create_nsqd, nsqlookupd):
+    async with create_nsqd(
+        addr="127.0.0.1:4250",
+        http_addr="127.0.0.1:4251",
+        lookupd_tcp_addresses=[nsqlookupd.tcp_address],
+    ) as nsqd:
+        yield nsqd
+
+
+async def test_create_writer(nsqlookupd, nsqd, nsqd2, wait_for):
+    writer = await create_writer(
+        lookupd_http_addresses=[nsqlookupd.http_addr],
+        lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
+    )
+    await wait_for(lambda: len(writer.connections) == 2)
+
+    response = await writer.pub(topic="foo", message="test_message")
+    assert response.is_ok
+
+    await writer.close()
+
+
+async def test_drop_connection_to_gone_node(nsqlookupd, nsqd, nsqd2, wait_for):
+    writer = await create_writer(
+        lookupd_http_addresses=[nsqlookupd.http_addr],
+        lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
+    )
+    await wait_for(lambda: len(writer.connections) == 2)
+
+    await nsqd2.stop()
+    await wait_for(lambda: len(writer.connections) == 1)
+    assert writer.connections[0].id == nsqd.tcp_address
+
+    await nsqd2.start()
+    await wait_for(lambda: len(writer.connections) == 2)
+
+    await writer.close()
+
+
+async def test_keep_static_connection(nsqlookupd, nsqd, nsqd2, wait_for):
+    writer = await create_writer(
+        nsqd_tcp_addresses=[nsqd.tcp_address],
+        lookupd_http_addresses=[nsqlookupd.http_addr],
+        lookupd_poll_interval=100,
+        lookupd_cache_ttl=0,
+    )
+    await wait_for(lambda: len(writer.connections) == 2)
+
+    await nsqd2.stop()
+    await wait_for(lambda: len(writer.connections) == 1)
+
+    response = await writer.pub(topic="foo", message="test_message")
+    assert response.is_ok
+
+    await writer.close()